@@ -0,0 +1,167 @@
+# ------------------------------------------------------------------
+# --- Test de charge : N sessions ouvrent le même ticker en même temps ---
+# ------------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - simuler_sessions : N sessions (threads) chargent le snapshot complet d'un même ticker au même instant,
+      avec un fournisseur synthétique lent (latence simulée par donnée), cache vide, sur le pool partagé
+      de charger_snapshot (le même que dans l'application)
+    - main : appels au fournisseur par donnée (attendu : exactement 1 chacun), demandes regroupées,
+      temps de chargement par session. Code de sortie 1 si une donnée a été téléchargée plus d'une fois.
+    - --panne : le cache est rempli puis expire, et le fournisseur tombe en panne (chaque appel échoue après la latence).
+      Attendu : toutes les sessions reçoivent la dernière valeur connue, en un temps de lecture locale (p99),
+      et le disjoncteur coupe les appels. Code de sortie 1 si une session n'a pas de données.
+    - --distincts : chaque session ouvre un ticker différent, sur le pool partagé de charger_snapshot (celui de l'appli).
+      Attendu : chaque page attend son appel le plus lent, pas la somme de ses 9 appels ni les autres sessions.
+      Code de sortie 1 si une session est incomplète ou met plus de FACTEUR_MAX fois la latence d'un appel.
+
+    Utilisation (depuis la racine du dépôt) :
+        python benchmarks/bench_charge.py --sessions 50 --latence 0.3
+        python benchmarks/bench_charge.py --sessions 50 --latence 2 --panne
+        python benchmarks/bench_charge.py --sessions 12 --distincts
+
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Cache et stockage des cours dans un dossier temporaire (à régler AVANT d'importer utils)
+DOSSIER_TRAVAIL = Path(tempfile.mkdtemp(prefix="bench_charge_"))
+os.environ["DASHBOARD_CACHE_DIR"] = str(DOSSIER_TRAVAIL / "cache")
+os.environ["DASHBOARD_STOCKAGE_COURS"] = str(DOSSIER_TRAVAIL / "cours")
+os.environ["DASHBOARD_SEUILS_AUTO"] = "0"
+os.environ["DASHBOARD_PRECHAUFFAGE"] = "0"
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fournisseur_synthetique import FournisseurSynthetique
+from utils import Cache_Donnees
+from utils.Cache_Donnees import TickerEnCache, get_cache
+from utils.Donnees_Financieres import SESSIONS_SIMULTANEES, charger_snapshot
+from utils.Fournisseur_Donnees import set_fournisseur
+
+# --distincts : page <= FACTEUR_MAX x latence d'un appel. La latence par défaut (3 s) reste grande devant le temps CPU
+# des sessions (génération des données synthétiques, écritures du cache), qui se partagent le GIL
+FACTEUR_MAX = 2
+LATENCE_DISTINCTS = 3.0
+
+
+class FournisseurEnPanne(FournisseurSynthetique):
+    """Synthétique, puis (en_panne = True) chaque appel échoue au bout de la latence (ex: Yahoo qui limite le débit)."""
+    en_panne = False
+
+    def _attendre(self, donnee):
+        super()._attendre(donnee)
+        if self.en_panne:
+            raise ConnectionError("Too Many Requests")
+
+
+def simuler_sessions(tickers, fournisseur):
+    """
+    Une session par élément de `tickers` : chacune attend les autres (barrière) puis charge le snapshot complet
+    de son ticker, comme à l'ouverture de la page (pool partagé par défaut de charger_snapshot).
+    """
+    depart = threading.Barrier(len(tickers))
+
+    def session(ticker):
+        depart.wait()
+        debut = time.perf_counter()
+        snapshot = charger_snapshot(TickerEnCache(ticker, fournisseur=fournisseur), ticker)
+        return time.perf_counter() - debut, snapshot
+
+    with ThreadPoolExecutor(max_workers=len(tickers)) as executeur:
+        return list(executeur.map(session, tickers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge : regroupement des appels au fournisseur")
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument("--sessions", type=int, help=f"Nombre de sessions (défaut 50 ; {SESSIONS_SIMULTANEES} avec --distincts, capacité du pool)")
+    parser.add_argument("--latence", type=float, help=f"Latence simulée de chaque appel (secondes, défaut 0.3 ; {LATENCE_DISTINCTS} avec --distincts)")
+    parser.add_argument("--panne", action="store_true", help="Cache expiré + fournisseur en panne")
+    parser.add_argument("--distincts", action="store_true", help="Un ticker différent par session (pool partagé)")
+    args = parser.parse_args()
+    if args.latence is None:
+        args.latence = LATENCE_DISTINCTS if args.distincts else 0.3
+    if args.sessions is None:
+        args.sessions = SESSIONS_SIMULTANEES if args.distincts else 50
+
+    fournisseur = FournisseurEnPanne(latences={"*": args.latence})
+    set_fournisseur(fournisseur)
+    if args.panne:
+        return mesurer_panne(args, fournisseur)
+    if args.distincts:
+        return mesurer_distincts(args, fournisseur)
+    resultats = simuler_sessions([args.ticker] * args.sessions, fournisseur)
+
+    durees = [duree for duree, _ in resultats]
+    en_retard = sum(1 for _, snapshot in resultats if snapshot.en_retard)
+    print(f"{args.sessions} sessions, {args.ticker}, latence {args.latence:.2f} s")
+    print(f"  chargement : {statistics.median(durees):.2f} s (médiane), {max(durees):.2f} s (max), {en_retard} session(s) incomplète(s)")
+    print("  appels au fournisseur :")
+    for donnee, nombre in sorted(fournisseur.appels.items()):
+        print(f"    {donnee:<25} {nombre}")
+    stats = get_cache().stats()["appels_uniques"]
+    print(f"  demandes regroupées : {stats['regroupes']} ({stats['taux_regroupement']:.0%}), "
+          f"max {stats['max_regroupes']} sur un même appel")
+    for donnee, nombre in sorted(stats["regroupes_par_donnee"].items()):
+        print(f"    {donnee:<25} {nombre}")
+
+    doublons = {donnee: nombre for donnee, nombre in fournisseur.appels.items() if nombre > 1}
+    if doublons:
+        print(f"/!\\ données téléchargées plusieurs fois : {doublons}")
+        sys.exit(1)
+
+
+def mesurer_panne(args, fournisseur):
+    # Cache rempli avec des données déjà expirées (TTL nul), puis panne du fournisseur
+    for donnee in Cache_Donnees.TTL_PAR_DONNEE:
+        if Cache_Donnees.TTL_PAR_DONNEE[donnee] is not None:
+            Cache_Donnees.TTL_PAR_DONNEE[donnee] = 0
+    simuler_sessions([args.ticker], fournisseur)
+    fournisseur.en_panne = True
+    fournisseur.appels.clear()
+
+    resultats = simuler_sessions([args.ticker] * args.sessions, fournisseur)
+    durees = sorted(duree for duree, _ in resultats)
+    sans_donnees = sum(1 for _, snapshot in resultats if not snapshot.info or snapshot.financials.empty)
+    p99 = durees[min(len(durees) - 1, int(0.99 * len(durees)))]
+    print(f"{args.sessions} sessions, {args.ticker}, fournisseur en panne (latence {args.latence:.2f} s)")
+    print(f"  chargement : {statistics.median(durees) * 1000:.1f} ms (médiane), {p99 * 1000:.1f} ms (p99), "
+          f"{sans_donnees} session(s) sans données")
+    print(f"  âge servi : {sorted(set(round(a, 1) for _, s in resultats for a in s.ages.values()))[:3]} s")
+    stats = get_cache().stats()
+    print(f"  appels au fournisseur pendant la panne : {sum(fournisseur.appels.values())}, "
+          f"périmées servies : {stats['perimees_servies']}, disjoncteur : {stats['disjoncteur']}")
+    if sans_donnees:
+        sys.exit(1)
+
+
+def mesurer_distincts(args, fournisseur):
+    tickers = [f"{args.ticker}{i}" for i in range(args.sessions)]
+    resultats = simuler_sessions(tickers, fournisseur)
+    durees = [duree for duree, _ in resultats]
+    incompletes = {ticker: sorted(s.en_retard) for ticker, (_, s) in zip(tickers, resultats) if s.en_retard}
+    limite = FACTEUR_MAX * args.latence
+    print(f"{args.sessions} sessions sur des tickers distincts, pool partagé, latence {args.latence:.2f} s par appel")
+    print(f"  chargement : {min(durees):.2f} s (min), {statistics.median(durees):.2f} s (médiane), "
+          f"{max(durees):.2f} s (max), limite {limite:.2f} s ; {len(incompletes)} session(s) incomplète(s)")
+    if incompletes or max(durees) > limite:
+        print(f"/!\\ les sessions s'attendent les unes les autres : {incompletes or 'trop lent'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
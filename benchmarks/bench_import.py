@@ -0,0 +1,145 @@
+# ----------------------------------------------------------------
+# --- Benchmark du démarrage : temps d'import de chaque page (budget) ---
+# ----------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - imports_de_page : les imports de haut niveau d'une page (Dashboard et pages/), lus dans le source (ast)
+    - mesurer_page : exécute ces imports dans un processus neuf avec `python -X importtime`, après le socle
+      (streamlit, déjà chargé par le serveur ; + pandas pour les pages qui affichent un tableau dès l'ouverture),
+      non compté, et analyse la sortie : temps total, modules les plus coûteux, modules interdits au démarrage
+      (pandas pour le Dashboard, yfinance partout), effets de bord à l'import (éléments Streamlit affichés, threads démarrés)
+    - main : médiane sur N processus par page, comparaison au budget. Code de sortie 1 si une page dépasse
+      son budget, charge un module interdit, ou si un import affiche quelque chose / démarre un thread.
+
+    Un nouveau worker (mise à l'échelle automatique) paie ces imports avant sa première page :
+    ce benchmark évite qu'un import lourd en haut d'un module ne revienne sans qu'on le voie.
+
+    Utilisation (depuis la racine du dépôt) :
+        python benchmarks/bench_import.py
+        python benchmarks/bench_import.py --budget 40 --repetitions 9 --sortie imports.json
+
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+PAGES = [RACINE / "🚀_Dashboard.py", *sorted((RACINE / "pages").glob("*.py"))]
+BUDGET_MS = 60 # Par page, au-delà du socle
+MARQUEUR = "--- imports de la page ---"
+
+# Socle importé avant la mesure (non compté) et modules qui ne doivent pas être chargés par les imports de la page
+SOCLE = ("streamlit",)
+SOCLE_DONNEES = ("streamlit", "pandas") # Pages dont le premier affichage est un tableau : pandas y est inévitable
+INTERDITS = ("yfinance",) # Réseau : chargé au premier appel au fournisseur
+SOCLE_PAR_PAGE = {"🚀_Dashboard.py": SOCLE} # Défaut : SOCLE_DONNEES
+INTERDITS_PAR_PAGE = {"🚀_Dashboard.py": INTERDITS + ("pandas",)} # Accueil : titre et recherche, sans pandas
+
+# Exécuté dans le processus mesuré : le socle d'abord (hors mesure), puis les imports de la page
+_PREAMBULE = """
+import json, sys, threading
+{socle}
+import streamlit.delta_generator as _dg
+_elements = []
+_enqueue = _dg.DeltaGenerator._enqueue
+def _compter(self, delta_type, *args, **kwargs):
+    _elements.append(delta_type)
+    return _enqueue(self, delta_type, *args, **kwargs)
+_dg.DeltaGenerator._enqueue = _compter
+_threads = threading.active_count()
+sys.stderr.write({marqueur!r} + "\\n")
+sys.stderr.flush()
+"""
+_BILAN = """
+print(json.dumps({{"elements": _elements, "threads": threading.active_count() - _threads,
+                  "interdits": [m for m in {interdits!r} if m in sys.modules]}}))
+"""
+
+
+def imports_de_page(chemin):
+    """Instructions import / from ... import du niveau module (pas celles des fonctions : chargées à la demande)."""
+    arbre = ast.parse(chemin.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(noeud) for noeud in arbre.body if isinstance(noeud, (ast.Import, ast.ImportFrom)))
+
+
+def _analyser(sortie_erreur):
+    """Lignes `import time: propre | cumulé | module` après le marqueur -> {module de premier niveau: µs cumulées}."""
+    modules = {}
+    apres_marqueur = False
+    for ligne in sortie_erreur.splitlines():
+        if ligne == MARQUEUR:
+            apres_marqueur = True
+        elif apres_marqueur and ligne.startswith("import time:") and "|" in ligne:
+            _, cumule, nom = ligne[len("import time:"):].split("|")
+            if not nom[1:].startswith(" "): # Indentation = profondeur : on ne garde que le premier niveau
+                modules[nom.strip()] = int(cumule)
+    return modules
+
+
+def mesurer_page(chemin, environnement):
+    socle = SOCLE_PAR_PAGE.get(chemin.name, SOCLE_DONNEES)
+    interdits = INTERDITS_PAR_PAGE.get(chemin.name, INTERDITS)
+    code = (_PREAMBULE.format(socle="\n".join(f"import {m}" for m in socle), marqueur=MARQUEUR)
+            + imports_de_page(chemin) + _BILAN.format(interdits=interdits))
+    resultat = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=RACINE, env=environnement,
+                              capture_output=True, text=True)
+    if resultat.returncode != 0:
+        raise RuntimeError(f"{chemin.name} : import impossible\n{resultat.stderr[-2000:]}")
+    modules = _analyser(resultat.stderr)
+    bilan = json.loads(resultat.stdout.strip().splitlines()[-1])
+    return sum(modules.values()) / 1000, modules, bilan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import des pages, comparé à un budget")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Budget par page (ms)")
+    parser.add_argument("--repetitions", type=int, default=5, help="Processus par page (on garde la médiane)")
+    parser.add_argument("--sortie", help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    # Cache et stockage dans un dossier temporaire : l'import ne doit rien écrire, mais on ne touche pas au vrai cache
+    dossier = Path(tempfile.mkdtemp(prefix="bench_import_"))
+    environnement = {**os.environ, "DASHBOARD_CACHE_DIR": str(dossier / "cache"),
+                     "DASHBOARD_STOCKAGE_COURS": str(dossier / "cours"), "PYTHONDONTWRITEBYTECODE": "1"}
+
+    resultats, echecs = {}, []
+    for page in PAGES:
+        mesures = [mesurer_page(page, environnement) for _ in range(args.repetitions)]
+        total = statistics.median(m[0] for m in mesures)
+        _, modules, bilan = mesures[-1]
+        plus_lents = sorted(modules.items(), key=lambda m: -m[1])[:5]
+        resultats[page.name] = {"total_ms": total, "modules_ms": {nom: us / 1000 for nom, us in plus_lents}, **bilan}
+
+        statut = "OK" if total <= args.budget else "DÉPASSÉ"
+        socle = " + ".join(SOCLE_PAR_PAGE.get(page.name, SOCLE_DONNEES))
+        print(f"{page.name:<25} {total:7.1f} ms au-delà de {socle} (budget {args.budget:.0f} ms) {statut}")
+        for nom, us in plus_lents:
+            print(f"    {nom:<40} {us / 1000:7.1f} ms")
+        if total > args.budget:
+            echecs.append(f"{page.name} : {total:.1f} ms > {args.budget:.0f} ms")
+        if bilan["interdits"]:
+            echecs.append(f"{page.name} : {', '.join(bilan['interdits'])} chargé(s) dès l'import")
+        if bilan["elements"] or bilan["threads"]:
+            echecs.append(f"{page.name} : effets de bord à l'import ({len(bilan['elements'])} élément(s) "
+                          f"{bilan['elements']}, {bilan['threads']} thread(s))")
+
+    if args.sortie:
+        Path(args.sortie).write_text(json.dumps(resultats, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Résultats écrits dans {args.sortie}")
+    if echecs:
+        print("/!\\ " + "\n/!\\ ".join(echecs))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
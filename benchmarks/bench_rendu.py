@@ -0,0 +1,352 @@
+# -------------------------------------------------------------
+# --- Benchmark du rendu des pages (Streamlit AppTest, hors ligne) ---
+# -------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - Chronometre : temps passé dans chaque phase du rendu (temps exclusif, les phases imbriquées ne sont pas comptées deux fois)
+        - chargement : charger_snapshot (appels au fournisseur, cache, stockage des cours)
+        - calculs : performance YTD, préparation des graphiques (CAGR), mise en forme des tableaux
+        - figures : construction des figures Plotly (jauges, histogrammes)
+        - serialisation : figures -> JSON, tableaux -> Arrow (ce que Streamlit envoie au navigateur)
+    - mesurer_page : exécute une page headless (AppTest), à froid (cache vide) puis à chaud, N répétitions
+    - mesurer_interactions : appels au fournisseur par interaction (changement d'onglet, nouvel actif...)
+    - main : benchmark du Dashboard et de afficher_onglet_finance, résultats en JSON (+ comparaison avec un ancien JSON)
+
+    Les données viennent d'un FournisseurRejeu (fixtures enregistrées, ex: enregistrer_ticker) :
+    aucun appel réseau, résultats comparables d'un commit à l'autre.
+    Sans fixture pour un ticker, des données synthétiques (déterministes) sont générées (fournisseur_synthetique.py).
+
+    Utilisation (depuis la racine du dépôt) :
+        python benchmarks/bench_rendu.py --tickers AAPL,MC.PA --sortie avant.json
+        python benchmarks/bench_rendu.py --tickers AAPL,MC.PA --sortie apres.json --comparer avant.json
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Cache et stockage des cours dans un dossier temporaire (à régler AVANT d'importer utils)
+DOSSIER_TRAVAIL = Path(tempfile.mkdtemp(prefix="bench_rendu_"))
+os.environ["DASHBOARD_CACHE_DIR"] = str(DOSSIER_TRAVAIL / "cache")
+os.environ["DASHBOARD_STOCKAGE_COURS"] = str(DOSSIER_TRAVAIL / "cours")
+os.environ["DASHBOARD_INDEX_SYMBOLES"] = str(DOSSIER_TRAVAIL / "symboles.csv")
+os.environ["DASHBOARD_SEUILS_AUTO"] = "0" # Pas de tâche de fond pendant les mesures (seuils par secteur, préchauffage)
+os.environ["DASHBOARD_PRECHAUFFAGE"] = "0"
+
+PHASES = ["chargement", "calculs", "figures", "serialisation"]
+
+# Fonctions chronométrées : (module, attribut) -> phase
+FONCTIONS_PAR_PHASE = {
+    ("utils.Donnees_Financieres", "charger_snapshot"): "chargement",
+    ("utils.Indicateurs", "calculate_ytd_performance"): "calculs",
+    ("utils.Analyse_Financiere", "croissance_lot"): "calculs",
+    ("utils.Analyse_Financiere", "tableau_pourcentages"): "calculs",
+    ("utils.Graphiques", "create_gauge"): "figures",
+    ("utils.Analyse_Financiere", "create_bar_chart"): "figures",
+    ("plotly.io", "to_json"): "serialisation",
+    ("streamlit.dataframe_util", "convert_pandas_df_to_arrow_bytes"): "serialisation",
+    ("streamlit.dataframe_util", "convert_anything_to_arrow_bytes"): "serialisation",
+    ("streamlit.dataframe_util", "convert_arrow_table_to_arrow_bytes"): "serialisation",
+    ("streamlit.elements.arrow", "marshall_styler"): "serialisation",
+}
+
+
+# --------------------------------
+# --- Chronométrage des phases ---
+# --------------------------------
+class Chronometre:
+    """
+    Enveloppe les fonctions de FONCTIONS_PAR_PHASE. Temps exclusif : quand une phase en appelle
+    une autre (ex: figure construite pendant un calcul), le temps de l'appel interne va à sa propre phase.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+        self._originaux = {}
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        self.temps = dict.fromkeys(PHASES, 0.0)
+        self.appels = dict.fromkeys(PHASES, 0)
+
+    def _envelopper(self, fonction, phase):
+        chrono = self
+
+        def enveloppe(*args, **kwargs):
+            pile = chrono._local.__dict__.setdefault("pile", [])
+            pile.append(0.0) # temps des phases internes, à retirer du temps de cette phase
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                duree = time.perf_counter() - debut
+                interne = pile.pop()
+                if pile:
+                    pile[-1] += duree
+                with chrono._verrou:
+                    chrono.temps[phase] += duree - interne
+                    chrono.appels[phase] += 1
+
+        enveloppe.__wrapped__ = fonction
+        return enveloppe
+
+    def installer(self):
+        import importlib
+        for (nom_module, attribut), phase in FONCTIONS_PAR_PHASE.items():
+            module = importlib.import_module(nom_module)
+            if not hasattr(module, attribut):
+                print(f"(ignoré : {nom_module}.{attribut} introuvable)")
+                continue
+            self._originaux[(module, attribut)] = getattr(module, attribut)
+            setattr(module, attribut, self._envelopper(getattr(module, attribut), phase))
+
+    def retirer(self):
+        for (module, attribut), fonction in self._originaux.items():
+            setattr(module, attribut, fonction)
+        self._originaux.clear()
+
+
+# -------------------------
+# --- Pages à mesurer ---
+# -------------------------
+def _page_finance(ticker):
+    """Script AppTest : uniquement l'onglet Analyse fondamentale."""
+    from utils.Cache_Donnees import TickerEnCache
+    from utils.Donnees_Financieres import charger_snapshot
+    from utils.Analyse_Financiere import afficher_onglet_finance
+
+    afficher_onglet_finance(charger_snapshot(TickerEnCache(ticker), ticker))
+
+
+def _creer_app(page, ticker, delai):
+    from streamlit.testing.v1 import AppTest
+
+    if page == "dashboard":
+        app = AppTest.from_file(str(RACINE / "🚀_Dashboard.py"), default_timeout=delai)
+        app.session_state["ticker"] = ticker
+    else:
+        app = AppTest.from_function(_page_finance, args=(ticker,), default_timeout=delai)
+    return app
+
+
+def _vider_caches():
+    """Repart à froid : cache disque vide, calculs mémorisés oubliés et stockage des cours neuf."""
+    import utils.Analyse_Financiere as analyse
+    import utils.Stockage_Cours as stockage
+    from utils.Cache_Donnees import get_cache
+
+    get_cache().vider()
+    analyse._calculs_par_ticker.clear()
+    stockage._stockage = stockage.StockageCours(Path(tempfile.mkdtemp(dir=DOSSIER_TRAVAIL, prefix="cours_")))
+
+
+def _executer(page, ticker, chrono, fournisseur, delai, memoire=False):
+    """Une exécution de la page : durée totale, temps par phase, appels au fournisseur (et pic mémoire)."""
+    app = _creer_app(page, ticker, delai)
+    chrono.reinitialiser()
+    appels_avant = sum(fournisseur.appels.values())
+    if memoire:
+        tracemalloc.start()
+
+    debut = time.perf_counter()
+    app.run()
+    total = time.perf_counter() - debut
+
+    resultat = {
+        "total": total,
+        "phases": dict(chrono.temps),
+        "appels_phases": dict(chrono.appels),
+        "appels_fournisseur": sum(fournisseur.appels.values()) - appels_avant,
+        "erreurs": [e.value for e in app.error] + [e.message for e in app.exception],
+    }
+    if memoire:
+        resultat["pic_memoire_mo"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return resultat
+
+
+def _resumer(executions):
+    """Médiane des répétitions (temps en ms)."""
+    resume = {
+        "total_ms": statistics.median(e["total"] for e in executions) * 1000,
+        "phases_ms": {p: statistics.median(e["phases"][p] for e in executions) * 1000 for p in PHASES},
+        "appels_phases": executions[0]["appels_phases"],
+        "appels_fournisseur": executions[0]["appels_fournisseur"],
+        "erreurs": executions[0]["erreurs"],
+    }
+    resume["phases_ms"]["autres"] = max(resume["total_ms"] - sum(resume["phases_ms"].values()), 0.0)
+    return resume
+
+
+def mesurer_page(page, ticker, chrono, fournisseur, repetitions=5, delai=60):
+    """Rendu à froid (cache vidé avant chaque exécution) puis à chaud (cache rempli), + pic mémoire à froid."""
+    froid, chaud = [], []
+    for _ in range(repetitions):
+        _vider_caches()
+        froid.append(_executer(page, ticker, chrono, fournisseur, delai))
+        chaud.append(_executer(page, ticker, chrono, fournisseur, delai))
+
+    # Pic mémoire mesuré à part : tracemalloc ralentit beaucoup l'exécution
+    _vider_caches()
+    memoire = _executer(page, ticker, chrono, fournisseur, delai, memoire=True)
+
+    return {
+        "froid": _resumer(froid),
+        "chaud": _resumer(chaud),
+        "pic_memoire_mo": memoire["pic_memoire_mo"],
+    }
+
+
+# ---------------------------------------
+# --- Appels au fournisseur par interaction ---
+# ---------------------------------------
+def mesurer_interactions(ticker, autre_ticker, fournisseur, delai=60):
+    """
+    Scénario d'utilisation du Dashboard (cache vidé au départ) : nombre d'appels au fournisseur
+    et durée de chaque interaction. La frappe dans la barre de recherche (fragment) ne relance pas la page :
+    elle n'apparaît pas ici (composant non pilotable par AppTest).
+    """
+    _vider_caches()
+    app = _creer_app("dashboard", ticker, delai)
+    etapes = [
+        ("premier affichage", lambda: None),
+        ("rerun sans changement", lambda: None),
+        ("ouverture Analyse fondamentale", lambda: app.session_state.__setitem__("onglet_actif", "📚 Analyse fondamentale")),
+        ("retour Tableau de Bord", lambda: app.session_state.__setitem__("onglet_actif", "📈 Tableau de Bord")),
+        ("ouverture Glossaire", lambda: app.session_state.__setitem__("onglet_actif", "📝 Glossaire")),
+        ("nouvel actif", lambda: app.session_state.__setitem__("ticker", autre_ticker)),
+    ]
+    resultats = []
+    for nom, action in etapes:
+        action()
+        appels_avant = dict(fournisseur.appels)
+        debut = time.perf_counter()
+        app.run()
+        resultats.append({
+            "interaction": nom,
+            "duree_ms": (time.perf_counter() - debut) * 1000,
+            "appels_fournisseur": {d: n - appels_avant.get(d, 0) for d, n in fournisseur.appels.items() if n - appels_avant.get(d, 0)},
+        })
+    return resultats
+
+
+# -------------------------
+# --- Comparaison JSON ---
+# -------------------------
+def comparer(ancien, nouveau):
+    """Affiche l'écart (ms et %) de chaque mesure entre deux résultats JSON."""
+    print(f"\nComparaison : {ancien.get('commit', '?')[:8]} -> {nouveau.get('commit', '?')[:8]}")
+    for cle, mesures in nouveau["resultats"].items():
+        avant = ancien["resultats"].get(cle)
+        if avant is None:
+            continue
+        for etat in ("froid", "chaud"):
+            lignes = [("total", avant[etat]["total_ms"], mesures[etat]["total_ms"])]
+            lignes += [(p, avant[etat]["phases_ms"].get(p, 0), mesures[etat]["phases_ms"].get(p, 0)) for p in PHASES]
+            for nom, a, n in lignes:
+                ecart = (n - a) / a * 100 if a else float("nan")
+                print(f"  {cle:<28} {etat:<6} {nom:<14} {a:9.1f} ms -> {n:9.1f} ms  ({ecart:+.1f} %)")
+        print(f"  {cle:<28} appels fournisseur (froid) : {avant['froid']['appels_fournisseur']} -> {mesures['froid']['appels_fournisseur']}")
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=RACINE, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu du Dashboard (AppTest, fournisseur de rejeu).")
+    parser.add_argument("--tickers", default="SYNTH", help="Tickers séparés par des virgules")
+    parser.add_argument("--fixtures", default=os.environ.get("DASHBOARD_FIXTURES"), help="Dossier des fixtures enregistrées")
+    parser.add_argument("--pages", default="dashboard,finance", help="Pages à mesurer : dashboard, finance")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--interactions", action="store_true", help="Ajoute le scénario d'interactions (appels par interaction)")
+    parser.add_argument("--sortie", help="Fichier JSON des résultats")
+    parser.add_argument("--comparer", help="Ancien fichier JSON à comparer")
+    args = parser.parse_args()
+
+    from utils.Fournisseur_Donnees import FournisseurRejeu, set_fournisseur
+    from fournisseur_synthetique import preparer_fixtures
+
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    dossier = Path(args.fixtures) if args.fixtures else DOSSIER_TRAVAIL / "fixtures"
+    manquants = [t for t in tickers if not (FournisseurRejeu(dossier)._chemin(t, "info")).exists()]
+    if manquants:
+        print(f"Pas de fixture pour {', '.join(manquants)} : données synthétiques")
+        preparer_fixtures(manquants, DOSSIER_TRAVAIL / "fixtures")
+    fournisseurs = {t: FournisseurRejeu(DOSSIER_TRAVAIL / "fixtures" if t in manquants else dossier) for t in tickers}
+
+    chrono = Chronometre()
+    chrono.installer()
+    resultats = {}
+    try:
+        for ticker in tickers:
+            set_fournisseur(fournisseurs[ticker])
+            for page in args.pages.split(","):
+                cle = f"{page.strip()}/{ticker}"
+                print(f"Mesure {cle}...")
+                resultats[cle] = mesurer_page(page.strip(), ticker, chrono, fournisseurs[ticker], args.repetitions)
+                froid, chaud = resultats[cle]["froid"], resultats[cle]["chaud"]
+                print(f"  froid {froid['total_ms']:.0f} ms ({froid['appels_fournisseur']} appels) | "
+                      f"chaud {chaud['total_ms']:.0f} ms ({chaud['appels_fournisseur']} appels) | "
+                      f"pic mémoire {resultats[cle]['pic_memoire_mo']:.1f} Mo")
+                for phase, duree in froid["phases_ms"].items():
+                    print(f"    {phase:<14} {duree:8.1f} ms (froid)  {chaud['phases_ms'][phase]:8.1f} ms (chaud)")
+                for erreur in froid["erreurs"]:
+                    print(f"  /!\\ erreur affichée : {str(erreur)[:120]}")
+        if args.interactions and tickers:
+            # Même fournisseur pour les deux actifs du scénario
+            autre = tickers[1] if len(tickers) > 1 else "SYNTH2"
+            fournisseur = fournisseurs[tickers[0]] if autre in fournisseurs and fournisseurs[autre] is fournisseurs[tickers[0]] else None
+            if fournisseur is None:
+                preparer_fixtures([tickers[0], autre], DOSSIER_TRAVAIL / "fixtures_interactions")
+                fournisseur = FournisseurRejeu(DOSSIER_TRAVAIL / "fixtures_interactions")
+            set_fournisseur(fournisseur)
+            print("Scénario d'interactions...")
+            interactions = mesurer_interactions(tickers[0], autre, fournisseur)
+            for etape in interactions:
+                appels = sum(etape["appels_fournisseur"].values())
+                print(f"  {etape['interaction']:<32} {etape['duree_ms']:8.1f} ms  {appels:2d} appel(s) {etape['appels_fournisseur'] or ''}")
+    finally:
+        chrono.retirer()
+
+    sortie = {
+        "commit": _commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "repetitions": args.repetitions,
+        "resultats": resultats,
+    }
+    if args.interactions:
+        sortie["interactions"] = interactions
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(sortie, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.sortie}")
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            comparer(json.load(f), sortie)
+
+
+if __name__ == "__main__":
+    main()
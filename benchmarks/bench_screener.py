@@ -0,0 +1,67 @@
+# --------------------------------------------------------
+# --- Benchmark du screener (filtrage + tri, hors ligne) ---
+# --------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - table_aleatoire : table du screener synthétique de N tickers (mêmes colonnes que la vraie table)
+    - main : temps médian de TableScreener.filtrer (plusieurs filtres, secteurs, tri, limite) pour N tickers
+
+    Utilisation (depuis la racine du dépôt) :
+        python benchmarks/bench_screener.py --tickers 5000,20000
+
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.Table_Screener import COLONNE_DATE, COLONNES_METRIQUES, TableScreener, table_vide
+
+SECTEURS = ["Technology", "Financial Services", "Healthcare", "Energy", "Industrials", "Utilities"]
+
+
+def table_aleatoire(n, graine=0):
+    rng = np.random.default_rng(graine)
+    table = pd.DataFrame({
+        "Nom": [f"T{i} Corp" for i in range(n)],
+        "Secteur": rng.choice(SECTEURS, n),
+        "Devise": "USD",
+        **{c: rng.normal(0.08, 0.2, n) for c in COLONNES_METRIQUES},
+        COLONNE_DATE: time.time(),
+    }, index=pd.Index([f"T{i}" for i in range(n)], name="Ticker"))
+    table["PER"] = rng.uniform(2, 80, n)
+    table["PEG"] = rng.uniform(0.1, 4, n)
+    # 10 % de valeurs manquantes, comme pour les actifs sans états financiers
+    table = table.mask(rng.random(table.shape) < 0.1 * np.isin(table.columns, list(COLONNES_METRIQUES)))
+    return table.astype(table_vide().dtypes.to_dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du filtrage du screener")
+    parser.add_argument("--tickers", default="5000,20000", help="Tailles de table, séparées par des virgules")
+    parser.add_argument("--repetitions", type=int, default=50)
+    args = parser.parse_args()
+
+    criteres = {"ROIC": (0.10, None), "PER": (None, 25), "ROE": (0.0, None), "CAGR Revenus": (0.05, None)}
+    for n in [int(x) for x in args.tickers.split(",")]:
+        screener = TableScreener(table_aleatoire(n))
+        durees = []
+        for _ in range(args.repetitions):
+            debut = time.perf_counter()
+            resultats = screener.filtrer(criteres, secteurs=SECTEURS[:3], tri="ROIC", croissant=False, limite=200)
+            durees.append(time.perf_counter() - debut)
+        print(f"{n:>7} tickers : {statistics.median(durees) * 1000:.2f} ms (médiane), {len(resultats)} résultats")
+
+
+if __name__ == "__main__":
+    main()
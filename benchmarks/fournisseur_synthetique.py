@@ -0,0 +1,160 @@
+# -------------------------------------------------------------
+# --- Fournisseur synthétique (données déterministes, hors ligne) ---
+# -------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - FournisseurSynthetique : génère des données réalistes et reproductibles (même ticker = mêmes données)
+      pour les benchmarks et les tests de charge, quand aucune fixture enregistrée n'est disponible
+    - preparer_fixtures : enregistre les données synthétiques au format du FournisseurRejeu
+
+"""
+
+import datetime
+import functools
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.Fournisseur_Donnees import ETATS_FINANCIERS, FournisseurDonnees, FournisseurRejeu, enregistrer_ticker
+
+SECTEURS = ["Technology", "Financial Services", "Healthcare", "Consumer Cyclical", "Consumer Defensive",
+            "Industrials", "Energy", "Real Estate", "Basic Materials", "Utilities"]
+
+
+@functools.lru_cache(maxsize=4)
+def _calendrier(jour):
+    """Jours ouvrés des 10 dernières années, calculés une fois par jour : bdate_range coûte plus cher
+    que le reste de la génération, et ce temps CPU fausserait les mesures de parallélisme."""
+    return pd.bdate_range(end=jour, periods=2520, tz="America/New_York", name="Date")
+
+
+class FournisseurSynthetique(FournisseurDonnees):
+    """`latences` (optionnel) : délai simulé (secondes) par type de donnée, ex: {'info': 0.2, 'financials': 0.5}."""
+    nom = "synthetique"
+
+    def __init__(self, latences=None):
+        super().__init__()
+        self.latences = latences or {}
+
+    def _rng(self, ticker, donnee=""):
+        return np.random.default_rng(zlib.crc32(f"{ticker.upper()}|{donnee}".encode()))
+
+    def _attendre(self, donnee):
+        self._compter(donnee)
+        delai = self.latences.get(donnee, self.latences.get("*", 0))
+        if delai:
+            time.sleep(delai)
+
+    def _echelle(self, ticker):
+        return float(self._rng(ticker, "echelle").uniform(1e9, 2e11))
+
+    def info(self, ticker):
+        self._attendre("info")
+        rng = self._rng(ticker, "info")
+        prix = float(self._cours(ticker)["Close"].iloc[-1])
+        return {
+            "shortName": f"{ticker.upper()} Synthetic Corp",
+            "currency": "USD",
+            "currentPrice": round(prix, 2),
+            "sector": SECTEURS[int(rng.integers(len(SECTEURS)))],
+            "marketCap": self._echelle(ticker) * rng.uniform(2, 10),
+            "trailingPE": float(rng.uniform(5, 60)),
+            "pegRatio": float(rng.uniform(0.3, 3.5)),
+            "earningsGrowth": float(rng.uniform(-0.2, 0.5)),
+            "profitMargins": float(rng.uniform(-0.05, 0.4)),
+            "returnOnEquity": float(rng.uniform(-0.1, 0.6)),
+            "priceToFreeCashFlow": float(rng.uniform(5, 60)),
+        }
+
+    def _cours(self, ticker):
+        rng = self._rng(ticker, "history")
+        dates = _calendrier(datetime.date.today())
+        cloture = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, len(dates))))
+        return pd.DataFrame({
+            "Open": cloture * (1 + rng.normal(0, 0.003, len(dates))),
+            "High": cloture * 1.01,
+            "Low": cloture * 0.99,
+            "Close": cloture,
+            "Volume": rng.integers(1e5, 1e7, len(dates)).astype(float),
+        }, index=dates)
+
+    def history(self, ticker, start=None, end=None, **kwargs):
+        self._attendre("history")
+        hist = self._cours(ticker)
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start).tz_localize(hist.index.tz)]
+        if end is not None:
+            hist = hist[hist.index < pd.Timestamp(end).tz_localize(hist.index.tz)]
+        return hist
+
+    def download(self, tickers, **kwargs):
+        self._attendre("download")
+        historiques = {t: self.history(t, **kwargs) for t in tickers}
+        self.appels["history"] -= len(tickers) # un seul appel groupé
+        return pd.concat(historiques, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    def statement(self, ticker, nom):
+        if nom not in ETATS_FINANCIERS:
+            raise ValueError(f"État financier inconnu : {nom}")
+        self._attendre(nom)
+        rng = self._rng(ticker, nom)
+        trimestriel = nom.startswith("quarterly_")
+        annee = datetime.date.today().year
+        if trimestriel:
+            dates = pd.date_range(end=f"{annee}-06-30", periods=5, freq="QE")[::-1]
+        else:
+            dates = pd.to_datetime([f"{annee - i}-12-31" for i in range(1, 5)])
+        echelle = self._echelle(ticker) / (4 if trimestriel else 1)
+        croissance = (1 + rng.uniform(-0.05, 0.25)) ** -np.arange(len(dates))
+
+        revenus = echelle * croissance
+        pretax = revenus * rng.uniform(0.05, 0.35)
+        lignes = {
+            "financials": {
+                "Total Revenue": revenus,
+                "EBIT": pretax * 1.05,
+                "Pretax Income": pretax,
+                "Tax Provision": pretax * rng.uniform(0.1, 0.3),
+                "Interest Expense": pretax * 0.05,
+                "Net Income": pretax * 0.78,
+                "Diluted EPS": pretax * 0.78 / 1e9,
+            },
+            "balance_sheet": {
+                "Total Assets": revenus * 2.2,
+                "Current Liabilities": revenus * 0.4,
+                "Stockholders Equity": revenus * 1.1,
+                "Total Debt": revenus * 0.5,
+                "Cash And Cash Equivalents": revenus * 0.2,
+            },
+            "cashflow": {
+                "Free Cash Flow": pretax * rng.uniform(0.5, 1.1),
+            },
+        }[nom.replace("quarterly_", "")]
+        return pd.DataFrame(lignes, index=dates).T
+
+    def dividends(self, ticker):
+        self._attendre("dividends")
+        rng = self._rng(ticker, "dividends")
+        dates = pd.date_range(end=datetime.date.today(), periods=24, freq="QS", tz="America/New_York")
+        return pd.Series(rng.uniform(0.2, 0.3) * 1.02 ** np.arange(len(dates)), index=dates, name="Dividends")
+
+    def search(self, query):
+        self._attendre("search")
+        return [{"symbol": query.upper(), "name": f"{query.upper()} Synthetic Corp", "exchange": "SYN"}]
+
+
+def preparer_fixtures(tickers, dossier):
+    """Enregistre les données synthétiques des tickers dans `dossier` (format du FournisseurRejeu)."""
+    source = FournisseurSynthetique()
+    for ticker in tickers:
+        enregistrer_ticker(ticker, dossier, source=source)
+    return FournisseurRejeu(dossier)
@@ -1,7 +1,109 @@
+import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
 import streamlit as st
 from utils.Styles import style_CSS
+from utils.Fonctions_Autre import get_currency_symbol
+from utils.Portefeuille import (FICHIER_PORTEFEUILLE, TYPES_OPERATIONS, ajouter_transaction, charger_donnees_marche,
+                                charger_transactions, evaluer_portefeuille, registre_depuis_tableau)
 
 st.set_page_config(page_title="Portfolio", layout="wide")
 style_CSS()
 st.title("💼 Mon Portfolio")
-st.write("Contenu à venir...")
\ No newline at end of file
+
+# ---------------------------------
+# --- Registre (barre latérale) ---
+# ---------------------------------
+with st.sidebar:
+    st.header("Registre")
+    devise_base = st.selectbox("Devise de référence", ["EUR", "USD", "GBP", "CHF"], key="devise_portefeuille")
+    fichier = st.file_uploader("Importer un registre (CSV)", type="csv",
+                               help="Colonnes : date, ticker, type (achat/vente/dividende), quantite, prix, frais. "
+                                    "Un relevé de positions (ticker, quantite, prix) est aussi accepté.")
+
+    with st.form("nouvelle_operation", clear_on_submit=True):
+        st.subheader("Ajouter une opération")
+        date = st.date_input("Date", value=datetime.date.today())
+        ticker = st.text_input("Ticker")
+        type_operation = st.selectbox("Type", list(TYPES_OPERATIONS))
+        quantite = st.number_input("Quantité", min_value=0.0, step=1.0)
+        prix = st.number_input("Prix (devise de cotation)", min_value=0.0,
+                               help="Prix unitaire ; pour un dividende : montant total reçu")
+        frais = st.number_input("Frais", min_value=0.0)
+        if st.form_submit_button("Ajouter") and ticker.strip():
+            ajouter_transaction(date, ticker, type_operation, quantite, prix, frais)
+            st.toast(f"Opération enregistrée dans {FICHIER_PORTEFEUILLE.name}")
+
+# ------------------------------
+# --- Chargement des données ---
+# ------------------------------
+try:
+    transactions = registre_depuis_tableau(pd.read_csv(fichier)) if fichier is not None else charger_transactions()
+except Exception as e:
+    st.error(f"Registre illisible : {e}")
+    st.stop()
+
+if transactions.empty:
+    st.info(f"Aucune opération : importez un registre ou ajoutez une opération (enregistrée dans {FICHIER_PORTEFEUILLE.name}).")
+    st.stop()
+
+with st.spinner(f"Chargement des cours ({transactions['ticker'].nunique()} titres)..."):
+    # Un seul téléchargement groupé (titres + taux de change), servi par le cache aux reruns suivants
+    cloture, infos = charger_donnees_marche(transactions, devise_base)
+
+if cloture.empty:
+    st.warning("Cours indisponibles pour ces titres.")
+    st.stop()
+
+# Valorisation complète (matrices dates x titres) : refaite à chaque rerun, en quelques millisecondes
+evaluation = evaluer_portefeuille(transactions, cloture, infos, devise_base)
+symbole = get_currency_symbol(devise_base)
+
+# ----------------------------
+# --- Indicateurs clés ---
+# ----------------------------
+c1, c2, c3, c4, c5 = st.columns(5)
+c1.metric("Valeur", f"{evaluation.valeur_totale:,.0f} {symbole}".replace(",", " "))
+c2.metric("+/- latente", f"{evaluation.plus_value_latente:+,.0f} {symbole}".replace(",", " "))
+c3.metric("TWR (origine)", f"{evaluation.twr:+.1%}", help="Rendement pondéré par le temps : neutralise les apports et retraits")
+c4.metric("TWR YTD", f"{evaluation.twr_ytd:+.1%}")
+c5.metric("MWR (annualisé)", f"{evaluation.mwr:+.1%}" if pd.notna(evaluation.mwr) else "N/A",
+          help="Rendement pondéré par les capitaux (TRI) : tient compte du moment des apports et retraits")
+
+# -------------------------
+# --- Lignes et secteurs ---
+# -------------------------
+col_lignes, col_secteurs = st.columns([3, 1])
+with col_lignes:
+    st.dataframe(
+        evaluation.lignes,
+        width="stretch",
+        column_config={
+            "Quantité": st.column_config.NumberColumn(format="%.2f"),
+            "PRU": st.column_config.NumberColumn(format="%.2f"),
+            "Cours": st.column_config.NumberColumn(format="%.2f"),
+            f"Valeur ({devise_base})": st.column_config.NumberColumn(format=f"%.0f {symbole}"),
+            "Poids": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1),
+            f"+/- latente ({devise_base})": st.column_config.NumberColumn(format=f"%+.0f {symbole}"),
+            "YTD (%)": st.column_config.NumberColumn(format="%+.2f %%"),
+        },
+    )
+
+with col_secteurs:
+    fig = go.Figure(go.Pie(labels=evaluation.secteurs.index, values=evaluation.secteurs.values, hole=0.5, sort=False))
+    fig.update_layout(
+        title=dict(text="<b>Poids par secteur</b>", font=dict(size=16)),
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=10, r=10, t=40, b=10),
+        height=320,
+        showlegend=False,
+    )
+    fig.update_traces(textinfo="label+percent", textposition="inside")
+    st.plotly_chart(fig, width="stretch", config={'displayModeBar': False})
+
+# --------------------------
+# --- Évolution de la valeur ---
+# --------------------------
+st.subheader(f"Valeur du portefeuille ({symbole})")
+st.line_chart(evaluation.valeur, height=280)
@@ -1,8 +1,108 @@
+import pandas as pd
 import streamlit as st
 from utils.Styles import style_CSS
+from utils.Donnees_Macro import FENETRE_CORRELATION, SERIES_MACRO, cloture_macro, get_series_derivees, libelle
+from utils.Graphiques import create_line_chart
 
 st.set_page_config(page_title="Macro", layout="wide")
 style_CSS()
 
 st.title("🌍 Analyse Macro")
-st.write("Contenu à venir...")
\ No newline at end of file
+
+# ---------------------------
+# --- Réglages (barre latérale) ---
+# ---------------------------
+PERIODES = {"1 an": 1, "5 ans": 5, "10 ans": 10, "30 ans": 30, "Max": None}
+
+with st.sidebar:
+    st.header("Réglages")
+    periode = st.radio("Période", list(PERIODES), index=2, horizontal=True)
+    # Ticker comparé : celui choisi sur le Dashboard, s'il y en a un
+    ticker = st.text_input("Corrélation avec", value=st.session_state.get("ticker") or "^GSPC").strip().upper()
+    fenetre = st.slider("Fenêtre de corrélation (séances)", 20, 252, FENETRE_CORRELATION, step=1)
+
+
+def depuis_periode(serie):
+    annees = PERIODES[periode]
+    if annees is None or serie.empty:
+        return serie
+    return serie[serie.index >= serie.index[-1] - pd.DateOffset(years=annees)]
+
+
+# ------------------------------
+# --- Chargement des séries ---
+# ------------------------------
+# Stockage local (Parquet) : seules les barres manquantes sont téléchargées ; les séries dérivées
+# (YoY, drawdown, corrélation) ne sont calculées que pour les nouvelles dates
+derivees = get_series_derivees()
+
+def charger(symbole):
+    try:
+        return cloture_macro(symbole)
+    except Exception as e:
+        print(f"Erreur série macro {symbole} : {e}")
+        return pd.Series(dtype=float)
+
+try:
+    cloture_ticker = cloture_macro(ticker) if ticker else pd.Series(dtype=float)
+except Exception as e:
+    st.warning(f"Cours indisponibles pour {ticker} : {e}")
+    cloture_ticker = pd.Series(dtype=float)
+
+# ------------------------------------
+# --- Onglets (un par catégorie) ---
+# ------------------------------------
+# Même principe que le Dashboard : seul l'onglet ouvert charge et calcule ses séries
+onglets = st.tabs(list(SERIES_MACRO), key="onglet_macro", on_change="rerun")
+for onglet, (categorie, series) in zip(onglets, SERIES_MACRO.items()):
+    if not onglet.open:
+        continue
+    with onglet:
+        clotures = {symbole: charger(symbole) for symbole in series}
+        clotures = {symbole: c for symbole, c in clotures.items() if not c.empty}
+        if not clotures:
+            st.info("Données indisponibles pour cette catégorie.")
+            continue
+
+        # --- Dernière valeur et variation sur 1 an ---
+        colonnes = st.columns(len(clotures))
+        for colonne, (symbole, cloture) in zip(colonnes, clotures.items()):
+            yoy = derivees.glissement_annuel(symbole, cloture)
+            derniere_yoy = yoy.iloc[-1] if not yoy.empty else float("nan")
+            if categorie == "Taux":
+                # Taux : la variation utile est l'écart en points, pas un pourcentage du taux
+                colonne.metric(libelle(symbole), f"{cloture.iloc[-1]:.2f} %",
+                               delta=f"{cloture.iloc[-1] - cloture.iloc[-1] / (1 + derniere_yoy):+.2f} pt (1 an)" if pd.notna(derniere_yoy) else None)
+            else:
+                colonne.metric(libelle(symbole), f"{cloture.iloc[-1]:,.2f}".replace(",", " "),
+                               delta=f"{derniere_yoy:+.1%} (1 an)" if pd.notna(derniere_yoy) else None)
+
+        # --- Niveaux (base 100 au début de la période, sauf les taux) ---
+        if categorie == "Taux":
+            niveaux = {libelle(s): depuis_periode(c) for s, c in clotures.items()}
+            st.plotly_chart(create_line_chart(niveaux, "Niveaux", suffix=" %"), width="stretch", config={'displayModeBar': False})
+        else:
+            niveaux = {}
+            for s, c in clotures.items():
+                c = depuis_periode(c)
+                niveaux[libelle(s)] = c / c.iloc[0] * 100
+            st.plotly_chart(create_line_chart(niveaux, "Base 100"), width="stretch", config={'displayModeBar': False})
+
+        col_g, col_d = st.columns(2)
+        # --- Drawdowns ---
+        with col_g:
+            if categorie != "Taux":
+                drawdowns = {libelle(s): depuis_periode(derivees.drawdown(s, c)) * 100 for s, c in clotures.items()}
+                st.plotly_chart(create_line_chart(drawdowns, "Drawdown (%)", suffix=" %"), width="stretch", config={'displayModeBar': False})
+            else:
+                yoys = {libelle(s): depuis_periode(derivees.glissement_annuel(s, c)) * 100 for s, c in clotures.items()}
+                st.plotly_chart(create_line_chart(yoys, "Variation sur 1 an (%)", suffix=" %"), width="stretch", config={'displayModeBar': False})
+        # --- Corrélation glissante avec le ticker choisi ---
+        with col_d:
+            if cloture_ticker.empty:
+                st.info("Choisissez un ticker pour afficher les corrélations.")
+            else:
+                correlations = {libelle(s): depuis_periode(derivees.correlation(s, c, ticker, cloture_ticker, fenetre))
+                                for s, c in clotures.items() if s != ticker}
+                st.plotly_chart(create_line_chart(correlations, f"Corrélation avec {ticker} ({fenetre} séances)"),
+                                width="stretch", config={'displayModeBar': False})
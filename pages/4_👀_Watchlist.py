@@ -0,0 +1,41 @@
+import streamlit as st
+from utils.Styles import style_CSS
+from utils.Telechargement_Groupe import tableau_watchlist
+
+st.set_page_config(page_title="Watchlist", layout="wide")
+style_CSS()
+st.title("👀 Watchlist")
+
+# ------------------------------
+# --- Saisie de la watchlist ---
+# ------------------------------
+if "watchlist" not in st.session_state:
+    st.session_state.watchlist = "AAPL, MSFT, NVDA, MC.PA, AIR.PA, TTE.PA"
+
+saisie = st.text_area("Tickers (séparés par des virgules)", key="watchlist")
+tickers = [t for t in saisie.replace("\n", ",").split(",") if t.strip()]
+
+if not tickers:
+    st.info("Ajoutez au moins un ticker.")
+    st.stop()
+
+# ---------------------------------------------------------
+# --- Chargement groupé (un seul DataFrame pour N tickers) ---
+# ---------------------------------------------------------
+with st.spinner(f"Chargement de {len(tickers)} actifs..."):
+    tableau = tableau_watchlist(tickers)
+
+if tableau.empty:
+    st.warning("Données indisponibles pour ces actifs.")
+    st.stop()
+
+st.dataframe(
+    tableau,
+    width="stretch",
+    column_config={
+        "Prix": st.column_config.NumberColumn(format="%.2f"),
+        "YTD (%)": st.column_config.NumberColumn(format="%+.2f %%"),
+        "PER": st.column_config.NumberColumn(format="%.1f"),
+        "PEG": st.column_config.NumberColumn(format="%.2f"),
+    },
+)
@@ -0,0 +1,73 @@
+import datetime
+
+import streamlit as st
+from utils.Styles import style_CSS
+from utils.Fonctions_Autre import translate_sector
+from utils.Table_Screener import (COLONNE_DATE, COLONNES_METRIQUES, demarrer_rafraichissement,
+                                  get_table_screener, rafraichissement_en_cours, univers_screener)
+
+st.set_page_config(page_title="Screener", layout="wide")
+style_CSS()
+st.title("🔎 Screener")
+
+# ----------------------------------------------
+# --- Table pré-calculée (aucun appel réseau) ---
+# ----------------------------------------------
+screener = get_table_screener()
+table = screener.table
+
+col_info, col_bouton = st.columns([4, 1])
+if table.empty:
+    col_info.info("La table du screener est vide : lancez une mise à jour (ou `python -m utils.Table_Screener`).")
+else:
+    derniere = datetime.datetime.fromtimestamp(table[COLONNE_DATE].max())
+    col_info.caption(f"{len(table)} actifs - dernière mise à jour : {derniere:%d/%m/%Y %H:%M}")
+if rafraichissement_en_cours():
+    col_bouton.caption("⏳ Mise à jour en cours...")
+elif col_bouton.button("Mettre à jour"):
+    demarrer_rafraichissement(univers_screener()) # Incrémental : seuls les tickers absents ou trop vieux sont recalculés
+    st.rerun()
+
+if table.empty:
+    st.stop()
+
+# -----------------------------
+# --- Filtres (barre latérale) ---
+# -----------------------------
+# Format de saisie : les pourcentages sont saisis en % et convertis en fraction
+EN_POURCENTAGE = {c for c, f in COLONNES_METRIQUES.items() if f == "percent"}
+
+with st.sidebar:
+    st.header("Filtres")
+    secteurs_bruts = sorted(table["Secteur"].dropna().unique())
+    secteurs = st.multiselect("Secteurs", secteurs_bruts, format_func=translate_sector)
+
+    criteres = {}
+    for colonne in COLONNES_METRIQUES:
+        unite = " (%)" if colonne in EN_POURCENTAGE else ""
+        c_min, c_max = st.columns(2)
+        minimum = c_min.number_input(f"{colonne} min{unite}", value=None, key=f"min_{colonne}")
+        maximum = c_max.number_input(f"{colonne} max{unite}", value=None, key=f"max_{colonne}")
+        if minimum is not None or maximum is not None:
+            facteur = 100 if colonne in EN_POURCENTAGE else 1
+            criteres[colonne] = (None if minimum is None else minimum / facteur,
+                                 None if maximum is None else maximum / facteur)
+
+    st.header("Tri")
+    tri = st.selectbox("Trier par", list(COLONNES_METRIQUES), index=list(COLONNES_METRIQUES).index("ROIC"))
+    croissant = st.toggle("Ordre croissant", value=False)
+    limite = st.number_input("Nombre de résultats", min_value=10, max_value=5000, value=200, step=50)
+
+# ---------------------
+# --- Résultats ---
+# ---------------------
+resultats = screener.filtrer(criteres, secteurs=secteurs, tri=tri, croissant=croissant, limite=int(limite))
+
+st.write(f"**{len(resultats)}** actifs affichés")
+affichage = resultats.drop(columns=[COLONNE_DATE])
+affichage["Secteur"] = affichage["Secteur"].map(translate_sector)
+st.dataframe(
+    affichage,
+    width="stretch",
+    column_config={c: st.column_config.NumberColumn(format=f) for c, f in COLONNES_METRIQUES.items()},
+)
@@ -1,93 +1,41 @@
 import yfinance as yf
 import pandas as pd
 
-# Exemple : ticker Nvidia
-stock = yf.Ticker("NVDA")
+from utils.Moteur_ROIC import roic_tickers
 
-try:
-    # --- 1. Historique annuel ---
-    fin = stock.financials
-    bs = stock.balance_sheet
-
-    if not fin.empty and not bs.empty:
-        cols = [c for c in fin.columns if c in bs.columns]
-        fin = fin[cols]
-        bs = bs[cols]
-
-        def get_row(df, possible_names, fill=0):
-            for name in possible_names:
-                if name in df.index:
-                    return df.loc[name]
-            return pd.Series(fill, index=df.columns)
-
-        # EBIT pour approximatif NOPAT
-        ebit = get_row(fin, ['EBIT', 'Operating Income', 'OperatingIncome'], fill=0)
-        income_tax_expense = get_row(fin, ['Income Tax Expense', 'IncomeTaxExpense', 'Provision for Income Taxes'], fill=0)
-        tax_rate = income_tax_expense / (get_row(fin, ['Income Before Tax', 'Pre-Tax Income'], fill=1))
-        nopat = ebit * (1 - tax_rate)
-
-        # Capital investi : Total Assets - Current Liabilities
-        total_assets = get_row(bs, ['Total Assets', 'Assets'], fill=1)
-        current_liabilities = get_row(bs, ['Current Liabilities'], fill=0)
-        invested_capital = total_assets - current_liabilities
-
-        roic_hist = nopat / invested_capital
-
-        # DataFrame final
-        df_hist = pd.DataFrame({
-            "ROIC": roic_hist
-        })
-
-        # Transposition pour lisibilité
-        df_final = df_hist.T
-        df_final = df_final.iloc[:, :5]
-        df_final.columns = [d.strftime('%Y') for d in df_final.columns]
-
-        print("\n📅 Historique annuel ROIC sur 5 ans :")
-        print(df_final.applymap(lambda x: f"{x:.1%}"))
+# Exemple : ticker Nvidia (on peut en mettre plusieurs : le calcul est fait en une passe pour tout le lot)
+tickers = ["NVDA"]
 
-        # Commentaire automatique
-        last_roic = df_final.loc['ROIC'].iloc[0]
-        old_roic = df_final.loc['ROIC'].iloc[-1]
-        if last_roic > old_roic:
-            print("📈 Tendance Positive : Le ROIC s'est amélioré sur la période.")
+try:
+    resume, historique = roic_tickers({t: yf.Ticker(t) for t in tickers})
+
+    for ticker in tickers:
+        # --- 1. Historique annuel ---
+        if (ticker, "annuel") in historique.index.droplevel("date"):
+            roic_hist = historique.loc[(ticker, "annuel"), "roic"].sort_index(ascending=False).iloc[:5]
+            roic_hist.index = [d.strftime('%Y') for d in roic_hist.index]
+
+            print(f"\n📅 {ticker} - Historique annuel ROIC sur 5 ans :")
+            print(roic_hist.map(lambda x: f"{x:.1%}"))
+
+            # Commentaire automatique
+            if roic_hist.iloc[0] > roic_hist.iloc[-1]:
+                print("📈 Tendance Positive : Le ROIC s'est amélioré sur la période.")
+            else:
+                print("📉 Attention : Le ROIC a diminué par rapport à il y a 5 ans.")
         else:
-            print("📉 Attention : Le ROIC a diminué par rapport à il y a 5 ans.")
-
-    else:
-        print("Historique détaillé annuel non disponible pour cet actif.")
-
-    # --- 2. Derniers trimestres (TTM) ---
-    q_fin = stock.quarterly_financials
-    q_bs = stock.quarterly_balance_sheet
-
-    if not q_fin.empty and not q_bs.empty:
-        cols_q = q_fin.columns[:4]
-        q_fin = q_fin[cols_q]
-        q_bs = q_bs[cols_q]
-
-        ebit_q = get_row(q_fin, ['EBIT', 'Operating Income', 'OperatingIncome'], fill=0)
-        income_tax_expense_q = get_row(q_fin, ['Income Tax Expense', 'IncomeTaxExpense', 'Provision for Income Taxes'], fill=0)
-        tax_rate_q = income_tax_expense_q / (get_row(q_fin, ['Income Before Tax', 'Pre-Tax Income'], fill=1))
-        nopat_q = ebit_q * (1 - tax_rate_q)
+            print("Historique détaillé annuel non disponible pour cet actif.")
 
-        total_assets_q = get_row(q_bs, ['Total Assets', 'Assets'], fill=1)
-        current_liabilities_q = get_row(q_bs, ['Current Liabilities'], fill=0)
-        invested_capital_q = total_assets_q - current_liabilities_q
+        # --- 2. Derniers trimestres (ROIC TTM) ---
+        ligne = resume.loc[ticker]
+        if pd.notna(ligne["roic_ttm"]):
+            roic_q = historique.loc[(ticker, "trimestriel"), "roic"].dropna().sort_index(ascending=False).iloc[:4]
+            roic_q.index = [d.strftime('%Y-%m') for d in roic_q.index]
 
-        roic_q = nopat_q / invested_capital_q
-
-        df_q = pd.DataFrame({
-            "ROIC": roic_q
-        })
-        df_q = df_q.T
-        df_q.columns = [d.strftime('%Y-%m') for d in df_q.columns]
-
-        print("\n📊 Derniers trimestres (TTM) ROIC :")
-        print(df_q.applymap(lambda x: f"{x:.1%}"))
-
-    else:
-        print("Données trimestrielles non disponibles, essayez les semestres ou annuel.")
+            print(f"\n📊 {ticker} - ROIC TTM (NOPAT des 4 derniers trimestres) : {ligne['roic_ttm']:.1%} au {ligne['date_ttm']:%Y-%m-%d}")
+            print(roic_q.map(lambda x: f"{x:.1%}"))
+        else:
+            print("Données trimestrielles non disponibles, essayez les semestres ou annuel.")
 
 except Exception as e:
     print(f"Impossible de reconstituer l'historique ROIC ({e})")
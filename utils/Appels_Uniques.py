@@ -0,0 +1,112 @@
+# ------------------------------------------------------------
+# --- Un seul appel en cours par donnée (toutes sessions confondues) ---
+# ------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - AppelsUniques : regroupe les demandes simultanées d'une même donnée (clé = ticker, donnée, variante).
+      La première demande appelle le fournisseur ; les suivantes, tant que cet appel est en cours,
+      attendent son résultat (ou son erreur) au lieu de relancer le même téléchargement.
+    - get_appels_uniques : instance partagée par tout le processus (toutes les sessions Streamlit)
+
+    Exemple : 30 sessions ouvrent AAPL à l'ouverture du marché -> 1 appel "info", 1 appel "financials"...
+    au lieu de 30 de chaque (moins de charge chez Yahoo, moins de limitations de débit).
+
+"""
+
+import threading
+from collections import Counter
+
+
+class _AppelEnCours:
+    """Un appel au fournisseur en cours : ses attentes, puis son résultat ou son erreur."""
+
+    def __init__(self):
+        self.termine = threading.Event()
+        self.valeur = None
+        self.erreur = None
+        self.en_attente = 0
+
+
+class AppelsUniques:
+    """
+    executer(cle, fonction) : renvoie le résultat de `fonction()`, mais au plus un appel par clé est en cours
+    à un instant donné. Les demandes arrivées pendant cet appel partagent son résultat (même objet : ne pas le modifier).
+    Compteurs : appels (réellement lancés), regroupes (demandes servies par un appel déjà en cours),
+    par donnée, et nombre maximum de demandes regroupées sur un même appel.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._en_cours = {} # clé -> _AppelEnCours
+        self.compteurs = Counter() # appels, regroupes
+        self.regroupes_par_donnee = Counter()
+        self.max_regroupes = 0
+
+    @staticmethod
+    def _donnee(cle):
+        return cle[1] if isinstance(cle, tuple) and len(cle) > 1 else str(cle)
+
+    def executer(self, cle, fonction):
+        with self._verrou:
+            appel = self._en_cours.get(cle)
+            meneur = appel is None
+            if meneur:
+                appel = self._en_cours[cle] = _AppelEnCours()
+                self.compteurs["appels"] += 1
+            else:
+                appel.en_attente += 1
+                self.compteurs["regroupes"] += 1
+                self.regroupes_par_donnee[self._donnee(cle)] += 1
+                self.max_regroupes = max(self.max_regroupes, appel.en_attente)
+
+        if not meneur:
+            appel.termine.wait()
+            if appel.erreur is not None:
+                raise appel.erreur
+            return appel.valeur
+
+        try:
+            appel.valeur = fonction()
+            return appel.valeur
+        except BaseException as e:
+            appel.erreur = e
+            raise
+        finally:
+            # Retiré avant d'être signalé : une demande arrivant après relance un appel (données à jour)
+            with self._verrou:
+                del self._en_cours[cle]
+            appel.termine.set()
+
+    def en_cours(self):
+        with self._verrou:
+            return len(self._en_cours)
+
+    def stats(self):
+        """Compteurs + part des demandes servies sans appel au fournisseur."""
+        with self._verrou:
+            total = self.compteurs["appels"] + self.compteurs["regroupes"]
+            return {
+                **self.compteurs,
+                "taux_regroupement": self.compteurs["regroupes"] / total if total else 0.0,
+                "max_regroupes": self.max_regroupes,
+                "regroupes_par_donnee": dict(self.regroupes_par_donnee),
+                "en_cours": len(self._en_cours),
+            }
+
+
+# --------------------------
+# --- INSTANCE PARTAGÉE ---
+# --------------------------
+_appels_uniques = None
+_verrou_appels = threading.Lock()
+
+def get_appels_uniques():
+    """Une seule instance par processus : c'est ce qui permet de regrouper les demandes de toutes les sessions."""
+    global _appels_uniques
+    with _verrou_appels:
+        if _appels_uniques is None:
+            _appels_uniques = AppelsUniques()
+        return _appels_uniques
@@ -1,50 +1,235 @@
-import requests
+import bisect
+import csv
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.Cache_Donnees import DOSSIER_CACHE
+from utils.Disjoncteur import get_disjoncteur
+from utils.Fournisseur_Donnees import get_fournisseur
+from utils.Mesures import chrono
+
+"""
+
+Sommaire :
+
+    - IndexSymboles : index local (ticker, nom, place) qui répond sans réseau aux recherches courantes
+    - CacheRecherche : cache LRU des recherches + réutilisation des préfixes ("AAP" -> "AAPL" filtré en local)
+    - search_assets : recherche d'actifs (cache -> index local -> fournisseur).
+      Fournisseur en panne (disjoncteur ouvert) : dernière réponse connue, même expirée, sinon résultats de l'index local
+    - search_wrapper : pont entre la Searchbox et search_assets
+
+"""
+
+# --------------------------------
+# --- Réglages de la recherche ---
+# --------------------------------
+# CSV optionnel (symbol,name,exchange), complété automatiquement par les résultats de Yahoo
+FICHIER_INDEX = Path(os.environ.get("DASHBOARD_INDEX_SYMBOLES", DOSSIER_CACHE / "symboles.csv"))
+TAILLE_CACHE_RECHERCHE = 512 # Nombre de recherches gardées en mémoire
+TTL_RECHERCHE = 24 * 60 * 60 # Les résultats d'une recherche changent rarement
+NB_RESULTATS = 10 # Nombre de résultats affichés (et demandés à Yahoo)
+
+
+def normaliser_requete(query):
+    """'  aapl ' et 'AAPL' donnent la même clé de cache."""
+    return " ".join(query.split()).upper()
+
+
+def _correspond(item, requete):
+    """Le ticker commence par la requête, ou la requête apparaît dans le nom."""
+    return item['symbol'].upper().startswith(requete) or requete in item['name'].upper()
+
+
+# -----------------------------------
+# --- INDEX LOCAL DES SYMBOLES ---
+# -----------------------------------
+class IndexSymboles:
+    """
+    Index (ticker, nom, place) chargé depuis un CSV optionnel (colonnes : symbol,name,exchange).
+    Recherche par préfixe en O(log n) (bisect) sur les tickers et sur chaque mot des noms.
+    Les actifs renvoyés par Yahoo y sont ajoutés au fil de l'eau (et écrits dans le CSV).
+    """
+
+    def __init__(self, fichier=FICHIER_INDEX):
+        self.fichier = Path(fichier)
+        self._verrou = threading.Lock()
+        self.actifs = {} # symbol -> {'symbol', 'name', 'exchange'}
+        self._cles = [] # liste triée de (clé, symbol) : tickers et mots des noms, en majuscules
+        self._completes = set() # Requêtes dont toute la réponse du fournisseur (moins de NB_RESULTATS) est dans l'index
+        if self.fichier.exists():
+            with open(self.fichier, encoding="utf-8", newline="") as f:
+                for ligne in csv.DictReader(f):
+                    self._indexer(ligne, trier=False)
+            self._cles.sort()
+
+    def _indexer(self, item, trier=True):
+        symbol = item['symbol'].upper()
+        if symbol in self.actifs:
+            return False
+        item = {"symbol": item['symbol'], "name": item.get('name') or item['symbol'], "exchange": item.get('exchange') or 'N/A'}
+        self.actifs[symbol] = item
+        for cle in {symbol, *item['name'].upper().split()}:
+            if trier:
+                bisect.insort(self._cles, (cle, symbol))
+            else:
+                self._cles.append((cle, symbol))
+        return True
+
+    def ajouter(self, items, requete=None):
+        """
+        Ajoute les actifs inconnus à l'index (et au CSV pour les prochains démarrages).
+        requete : recherche dont `items` est la réponse du fournisseur ; si elle n'a pas rempli une page de résultats,
+        l'index la connaît en entier (elle et les requêtes qui la prolongent).
+        """
+        with self._verrou:
+            if requete is not None and len(items) < NB_RESULTATS:
+                self._completes.add(normaliser_requete(requete))
+            nouveaux = [item for item in items if self._indexer(item)]
+            if nouveaux:
+                self.fichier.parent.mkdir(parents=True, exist_ok=True)
+                nouveau_fichier = not self.fichier.exists()
+                with open(self.fichier, "a", encoding="utf-8", newline="") as f:
+                    ecrivain = csv.DictWriter(f, fieldnames=["symbol", "name", "exchange"])
+                    if nouveau_fichier:
+                        ecrivain.writeheader()
+                    ecrivain.writerows(nouveaux)
+
+    def rechercher(self, requete, limite=NB_RESULTATS):
+        """Actifs dont le ticker ou un mot du nom commence par la requête (tickers exacts en premier)."""
+        requete = normaliser_requete(requete)
+        premier_mot = requete.split()[0] if requete else ""
+        with self._verrou:
+            debut = bisect.bisect_left(self._cles, (premier_mot, ""))
+            symboles, vus = [], set()
+            for cle, symbol in self._cles[debut:]:
+                if not cle.startswith(premier_mot):
+                    break
+                if symbol not in vus and _correspond(self.actifs[symbol], requete):
+                    vus.add(symbol)
+                    symboles.append(symbol)
+            symboles.sort(key=lambda s: (s != requete, not s.startswith(requete), len(s)))
+            return [self.actifs[s] for s in symboles[:limite]]
+
+    def complet(self, requete):
+        """True si la réponse du fournisseur à cette requête (ou à un de ses préfixes) est entièrement dans l'index."""
+        requete = normaliser_requete(requete)
+        with self._verrou:
+            return any(requete[:i] in self._completes for i in range(len(requete), 0, -1))
+
+    def peut_repondre(self, requete, resultats):
+        """
+        L'index suffit si sa réponse est complète, ou si le ticker exact est connu. Une page pleine de correspondances
+        locales ne suffit pas : les meilleurs résultats du fournisseur peuvent ne pas encore être dans l'index.
+        """
+        return self.complet(requete) or any(r['symbol'].upper() == normaliser_requete(requete) for r in resultats)
+
+
+# -------------------------------------------
+# --- CACHE DES RECHERCHES (LRU + PRÉFIXES) ---
+# -------------------------------------------
+class CacheRecherche:
+
+    def __init__(self, taille=TAILLE_CACHE_RECHERCHE, ttl=TTL_RECHERCHE):
+        self.taille = taille
+        self.ttl = ttl
+        self._entrees = OrderedDict() # requête normalisée -> (date, résultats, complet)
+        self._verrou = threading.Lock()
+        self.compteurs = {"hits": 0, "prefixes": 0, "miss": 0}
+
+    def get(self, requete):
+        with self._verrou:
+            # 1. Requête déjà faite
+            entree = self._entrees.get(requete)
+            if entree and time.time() - entree[0] < self.ttl:
+                self._entrees.move_to_end(requete)
+                self.compteurs["hits"] += 1
+                return entree[1]
+
+            # 2. Requête qui prolonge une requête déjà faite ("AAP" -> "AAPL") : si la liste de "AAP"
+            #    était complète (réponse du fournisseur, moins de NB_RESULTATS), les résultats de "AAPL"
+            #    en sont un sous-ensemble. Une réponse de l'index local (ex: "A" -> [A], ticker exact connu)
+            #    ne dit rien des autres actifs qui commencent par "A" : pas de filtrage à partir d'elle.
+            for i in range(len(requete) - 1, 0, -1):
+                entree = self._entrees.get(requete[:i])
+                if entree and entree[2] and time.time() - entree[0] < self.ttl and len(entree[1]) < NB_RESULTATS:
+                    self.compteurs["prefixes"] += 1
+                    return [item for item in entree[1] if _correspond(item, requete)]
+
+            self.compteurs["miss"] += 1
+            return None
+
+    def get_perime(self, requete):
+        """Dernière réponse connue pour cette requête, même expirée (None si jamais faite)."""
+        with self._verrou:
+            entree = self._entrees.get(requete)
+            return entree[1] if entree else None
+
+    def set(self, requete, resultats, complet=True):
+        """complet=False : réponse servie telle quelle pour la même requête, jamais filtrée pour une requête plus longue."""
+        with self._verrou:
+            self._entrees[requete] = (time.time(), resultats, complet)
+            self._entrees.move_to_end(requete)
+            while len(self._entrees) > self.taille:
+                self._entrees.popitem(last=False)
+
+
+_index = None
+_cache_recherche = CacheRecherche()
+_verrou_index = threading.Lock()
+
+def get_index_symboles():
+    global _index
+    with _verrou_index:
+        if _index is None:
+            _index = IndexSymboles()
+        return _index
+
 
 # ---------------------------------------------
 # --- FONCTION DE RECHERCHE (POUR LA BARRE) ---
 # ---------------------------------------------
 def search_assets(query):
     """
-    Interroge Yahoo Finance pour trouver des actifs.
+    Trouve des actifs : cache des recherches d'abord (requête exacte ou préfixe), puis index local,
+    et seulement ensuite le fournisseur de données (Yahoo Finance en live).
     """
-    if not query:
+    requete = normaliser_requete(query or "")
+    if not requete:
         return []
 
-    url = "https://query1.finance.yahoo.com/v1/finance/search"
-    
-    # On se fait passer pour un navigateur standard
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
-    
-    params = {
-        "q": query,
-        "quotesCount": 10,
-        "newsCount": 0,
-        "enableFuzzyQuery": "false",
-        "quotesQueryId": "tss_match_phrase_query"
-    }
-
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=3)
-        data = response.json()
-        
+        items = _cache_recherche.get(requete)
+
+        if items is None:
+            index = get_index_symboles()
+            items = index.rechercher(requete)
+            if index.peut_repondre(requete, items):
+                # Réponse partielle de l'index (ticker exact connu) : pas une base pour les préfixes
+                _cache_recherche.set(requete, items, complet=index.complet(requete))
+            else:
+                try:
+                    with chrono("fournisseur.search"):
+                        items = get_disjoncteur("recherche").appeler(lambda: get_fournisseur().search(requete))
+                    index.ajouter(items, requete)
+                    _cache_recherche.set(requete, items)
+                except Exception as e:
+                    # Yahoo lent ou en panne : dernière réponse connue, sinon l'index local (réponse partielle, pas mise en cache)
+                    print(f"Erreur API Recherche : {e}")
+                    items = _cache_recherche.get_perime(requete) or items
+
         results = []
-        if 'quotes' in data:
-            for item in data['quotes']:
-                if 'symbol' in item:
-                    symbol = item['symbol']
-                    name = item.get('shortname') or item.get('longname') or symbol
-                    exch = item.get('exchDisp', item.get('exchange', 'N/A'))
-                    
-                    label = f"{name} ({exch})   [{symbol}]"
-                    results.append((symbol, label))
+        for item in items:
+            label = f"{item['name']} ({item['exchange']})   [{item['symbol']}]"
+            results.append((item['symbol'], label))
         return results
-        
+
     except Exception as e:
         print(f"Erreur API Recherche : {e}")
         return []
-    
+
 # -------------------------------------
 # --- FONCTION DE LIAISON (LE PONT) ---
 # -------------------------------------
@@ -55,9 +240,9 @@ def search_wrapper(searchterm):
     """
     # 1. On récupère les résultats bruts : [('TSLA', 'TSLA - Tesla...'), ...]
     raw_results = search_assets(searchterm)
-    
+
     # 2. On les transforme pour la Searchbox : attendu -> (Label_Visible, Valeur_Renvoyée)
     # On inverse donc l'ordre ici :
     formatted_results = [(item[1], item[0]) for item in raw_results]
-    
-    return formatted_results
\ No newline at end of file
+
+    return formatted_results
@@ -0,0 +1,471 @@
+# ---------------------------------------------------
+# --- Création du cache des données Yahoo Finance ---
+# ---------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - TTL_PAR_DONNEE : durée de vie (en secondes) de chaque type de donnée
+    - CacheDonnees : cache persistant sur disque (TTL par donnée, éviction LRU, compteurs hits/miss).
+      En cas de miss, les demandes simultanées d'une même donnée sont regroupées (utils.Appels_Uniques) :
+      un seul appel au fournisseur, quel que soit le nombre de sessions qui attendent.
+      Donnée expirée : la dernière valeur connue est servie tout de suite (avec son âge) pendant qu'une mise à jour
+      tourne en arrière-plan ; fournisseur en panne : le disjoncteur (utils.Disjoncteur) évite de l'appeler en boucle
+    - get_cache : instance unique du cache, partagée par toute l'application
+    - TickerEnCache : remplace yf.Ticker, chaque accès (info, états financiers, historique...) passe par le cache,
+      puis par le fournisseur de données (utils.Fournisseur_Donnees) en cas de miss
+
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.Appels_Uniques import get_appels_uniques
+from utils.Disjoncteur import get_disjoncteur
+from utils.Fournisseur_Donnees import get_fournisseur
+from utils.Mesures import chrono
+
+# pandas et le stockage des cours (Parquet) sont importés à la première utilisation : la barre de recherche
+# et le préchauffeur importent ce module avant que la page n'ait besoin d'un seul tableau
+
+# ---------------------------
+# --- Réglages du cache ---
+# ---------------------------
+# Dossier du cache : à la racine du projet (ignoré par git)
+DOSSIER_CACHE = Path(os.environ.get("DASHBOARD_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache_donnees"))
+
+# Taille maximale du cache sur le disque (au-delà, on supprime les entrées les moins utilisées)
+TAILLE_MAX_CACHE = 200 * 1024 * 1024 # 200 Mo
+
+# Durée de vie de chaque type de donnée (None = n'expire jamais)
+QUART_HEURE = 15 * 60
+UN_JOUR = 24 * 60 * 60
+
+TTL_PAR_DONNEE = {
+    # Cotations : bougent en permanence -> TTL court
+    "info": QUART_HEURE,
+    "history": QUART_HEURE,
+    # États financiers : ne changent qu'à chaque publication de résultats -> TTL long
+    "financials": UN_JOUR,
+    "quarterly_financials": UN_JOUR,
+    "balance_sheet": UN_JOUR,
+    "quarterly_balance_sheet": UN_JOUR,
+    "cashflow": UN_JOUR,
+    "quarterly_cashflow": UN_JOUR,
+    "dividends": UN_JOUR,
+    "cours_groupes": QUART_HEURE, # Historique d'un lot de tickers (utils.Telechargement_Groupe)
+    # Exercices clos : publiés une fois pour toutes -> pas d'expiration
+    "exercices_clos": None,
+}
+
+# Donnée expirée depuis moins longtemps que ce délai : servie tout de suite, mise à jour en arrière-plan.
+# Au-delà, on attend le fournisseur (et la donnée périmée ne sert qu'en cas de panne).
+DELAI_PERIME = float(os.environ.get("DASHBOARD_DELAI_PERIME", UN_JOUR))
+INTERVALLE_RELECTURE = 30 # Donnée expirée : on relit le disque au plus toutes les 30 s (rafraîchie par un autre processus ?)
+
+# Mises à jour en arrière-plan des données servies périmées
+_POOL_REVALIDATION = ThreadPoolExecutor(max_workers=4, thread_name_prefix="revalidation")
+
+
+def _est_vide(valeur):
+    """Une réponse vide (souvent une erreur ou un blocage de Yahoo) ne doit pas être mise en cache."""
+    if valeur is None:
+        return True
+    if isinstance(getattr(valeur, "empty", None), bool): # DataFrame / Series
+        return valeur.empty
+    if isinstance(valeur, (dict, list, tuple)):
+        return len(valeur) == 0
+    return False
+
+
+# ----------------------
+# --- CACHE (DISQUE) ---
+# ----------------------
+class CacheDonnees:
+    """
+    Cache clé -> valeur persistant sur le disque (un fichier pickle par entrée).
+    - Chaque entrée a sa propre date d'expiration (TTL selon le type de donnée).
+    - Quand la taille totale dépasse `taille_max`, on supprime les entrées les moins récemment utilisées (LRU).
+    - Les compteurs (hits, miss, expirations, évictions) permettent de mesurer le trafic évité vers Yahoo.
+    - Une entrée expirée reste sur le disque (jusqu'à son éviction) : c'est la valeur de secours si Yahoo ne répond plus.
+    """
+
+    def __init__(self, dossier=DOSSIER_CACHE, taille_max=TAILLE_MAX_CACHE, appels_uniques=None, disjoncteur=None):
+        self.dossier = Path(dossier)
+        self.taille_max = taille_max
+        self.appels_uniques = appels_uniques or get_appels_uniques()
+        self.disjoncteur = disjoncteur or get_disjoncteur("donnees")
+        self.dossier.mkdir(parents=True, exist_ok=True)
+
+        self._verrou = threading.RLock()
+        self._memoire = {} # nom_fichier -> (expire_le, valeur, ecrit_le) : évite de relire le disque à chaque rerun
+        self._relu_le = {} # nom_fichier -> dernière relecture du disque d'une entrée expirée
+        self._revalidations = set() # Clés en cours de mise à jour en arrière-plan
+        self._index = OrderedDict() # nom_fichier -> taille (ordre = du moins au plus récemment utilisé)
+        self._taille_totale = 0
+        self.compteurs = {"hits": 0, "miss": 0, "expirations": 0, "evictions": 0, "perimees_servies": 0, "revalidations": 0}
+
+        self._charger_index()
+
+    # --- Outils internes ---
+    @staticmethod
+    def _nom_fichier(cle):
+        return hashlib.sha1(repr(cle).encode("utf-8")).hexdigest() + ".pkl"
+
+    def _charger_index(self):
+        """Reconstruit l'index LRU à partir des fichiers présents (ordre = date d'écriture)."""
+        fichiers = [f for f in os.scandir(self.dossier) if f.name.endswith(".pkl")]
+        for f in sorted(fichiers, key=lambda f: f.stat().st_mtime):
+            taille = f.stat().st_size
+            self._index[f.name] = taille
+            self._taille_totale += taille
+
+    def _oublier(self, nom):
+        """Sous verrou : retire l'entrée de l'index et de la mémoire (le fichier est supprimé par l'appelant, hors verrou)."""
+        self._taille_totale -= self._index.pop(nom, 0)
+        self._memoire.pop(nom, None)
+        self._relu_le.pop(nom, None)
+
+    def _supprimer_fichiers(self, noms):
+        """Hors verrou : les lectures et écritures des autres sessions n'attendent pas le disque."""
+        for nom in noms:
+            try:
+                os.remove(self.dossier / nom)
+            except FileNotFoundError:
+                pass
+
+    def _evincer(self):
+        """Sous verrou : retire de l'index les entrées les moins récemment utilisées ; renvoie les fichiers à supprimer."""
+        evinces = []
+        while self._taille_totale > self.taille_max and len(self._index) > 1:
+            plus_ancien = next(iter(self._index))
+            self._oublier(plus_ancien)
+            evinces.append(plus_ancien)
+            self.compteurs["evictions"] += 1
+        return evinces
+
+    def _entree(self, cle):
+        """
+        Renvoie l'entrée (expire_le, valeur, ecrit_le), même expirée, en passant par la mémoire puis par le disque.
+        None si elle est absente ou illisible. Le verrou ne protège que la mémoire et l'index : la lecture du fichier
+        et le dépickling se font sans lui (une lecture lente ne bloque pas les autres sessions).
+        """
+        nom = self._nom_fichier(cle)
+        maintenant = time.time()
+        with self._verrou:
+            entree = self._memoire.get(nom)
+            # Absente de la mémoire, ou expirée en mémoire : le fichier a pu être rafraîchi
+            # entre-temps par un autre processus (préchauffage), on relit le disque
+            if entree is not None and not (entree[0] is not None and entree[0] < maintenant
+                                           and maintenant - self._relu_le.get(nom, 0) > INTERVALLE_RELECTURE):
+                self._index.move_to_end(nom)
+                return entree
+            self._relu_le[nom] = maintenant # Une seule relecture à la fois par entrée expirée
+
+        try:
+            with open(self.dossier / nom, "rb") as f:
+                taille = os.fstat(f.fileno()).st_size
+                brute = pickle.load(f)
+        except FileNotFoundError:
+            with self._verrou:
+                if entree is None:
+                    self._oublier(nom) # Évincée (ou jamais écrite) : rien sur le disque
+                return entree
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self._verrou:
+                self._oublier(nom)
+            self._supprimer_fichiers([nom])
+            return None
+        lue = (brute["expire_le"], brute["valeur"], brute.get("ecrit_le"))
+
+        with self._verrou:
+            actuelle = self._memoire.get(nom)
+            if actuelle is not None and (actuelle[2] or 0) > (lue[2] or 0):
+                lue = actuelle # Écrite par cette instance pendant la lecture : plus récente que le fichier lu
+            else:
+                self._memoire[nom] = lue
+            if nom not in self._index: # Fichier écrit par un autre processus (ex: préchauffage lancé à part)
+                self._index[nom] = taille
+                self._taille_totale += taille
+            self._index.move_to_end(nom)
+        return lue
+
+    @staticmethod
+    def _expiree(entree):
+        return entree[0] is not None and entree[0] < time.time()
+
+    def _telecharger(self, cle, donnee, fetch, a_garder=None):
+        """Appel au fournisseur (via le disjoncteur) ; une réponse non vide (et acceptée par `a_garder`) est stockée."""
+        with chrono(f"fournisseur.{donnee}"):
+            valeur = self.disjoncteur.appeler(fetch)
+        if not _est_vide(valeur) and (a_garder is None or a_garder(valeur)):
+            self.set(cle, valeur, ttl=TTL_PAR_DONNEE.get(donnee, QUART_HEURE))
+        return valeur
+
+    def _revalider(self, cle, donnee, fetch, a_garder=None):
+        """Met à jour la donnée en arrière-plan (une seule fois à la fois par clé, rien si le fournisseur est en panne)."""
+        with self._verrou:
+            if cle in self._revalidations or self.disjoncteur.ouvert():
+                return
+            self._revalidations.add(cle)
+            self.compteurs["revalidations"] += 1
+
+        def tache():
+            try:
+                self.appels_uniques.executer(cle, lambda: self._telecharger(cle, donnee, fetch, a_garder))
+            except Exception as e:
+                print(f"Erreur de mise à jour en arrière-plan {cle} : {e}")
+            finally:
+                with self._verrou:
+                    self._revalidations.discard(cle)
+        _POOL_REVALIDATION.submit(tache)
+
+    # --- API publique ---
+    def get(self, cle, compter=True):
+        """Renvoie (trouvé, valeur) : seulement si l'entrée est encore valide. Compte un hit ou un miss (sauf pour les lectures internes)."""
+        entree = self._entree(cle)
+        trouve = entree is not None and not self._expiree(entree)
+        if compter:
+            with self._verrou:
+                self.compteurs["hits" if trouve else "miss"] += 1
+                if entree is not None and not trouve:
+                    self.compteurs["expirations"] += 1
+        return trouve, entree[1] if trouve else None
+
+    def get_perime(self, cle):
+        """
+        Renvoie (trouvé, valeur, âge en secondes) même si l'entrée a expiré (âge None si inconnu), et si elle est expirée.
+        Ne compte ni hit ni miss.
+        """
+        entree = self._entree(cle)
+        if entree is None:
+            return False, None, None, False
+        return True, entree[1], None if entree[2] is None else time.time() - entree[2], self._expiree(entree)
+
+    def set(self, cle, valeur, ttl=None):
+        """Enregistre une valeur (ttl en secondes, None = pas d'expiration)."""
+        nom = self._nom_fichier(cle)
+        ecrit_le = time.time()
+        expire_le = ecrit_le + ttl if ttl is not None else None
+        donnees = pickle.dumps({"cle": cle, "expire_le": expire_le, "valeur": valeur, "ecrit_le": ecrit_le}, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Écriture atomique (fichier temporaire propre au thread, puis renommage), hors verrou
+        temporaire = self.dossier / f"{nom}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporaire, "wb") as f:
+            f.write(donnees)
+        os.replace(temporaire, self.dossier / nom)
+
+        with self._verrou:
+            self._taille_totale -= self._index.pop(nom, 0)
+            self._index[nom] = len(donnees)
+            self._taille_totale += len(donnees)
+            self._memoire[nom] = (expire_le, valeur, ecrit_le)
+            evinces = self._evincer()
+        self._supprimer_fichiers(evinces)
+
+    def get_or_fetch(self, ticker, donnee, fetch, variante="", ages=None, a_garder=None):
+        """
+        Renvoie la donnée du cache si elle est encore valide, sinon appelle `fetch()` et stocke le résultat.
+        Les réponses vides ne sont pas stockées (pour ne pas garder une erreur de Yahoo pendant 24h), ni celles
+        que `a_garder(valeur)` refuse (ex: lot de tickers incomplet) : elles sont servies, puis redemandées au prochain appel.
+        Si la même donnée est déjà en cours de téléchargement (autre session), on attend ce téléchargement.
+        Donnée expirée depuis moins de DELAI_PERIME : servie telle quelle, mise à jour en arrière-plan.
+        Fournisseur en erreur (ou réponse vide) : la dernière valeur connue est servie, quel que soit son âge.
+        ages : dictionnaire (optionnel) complété avec {donnee: âge en secondes} quand une valeur périmée est servie.
+        """
+        cle = (ticker.upper(), donnee, variante)
+        trouve, valeur = self.get(cle)
+        if trouve:
+            return valeur
+
+        perimee, valeur_perimee, age, expiree = self.get_perime(cle)
+        if perimee and not expiree:
+            return valeur_perimee # Écrite par une autre session entre les deux lectures : valide
+
+        def servir_perimee():
+            with self._verrou:
+                self.compteurs["perimees_servies"] += 1
+            if ages is not None:
+                ages[donnee] = age
+            return valeur_perimee
+
+        ttl = TTL_PAR_DONNEE.get(donnee, QUART_HEURE)
+        if perimee and age is not None and ttl is not None and age - ttl <= DELAI_PERIME:
+            self._revalider(cle, donnee, fetch, a_garder)
+            return servir_perimee()
+
+        def telecharger():
+            # Un appel vient peut-être de se terminer entre notre lecture et maintenant
+            trouve, valeur = self.get(cle, compter=False)
+            if trouve:
+                return valeur
+            return self._telecharger(cle, donnee, fetch, a_garder)
+
+        try:
+            valeur = self.appels_uniques.executer(cle, telecharger)
+        except Exception as e:
+            if not perimee:
+                raise
+            print(f"Erreur de chargement ({donnee}), dernière valeur connue servie : {e}")
+            return servir_perimee()
+        return servir_perimee() if _est_vide(valeur) and perimee else valeur
+
+    def restant(self, cle):
+        """Secondes avant expiration (None si absente ou expirée, inf si elle n'expire jamais). Ne compte ni hit ni miss."""
+        entree = self._entree(cle)
+        if entree is None or self._expiree(entree):
+            return None
+        return float("inf") if entree[0] is None else entree[0] - time.time()
+
+    def rafraichir(self, ticker, donnee, fetch, variante=""):
+        """Comme get_or_fetch, mais appelle toujours `fetch()` (préchauffage avant expiration), sauf si un appel est déjà en cours."""
+        cle = (ticker.upper(), donnee, variante)
+        return self.appels_uniques.executer(cle, lambda: self._telecharger(cle, donnee, fetch))
+
+    def vider(self):
+        with self._verrou:
+            noms = list(self._index)
+            for nom in noms:
+                self._oublier(nom)
+        self._supprimer_fichiers(noms)
+
+    def stats(self):
+        """Compteurs du cache + taux de hits (part des appels évités vers Yahoo) + demandes regroupées."""
+        with self._verrou:
+            total = self.compteurs["hits"] + self.compteurs["miss"]
+            return {
+                **self.compteurs,
+                "taux_hits": self.compteurs["hits"] / total if total else 0.0,
+                "entrees": len(self._index),
+                "taille_octets": self._taille_totale,
+                "appels_uniques": self.appels_uniques.stats(),
+                "disjoncteur": self.disjoncteur.stats(),
+            }
+
+
+# --------------------------
+# --- INSTANCE PARTAGÉE ---
+# --------------------------
+_cache = None
+_verrou_cache = threading.Lock()
+
+def get_cache():
+    """Un seul cache par processus (partagé entre toutes les sessions Streamlit)."""
+    global _cache
+    with _verrou_cache:
+        if _cache is None:
+            _cache = CacheDonnees()
+        return _cache
+
+
+# --------------------------------------------------
+# --- TICKER EN CACHE (REMPLAÇANT DE yf.Ticker) ---
+# --------------------------------------------------
+class TickerEnCache:
+    """
+    S'utilise comme un yf.Ticker (stock.info, stock.financials, stock.history(...), stock.dividends...)
+    mais chaque donnée passe par le cache : le fournisseur n'est appelé qu'en cas de miss ou d'expiration.
+    `ages` : {donnee: âge en secondes} des données servies périmées (fournisseur lent ou en panne).
+    """
+
+    def __init__(self, ticker, cache=None, fournisseur=None):
+        self.ticker = ticker
+        self._cache = cache or get_cache()
+        # Le fournisseur (Yahoo en live, ou rejeu de fixtures) n'est appelé qu'en cas de miss
+        self._fournisseur = fournisseur or get_fournisseur()
+        self.ages = {}
+
+    @property
+    def info(self):
+        return self._cache.get_or_fetch(self.ticker, "info", lambda: self._fournisseur.info(self.ticker), ages=self.ages)
+
+    @property
+    def dividends(self):
+        return self._cache.get_or_fetch(self.ticker, "dividends", lambda: self._fournisseur.dividends(self.ticker), ages=self.ages)
+
+    def history(self, **kwargs):
+        # Cours journaliers ajustés : lus dans le stockage Parquet local (seules les barres manquantes sont téléchargées)
+        if set(kwargs) <= {"start", "end", "auto_adjust", "interval"} and kwargs.get("auto_adjust", True) and kwargs.get("interval", "1d") == "1d":
+            from utils.Stockage_Cours import get_stockage
+            return get_stockage().historique(self.ticker, start=kwargs.get("start"), end=kwargs.get("end"), fournisseur=self._fournisseur)
+
+        variante = repr(sorted(kwargs.items()))
+        return self._cache.get_or_fetch(self.ticker, "history", lambda: self._fournisseur.history(self.ticker, **kwargs), variante=variante, ages=self.ages)
+
+    def _etat_financier(self, nom):
+        try:
+            etat = self._cache.get_or_fetch(self.ticker, nom, lambda: self._fournisseur.statement(self.ticker, nom), ages=self.ages)
+        except Exception as e:
+            # Fournisseur en erreur : on se rabat sur les exercices clos déjà archivés
+            import pandas as pd
+            print(f"Erreur de chargement ({nom}) : {e}")
+            etat = pd.DataFrame()
+        return self._avec_exercices_clos(nom, etat)
+
+    def _avec_exercices_clos(self, nom, etat):
+        """
+        Les colonnes d'un état financier correspondent à des exercices déjà clos : elles ne changeront plus.
+        On les archive sans expiration, ce qui permet de les servir même si Yahoo ne répond plus.
+        """
+        cle = (self.ticker.upper(), "exercices_clos", nom)
+        trouve, archive = self._cache.get(cle, compter=False)
+
+        if _est_vide(etat):
+            return archive if trouve else etat
+
+        if trouve and not archive.columns.difference(etat.columns).empty:
+            # On complète avec les anciens exercices que Yahoo ne renvoie plus
+            import pandas as pd
+            anciens = archive[archive.columns.difference(etat.columns)]
+            etat = pd.concat([etat, anciens], axis=1)
+            etat = etat[sorted(etat.columns, reverse=True)]
+
+        if not trouve or not etat.columns.equals(archive.columns):
+            self._cache.set(cle, etat, ttl=TTL_PAR_DONNEE["exercices_clos"])
+        return etat
+
+    def rafraichir(self, donnee):
+        """
+        Recharge `donnee` depuis le fournisseur même si le cache est encore valide (utilisé par le préchauffage).
+        "history" synchronise le stockage local des cours ; les états financiers mettent aussi à jour les exercices clos.
+        """
+        if donnee == "history":
+            from utils.Stockage_Cours import get_stockage
+            return get_stockage().synchroniser(self.ticker, force=True, fournisseur=self._fournisseur)
+        if donnee == "info":
+            return self._cache.rafraichir(self.ticker, "info", lambda: self._fournisseur.info(self.ticker))
+        if donnee == "dividends":
+            return self._cache.rafraichir(self.ticker, "dividends", lambda: self._fournisseur.dividends(self.ticker))
+        etat = self._cache.rafraichir(self.ticker, donnee, lambda: self._fournisseur.statement(self.ticker, donnee))
+        return self._avec_exercices_clos(donnee, etat)
+
+    @property
+    def financials(self):
+        return self._etat_financier("financials")
+
+    @property
+    def quarterly_financials(self):
+        return self._etat_financier("quarterly_financials")
+
+    @property
+    def balance_sheet(self):
+        return self._etat_financier("balance_sheet")
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._etat_financier("quarterly_balance_sheet")
+
+    @property
+    def cashflow(self):
+        return self._etat_financier("cashflow")
+
+    @property
+    def quarterly_cashflow(self):
+        return self._etat_financier("quarterly_cashflow")
@@ -0,0 +1,254 @@
+# ------------------------------------------------------------
+# --- Croissance vectorisée : CAGR, LTM, YoY (N tickers d'un coup) ---
+# ------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - cagr : CAGR de chaque ligne d'une matrice (tickers x périodes) en une passe NumPy, avec un drapeau par ligne
+    - ltm : somme des 4 derniers trimestres de chaque ligne (NaN s'il en manque un, sauf avec LTM_PARTIEL)
+    - croissance_annuelle : croissance d'une période sur l'autre (YoY) pour toute la matrice
+    - matrice_periodes : {ticker: série datée} -> matrice des N dernières périodes (alignées à droite, plus ancienne d'abord)
+    - annees_et_ltm : N dernières années + colonne LTM (revenus, FCF, EPS : états financiers annuels et trimestriels)
+    - dividendes_annees_et_ltm : même chose pour les dividendes (série des versements)
+    - croissance_lot : les 4 séries des graphiques (revenus, FCF, EPS, dividendes) de tout un lot de snapshots
+
+    Cas particuliers du CAGR (résultat NaN + drapeau, jamais 0 en silence) :
+        - DEBUT_NUL : valeur de départ nulle (division par 0)
+        - DEBUT_NEGATIF : valeur de départ négative (la racine n'a pas de sens)
+        - CHANGEMENT_SIGNE : départ positif, arrivée négative
+        - DONNEES_MANQUANTES : moins de 2 valeurs, ou valeur d'arrivée absente
+
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.Mesures import mesure
+
+# --- Drapeaux du CAGR ---
+CAGR_OK = 0
+DEBUT_NUL = 1
+DEBUT_NEGATIF = 2
+CHANGEMENT_SIGNE = 3
+DONNEES_MANQUANTES = 4
+
+LIBELLES_DRAPEAUX = {
+    CAGR_OK: "",
+    DEBUT_NUL: "départ nul",
+    DEBUT_NEGATIF: "départ négatif",
+    CHANGEMENT_SIGNE: "passage en négatif",
+    DONNEES_MANQUANTES: "données insuffisantes",
+}
+
+NB_ANNEES = 4 # Graphiques de l'onglet Analyse fondamentale : 4 années + LTM
+NB_TRIMESTRES_LTM = 4
+# LTM quand un des 4 derniers trimestres manque : NaN par défaut (une somme de 3 trimestres n'est pas comparable
+# à une année et fausserait le CAGR) ; "1" : somme des trimestres disponibles, comme les anciennes versions
+LTM_PARTIEL = os.environ.get("DASHBOARD_LTM_PARTIEL", "0") == "1"
+
+
+# ------------------------------
+# --- Calculs sur matrices ---
+# ------------------------------
+def cagr(valeurs):
+    """
+    valeurs : matrice (tickers x périodes), périodes dans l'ordre chronologique, NaN à gauche si l'historique est court.
+    Le CAGR va de la première valeur présente de chaque ligne jusqu'à la dernière colonne
+    (nombre de périodes = écart de position entre les deux).
+    Renvoie (cagr, drapeaux) : deux tableaux NumPy d'une valeur par ligne.
+    """
+    valeurs = np.asarray(valeurs, dtype=float)
+    if valeurs.ndim == 1:
+        valeurs = valeurs[np.newaxis, :]
+    n_lignes, n_periodes = valeurs.shape
+    if n_periodes == 0:
+        return np.full(n_lignes, np.nan), np.full(n_lignes, DONNEES_MANQUANTES, dtype=np.int8)
+
+    presentes = ~np.isnan(valeurs)
+    premiere = presentes.argmax(axis=1) # Position de la première valeur présente (0 si la ligne est vide)
+    lignes = np.arange(n_lignes)
+    debut = valeurs[lignes, premiere]
+    fin = valeurs[:, -1]
+    periodes = (n_periodes - 1) - premiere
+
+    drapeaux = np.full(n_lignes, CAGR_OK, dtype=np.int8)
+    drapeaux[(fin < 0) & (debut > 0)] = CHANGEMENT_SIGNE
+    drapeaux[debut < 0] = DEBUT_NEGATIF
+    drapeaux[debut == 0] = DEBUT_NUL
+    drapeaux[~presentes.any(axis=1) | np.isnan(fin) | (periodes < 1)] = DONNEES_MANQUANTES
+
+    valide = drapeaux == CAGR_OK
+    resultat = np.full(n_lignes, np.nan)
+    resultat[valide] = (fin[valide] / debut[valide]) ** (1 / periodes[valide]) - 1
+    return resultat, drapeaux
+
+
+def ltm(trimestres, n=NB_TRIMESTRES_LTM, partiel=None):
+    """
+    Somme des `n` dernières colonnes (trimestres, ordre chronologique) de chaque ligne.
+    Trimestre manquant (NaN, ou moins de `n` colonnes) : NaN ; avec `partiel` (par défaut LTM_PARTIEL),
+    somme des trimestres disponibles parmi les `n` derniers (NaN s'il n'y en a aucun).
+    """
+    partiel = LTM_PARTIEL if partiel is None else partiel
+    trimestres = np.asarray(trimestres, dtype=float)
+    if trimestres.ndim == 1:
+        trimestres = trimestres[np.newaxis, :]
+    derniers = trimestres[:, -n:]
+    if partiel:
+        return np.where(np.isnan(derniers).all(axis=1), np.nan, np.nansum(derniers, axis=1))
+    if trimestres.shape[1] < n:
+        return np.full(trimestres.shape[0], np.nan)
+    return derniers.sum(axis=1) # Une somme avec un NaN reste NaN
+
+
+def croissance_annuelle(valeurs):
+    """Croissance de chaque période par rapport à la précédente (matrice avec une colonne de moins). NaN si la précédente <= 0."""
+    valeurs = np.asarray(valeurs, dtype=float)
+    precedentes = valeurs[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(precedentes > 0, valeurs[:, 1:] / precedentes - 1, np.nan)
+
+
+# ----------------------------------------------
+# --- Construction des matrices (N tickers) ---
+# ----------------------------------------------
+def _empiler(series):
+    """
+    {ticker: série datée} -> trois tableaux NumPy de même longueur (code du ticker, date, valeur),
+    triés par ticker puis par date. Le code d'un ticker est sa position dans `series`.
+    """
+    codes, dates, valeurs = [], [], []
+    for code, serie in enumerate(series.values()):
+        if serie is None or not len(serie):
+            continue
+        index = pd.DatetimeIndex(serie.index)
+        if index.tz is not None:
+            index = index.tz_localize(None) # Fuseaux différents selon la place (dividendes) : heure locale, sans fuseau
+        codes.append(np.full(len(serie), code))
+        dates.append(index.to_numpy(dtype="datetime64[ns]"))
+        valeurs.append(pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float))
+    if not codes:
+        return np.empty(0, dtype=int), np.empty(0, dtype="datetime64[ns]"), np.empty(0)
+    codes, dates, valeurs = np.concatenate(codes), np.concatenate(dates), np.concatenate(valeurs)
+    ordre = np.lexsort((dates, codes))
+    return codes[ordre], dates[ordre], valeurs[ordre]
+
+
+def _aligner_a_droite(codes, dates, valeurs, tickers, n):
+    """
+    Tableaux triés (ticker, date) -> DataFrames (tickers x n) des valeurs et des dates,
+    dernière période en dernière colonne (une seule affectation NumPy pour tous les tickers).
+    """
+    matrice = np.full((len(tickers), n), np.nan)
+    matrice_dates = np.full((len(tickers), n), np.datetime64("NaT"), dtype="datetime64[ns]")
+    if len(codes):
+        # Rang de chaque période en partant de la fin de son ticker (0 = la plus récente)
+        fins = np.cumsum(np.bincount(codes, minlength=len(tickers)))
+        position = (n - 1) - (fins[codes] - 1 - np.arange(len(codes)))
+        garder = position >= 0
+        matrice[codes[garder], position[garder]] = valeurs[garder]
+        matrice_dates[codes[garder], position[garder]] = dates[garder]
+    return (pd.DataFrame(matrice, index=tickers, columns=range(n)),
+            pd.DataFrame(matrice_dates, index=tickers, columns=range(n)))
+
+
+def matrice_periodes(series, n):
+    """
+    {ticker: série datée (dans n'importe quel ordre)} -> (valeurs, dates) : DataFrames (tickers x n),
+    colonne n-1 = période la plus récente ; NaN / NaT à gauche si un ticker a moins de n périodes.
+    """
+    return _aligner_a_droite(*_empiler(series), list(series), n)
+
+
+def annees_et_ltm(annuel, trimestriel, nb_annees=NB_ANNEES):
+    """
+    annuel, trimestriel : {ticker: ligne d'un état financier} (colonnes Yahoo : dates).
+    Renvoie (valeurs, dates) : valeurs = nb_annees colonnes annuelles + colonne "LTM" (somme des 4 derniers trimestres,
+    NaN s'il en manque un : voir ltm et LTM_PARTIEL).
+    """
+    valeurs, dates = matrice_periodes(annuel, nb_annees)
+    trimestres, _ = matrice_periodes(trimestriel, NB_TRIMESTRES_LTM)
+    valeurs["LTM"] = ltm(trimestres.to_numpy())
+    return valeurs, dates
+
+
+def dividendes_annees_et_ltm(dividendes, nb_annees=NB_ANNEES):
+    """
+    dividendes : {ticker: série des versements}. Sommes par année civile (l'année en cours comprise),
+    0 pour une année sans versement entre le premier et le dernier versement du ticker
+    + colonne "LTM" : versements des 365 jours précédant le dernier versement de chaque ticker.
+    """
+    tickers = list(dividendes)
+    codes, dates, montants = _empiler(dividendes)
+    if not len(codes):
+        valeurs, dates_annees = _aligner_a_droite(codes, dates, montants, tickers, nb_annees)
+        valeurs["LTM"] = np.nan
+        return valeurs, dates_annees
+
+    # Sommes annuelles (ticker, année) pour tous les tickers : np.unique + bincount (triées par ticker puis par année)
+    annees = dates.astype("datetime64[Y]").astype(np.int64)
+    cles, groupe = np.unique(np.stack([codes, annees]), axis=1, return_inverse=True)
+    sommes = np.bincount(groupe.ravel(), weights=montants)
+
+    # Années continues du premier au dernier versement de chaque ticker, 0 pour une année sans versement
+    # (sinon les années suivantes glissent d'une colonne et le CAGR compte une période de moins)
+    codes_presents, debuts = np.unique(cles[0], return_index=True)
+    premiere = cles[1][debuts]
+    nb = cles[1][np.r_[debuts[1:], cles.shape[1]] - 1] - premiere + 1
+    decalage = np.r_[0, np.cumsum(nb)[:-1]]
+    annees_continues = np.repeat(premiere - decalage, nb) + np.arange(nb.sum())
+    sommes_continues = np.zeros(nb.sum())
+    rang = np.searchsorted(codes_presents, cles[0])
+    sommes_continues[decalage[rang] + cles[1] - premiere[rang]] = sommes
+
+    fins_annees = (annees_continues.astype("datetime64[Y]") + np.timedelta64(1, "Y")).astype("datetime64[D]") - np.timedelta64(1, "D")
+    valeurs, dates_annees = _aligner_a_droite(np.repeat(codes_presents, nb), fins_annees.astype("datetime64[ns]"),
+                                              sommes_continues, tickers, nb_annees)
+
+    # LTM : fenêtre de 365 jours finissant au dernier versement de chaque ticker
+    dernier = np.full(len(tickers), np.datetime64("NaT"), dtype="datetime64[ns]")
+    fins = np.cumsum(np.bincount(codes, minlength=len(tickers)))
+    presents = np.bincount(codes, minlength=len(tickers)) > 0
+    dernier[presents] = dates[fins[presents] - 1] # Dates triées : le dernier versement est en fin de groupe
+    dans_fenetre = dates > dernier[codes] - np.timedelta64(365, "D")
+    ltm_dividendes = np.bincount(codes[dans_fenetre], weights=montants[dans_fenetre], minlength=len(tickers))
+    valeurs["LTM"] = np.where(presents, ltm_dividendes, np.nan)
+    return valeurs, dates_annees
+
+
+# --------------------------
+# --- API par lot ---
+# --------------------------
+# Séries des graphiques : nom -> (état financier annuel, ligne de ALIAS_LIGNES)
+SERIES_CROISSANCE = {
+    "revenus": ("financials", "revenus"),
+    "fcf": ("cashflow", "fcf"),
+    "eps": ("financials", "eps"),
+}
+
+
+@mesure("indicateurs.cagr_ltm")
+def croissance_lot(snapshots, nb_annees=NB_ANNEES):
+    """
+    snapshots : {ticker: FinancialSnapshot}. Pour revenus, FCF, EPS et dividendes :
+    {nom: (valeurs, dates, cagr, drapeaux)} avec valeurs/dates (tickers x années (+ LTM)) et cagr/drapeaux indexés par ticker.
+    Le CAGR va de la première année affichée jusqu'au LTM.
+    """
+    resultats = {}
+    for nom, (etat, ligne) in SERIES_CROISSANCE.items():
+        valeurs, dates = annees_et_ltm(
+            {t: s.ligne(etat, ligne, fill=np.nan) for t, s in snapshots.items()},
+            {t: s.ligne(f"quarterly_{etat}", ligne, fill=np.nan) for t, s in snapshots.items()},
+            nb_annees,
+        )
+        resultats[nom] = valeurs, dates
+    resultats["dividendes"] = dividendes_annees_et_ltm({t: s.dividends for t, s in snapshots.items()}, nb_annees)
+
+    for nom, (valeurs, dates) in resultats.items():
+        taux, drapeaux = cagr(valeurs.to_numpy())
+        resultats[nom] = (valeurs, dates, pd.Series(taux, index=valeurs.index), pd.Series(drapeaux, index=valeurs.index))
+    return resultats
@@ -0,0 +1,163 @@
+# ---------------------------------------------------------
+# --- Disjoncteur : on arrête d'appeler un fournisseur en panne ---
+# ---------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - CircuitOuvert : erreur levée immédiatement (sans appeler le fournisseur) tant que le disjoncteur est ouvert
+    - Disjoncteur : après SEUIL_ECHECS échecs consécutifs, les appels sont refusés pendant une pause
+      (backoff exponentiel avec gigue) ; à la fin de la pause, un seul appel d'essai est autorisé :
+      succès -> fonctionnement normal, échec -> nouvelle pause, deux fois plus longue ;
+      un essai sans réponse après DELAI_ESSAI (ou interrompu) laisse partir un nouvel essai
+    - get_disjoncteur : un disjoncteur partagé par service (ex: "donnees" pour yfinance, "recherche" pour la recherche)
+
+    Pendant une panne de Yahoo, les pages n'attendent plus des délais d'expiration à chaque rerun :
+    elles servent tout de suite les données déjà en cache (utils.Cache_Donnees).
+
+"""
+
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from utils.Fournisseur_Donnees import DonneesIntrouvables
+
+# ---------------------------
+# --- Réglages ---
+# ---------------------------
+SEUIL_ECHECS = int(os.environ.get("DASHBOARD_SEUIL_ECHECS", 3)) # Échecs consécutifs avant ouverture
+PAUSE_INITIALE = float(os.environ.get("DASHBOARD_PAUSE_DISJONCTEUR", 15)) # Secondes
+PAUSE_MAX = 10 * 60
+DELAI_ESSAI = float(os.environ.get("DASHBOARD_DELAI_ESSAI", 60)) # Secondes : au-delà, l'appel d'essai bloqué est abandonné
+
+FERME = "fermé" # Fonctionnement normal
+OUVERT = "ouvert" # Appels refusés
+SEMI_OUVERT = "semi-ouvert" # Un appel d'essai en cours
+
+
+class CircuitOuvert(ConnectionError):
+    """Fournisseur considéré en panne : appel refusé sans le contacter."""
+
+    def __init__(self, nom, restant):
+        super().__init__(f"{nom} indisponible (nouvel essai dans {restant:.0f} s)")
+        self.restant = restant
+
+
+class Disjoncteur:
+    """
+    appeler(fonction) : exécute `fonction()` si le disjoncteur le permet, sinon lève CircuitOuvert.
+    Seules les exceptions comptent comme échecs (pas les réponses vides), sauf celles de `erreurs_ignorees`
+    (DonneesIntrouvables : ticker inconnu de Yahoo ou absent des fixtures), qui ne disent rien de l'état du fournisseur.
+    """
+
+    def __init__(self, nom, seuil=SEUIL_ECHECS, pause_initiale=PAUSE_INITIALE, pause_max=PAUSE_MAX, erreurs_ignorees=(), delai_essai=DELAI_ESSAI):
+        self.nom = nom
+        self.seuil = seuil
+        self.pause_initiale = pause_initiale
+        self.pause_max = pause_max
+        self.delai_essai = delai_essai
+        self.erreurs_ignorees = tuple(erreurs_ignorees)
+
+        self._verrou = threading.Lock()
+        self.etat = FERME
+        self._echecs = 0 # Échecs consécutifs
+        self._ouvertures = 0 # Ouvertures consécutives (sans succès entre deux) : fixe la durée de la pause
+        self._reouverture = 0.0 # Fin de la pause (time.monotonic)
+        self._fin_essai = 0.0 # Au-delà, l'appel d'essai en cours est considéré comme perdu (time.monotonic)
+        self.compteurs = Counter() # succes, echecs, refus, ouvertures, essais_abandonnes
+
+    def _ouvrir(self):
+        self._ouvertures += 1
+        pause = min(self.pause_max, self.pause_initiale * 2 ** (self._ouvertures - 1)) * random.uniform(0.8, 1.2) # Gigue : évite que tous les processus réessaient en même temps
+        self._reouverture = time.monotonic() + pause
+        self.etat = OUVERT
+        self.compteurs["ouvertures"] += 1
+        print(f"Disjoncteur {self.nom} ouvert : {self._echecs} échec(s), nouvel essai dans {pause:.0f} s")
+
+    def _autoriser(self):
+        """Sous verrou : True si l'appel peut partir (passe en semi-ouvert à la fin de la pause)."""
+        if self.etat == FERME:
+            return True
+        maintenant = time.monotonic()
+        if self.etat == SEMI_OUVERT and maintenant >= self._fin_essai:
+            # Essai bloqué (délai réseau sans fin) : sans cela, tous les appels suivants seraient refusés pour toujours
+            self.compteurs["essais_abandonnes"] += 1
+            self.etat = OUVERT
+        if self.etat == OUVERT and maintenant >= self._reouverture:
+            self.etat = SEMI_OUVERT # Un seul appel d'essai : les autres restent refusés jusqu'à sa réponse
+            self._fin_essai = maintenant + self.delai_essai
+            return True
+        return False
+
+    def restant(self):
+        """Secondes avant le prochain essai (0 si les appels passent)."""
+        with self._verrou:
+            return max(0.0, self._reouverture - time.monotonic()) if self.etat != FERME else 0.0
+
+    def ouvert(self):
+        """True si un appel serait refusé maintenant (sans rien changer à l'état)."""
+        with self._verrou:
+            maintenant = time.monotonic()
+            if self.etat == SEMI_OUVERT:
+                return maintenant < self._fin_essai
+            return self.etat == OUVERT and maintenant < self._reouverture
+
+    def appeler(self, fonction):
+        with self._verrou:
+            if not self._autoriser():
+                self.compteurs["refus"] += 1
+                raise CircuitOuvert(self.nom, max(0.0, self._reouverture - time.monotonic()))
+            fin_essai = self._fin_essai if self.etat == SEMI_OUVERT else None
+
+        try:
+            resultat = fonction()
+        except self.erreurs_ignorees:
+            self._succes()
+            raise
+        except Exception:
+            with self._verrou:
+                self._echecs += 1
+                self.compteurs["echecs"] += 1
+                # Appels partis avant l'ouverture qui échouent ensuite : pas de nouvelle ouverture (pause déjà en cours)
+                if self.etat == SEMI_OUVERT or (self.etat == FERME and self._echecs >= self.seuil):
+                    self._ouvrir()
+            raise
+        except BaseException:
+            # Appel interrompu (KeyboardInterrupt, arrêt du script...) : rien à reprocher au fournisseur,
+            # mais si c'était l'essai, on le rend tout de suite pour que le suivant puisse partir
+            with self._verrou:
+                if self.etat == SEMI_OUVERT and self._fin_essai == fin_essai:
+                    self.etat = OUVERT
+                    self._reouverture = time.monotonic()
+            raise
+        self._succes()
+        return resultat
+
+    def _succes(self):
+        with self._verrou:
+            self.compteurs["succes"] += 1
+            self._echecs = 0
+            self._ouvertures = 0
+            self.etat = FERME
+
+    def stats(self):
+        with self._verrou:
+            return {**self.compteurs, "etat": self.etat, "echecs_consecutifs": self._echecs}
+
+
+# --------------------------
+# --- INSTANCES PARTAGÉES ---
+# --------------------------
+_disjoncteurs = {}
+_verrou_disjoncteurs = threading.Lock()
+
+def get_disjoncteur(nom="donnees"):
+    """Un disjoncteur par service et par processus (toutes les sessions voient la même panne)."""
+    with _verrou_disjoncteurs:
+        if nom not in _disjoncteurs:
+            _disjoncteurs[nom] = Disjoncteur(nom, erreurs_ignorees=(DonneesIntrouvables,))
+        return _disjoncteurs[nom]
@@ -0,0 +1,184 @@
+# -----------------------------------------------------------
+# --- Création de l'instantané des données financières ---
+# -----------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - ALIAS_LIGNES : noms possibles (selon les actifs) de chaque ligne des états financiers
+    - FinancialSnapshot : toutes les données d'un ticker, chargées une seule fois (objet immuable)
+    - charger_snapshot : construit le FinancialSnapshot à partir d'un yf.Ticker (ou d'un TickerEnCache),
+      en lançant tous les téléchargements en parallèle avec un délai maximum par donnée
+
+"""
+
+import datetime
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import pandas as pd
+
+# -------------------------------------------------
+# --- Noms possibles des lignes (selon l'actif) ---
+# -------------------------------------------------
+# Yahoo ne nomme pas toujours les lignes de la même façon : on teste chaque alias dans l'ordre
+ALIAS_LIGNES = {
+    "revenus": ['Total Revenue', 'Revenue', 'totalRevenue'],
+    "resultat_net": ['Net Income', 'NetIncome'],
+    "eps": ['Diluted EPS', 'Basic EPS'],
+    "capitaux_propres": ['Stockholders Equity', 'Total Stockholder Equity'],
+    "fcf": ['Free Cash Flow', 'FreeCashFlow'],
+}
+
+# Lignes à extraire pour chaque état financier
+LIGNES_PAR_ETAT = {
+    "financials": ["revenus", "resultat_net", "eps"],
+    "quarterly_financials": ["revenus", "resultat_net", "eps"],
+    "balance_sheet": ["capitaux_propres"],
+    "quarterly_balance_sheet": ["capitaux_propres"],
+    "cashflow": ["fcf"],
+    "quarterly_cashflow": ["fcf"],
+}
+
+# Délai maximum (en secondes) accordé à chaque téléchargement. Passé ce délai, la section
+# correspondante affiche un message d'attente au lieu de bloquer toute la page.
+DELAI_PAR_DONNEE = {
+    "info": 6,
+    "history": 6,
+    "dividends": 6,
+    "financials": 8,
+    "quarterly_financials": 8,
+    "balance_sheet": 8,
+    "quarterly_balance_sheet": 8,
+    "cashflow": 8,
+    "quarterly_cashflow": 8,
+}
+
+# Pool de threads partagé par toutes les sessions : info + historique + 6 états financiers + dividendes = 9 appels
+# par chargement, et assez de threads pour SESSIONS_SIMULTANEES chargements sans file d'attente
+# (sinon une session attend que les autres libèrent le pool et dépasse ses délais). Threads créés à la demande.
+APPELS_PAR_CHARGEMENT = 9
+SESSIONS_SIMULTANEES = int(os.environ.get("DASHBOARD_SESSIONS_SIMULTANEES", 16))
+_POOL = ThreadPoolExecutor(max_workers=APPELS_PAR_CHARGEMENT * SESSIONS_SIMULTANEES, thread_name_prefix="chargement_donnees")
+
+
+def debut_historique_ytd():
+    """On prend large (20 décembre de l'année N-1) pour être sûr d'avoir la dernière clôture de l'année précédente."""
+    return f"{datetime.date.today().year - 1}-12-20"
+
+
+def _chercher_ligne(df, possible_names):
+    """Renvoie la première ligne trouvée parmi les alias (None si aucune)."""
+    for name in possible_names:
+        if name in df.index:
+            return df.loc[name]
+    return None
+
+
+# --------------------------------
+# --- Instantané des données ---
+# --------------------------------
+@dataclass(frozen=True)
+class FinancialSnapshot:
+    """
+    Photo des données d'un ticker à un instant donné : chaque état financier n'est téléchargé qu'une fois,
+    puis partagé par le tableau de bord, l'onglet Analyse financière et les indicateurs.
+    Les noms des attributs reprennent ceux de yf.Ticker (info, financials, dividends...).
+    """
+    ticker: str
+    info: dict
+    history: pd.DataFrame
+    financials: pd.DataFrame
+    quarterly_financials: pd.DataFrame
+    balance_sheet: pd.DataFrame
+    quarterly_balance_sheet: pd.DataFrame
+    cashflow: pd.DataFrame
+    quarterly_cashflow: pd.DataFrame
+    dividends: pd.Series
+    lignes: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    en_retard: frozenset = frozenset() # Données pas arrivées dans les délais (affichées au prochain rerun)
+    ages: MappingProxyType = field(default_factory=lambda: MappingProxyType({})) # Données servies périmées : {donnée: âge (s)}
+
+    def est_pret(self, *etats):
+        """True si toutes les données demandées sont arrivées à temps."""
+        return not self.en_retard.intersection(etats)
+
+    def ligne(self, etat, nom, fill=0):
+        """
+        Ligne `nom` (clé de ALIAS_LIGNES) de l'état financier `etat`, déjà recherchée au chargement.
+        Si la ligne n'existe pas, on renvoie une série remplie avec `fill` (une valeur par date de l'état).
+        """
+        serie = self.lignes.get((etat, nom))
+        if serie is None:
+            return pd.Series(fill, index=getattr(self, etat).columns)
+        return serie
+
+
+# -----------------------------
+# --- Chargement (1 fois) ---
+# -----------------------------
+def _telecharger(fonction, defaut):
+    """Un état manquant ne doit pas empêcher l'affichage des autres."""
+    try:
+        valeur = fonction()
+        return defaut if valeur is None else valeur
+    except Exception as e:
+        print(f"Erreur de chargement : {e}")
+        return defaut
+
+
+def _defauts():
+    defauts = {"info": {}, "history": pd.DataFrame(), "dividends": pd.Series(dtype=float)}
+    defauts.update({etat: pd.DataFrame() for etat in LIGNES_PAR_ETAT})
+    return defauts
+
+
+def charger_snapshot(stock, ticker=None, delais=None, pool=None, donnees=None):
+    """
+    Télécharge chaque donnée du ticker exactement une fois et pré-calcule les lignes utilisées par l'application.
+    Les 9 appels partent en même temps sur le pool partagé (dimensionné pour SESSIONS_SIMULTANEES sessions) :
+    la page attend le plus lent, pas la somme.
+    Chaque donnée a son propre délai (DELAI_PAR_DONNEE) : ce qui n'est pas arrivé à temps est laissé vide
+    et noté dans `en_retard` (le téléchargement continue en arrière-plan et remplit le cache pour le prochain rerun).
+    Les données servies périmées par le cache (fournisseur lent ou en panne) sont notées dans `ages`.
+    donnees : sous-ensemble à charger (ex: ("info", "history") pour le premier affichage) ; les autres restent vides.
+    """
+    ticker = ticker or getattr(stock, "ticker", "")
+    delais = {**DELAI_PAR_DONNEE, **(delais or {})}
+    pool = pool or _POOL
+
+    appels = {
+        "info": lambda: stock.info,
+        "history": lambda: stock.history(start=debut_historique_ytd(), auto_adjust=True),
+        "dividends": lambda: stock.dividends,
+    }
+    for etat in LIGNES_PAR_ETAT:
+        appels[etat] = lambda etat=etat: getattr(stock, etat)
+    if donnees is not None:
+        appels = {nom: appel for nom, appel in appels.items() if nom in donnees}
+
+    defauts = _defauts()
+    debut = time.monotonic()
+    taches = {nom: pool.submit(_telecharger, appel, defauts[nom]) for nom, appel in appels.items()}
+
+    donnees, en_retard = dict(defauts), set()
+    for nom, tache in taches.items():
+        restant = max(0.0, debut + delais[nom] - time.monotonic())
+        try:
+            donnees[nom] = tache.result(timeout=restant)
+        except FuturesTimeoutError:
+            donnees[nom] = defauts[nom]
+            en_retard.add(nom)
+
+    lignes = {}
+    for etat, noms in LIGNES_PAR_ETAT.items():
+        for nom in noms:
+            lignes[(etat, nom)] = _chercher_ligne(donnees[etat], ALIAS_LIGNES[nom])
+
+    ages = {nom: age for nom, age in dict(getattr(stock, "ages", {})).items() if nom in taches}
+    return FinancialSnapshot(ticker=ticker, lignes=MappingProxyType(lignes), en_retard=frozenset(en_retard),
+                             ages=MappingProxyType(ages), **donnees)
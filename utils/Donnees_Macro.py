@@ -0,0 +1,268 @@
+# ---------------------------------------------------------------
+# --- Données macro : indices, taux, changes, matières premières ---
+# ---------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - SERIES_MACRO : séries suivies par catégorie (symboles Yahoo -> libellés)
+    - cloture_macro : clôtures d'une série, via le stockage local des cours (Parquet, synchronisation incrémentale)
+    - Calculs des séries dérivées (vectorisés) :
+        - glissement_annuel : variation sur 1 an (YoY) de chaque date
+        - drawdown : baisse depuis le plus haut, avec le plus haut courant (pour reprendre le calcul plus tard)
+        - correlation_glissante : corrélation des variations quotidiennes avec le ticker choisi, sur une fenêtre glissante
+          (rendements log, ou écarts pour les taux)
+    - SeriesDerivees : cache Parquet des séries dérivées, mises à jour de façon incrémentale
+      (seules les nouvelles dates sont calculées, avec juste le contexte nécessaire : 1 an, la fenêtre, le dernier plus haut) ;
+      une corrélation par série et par ticker (la fenêtre n'ouvre pas un nouveau fichier), MAX_CORRELATIONS fichiers au plus
+    - get_series_derivees : instance partagée
+
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.Cache_Donnees import DOSSIER_CACHE
+from utils.Fournisseur_Donnees import _slug
+from utils.Stockage_Cours import get_stockage
+
+# --------------------------------
+# --- Séries suivies ---
+# --------------------------------
+SERIES_MACRO = {
+    "Indices": {
+        "^GSPC": "S&P 500",
+        "^IXIC": "Nasdaq",
+        "^STOXX50E": "Euro Stoxx 50",
+        "^FCHI": "CAC 40",
+        "^N225": "Nikkei 225",
+    },
+    "Taux": {
+        "^IRX": "US 3 mois",
+        "^FVX": "US 5 ans",
+        "^TNX": "US 10 ans",
+        "^TYX": "US 30 ans",
+    },
+    "Changes": {
+        "EURUSD=X": "EUR/USD",
+        "GBPUSD=X": "GBP/USD",
+        "USDJPY=X": "USD/JPY",
+        "DX-Y.NYB": "Dollar Index",
+    },
+    "Matières premières": {
+        "GC=F": "Or",
+        "SI=F": "Argent",
+        "CL=F": "Pétrole WTI",
+        "BZ=F": "Pétrole Brent",
+        "HG=F": "Cuivre",
+    },
+}
+
+DOSSIER_DERIVEES = DOSSIER_CACHE / "macro"
+FENETRE_CORRELATION = 63 # ~3 mois de séances
+PART_MIN_CORRELATION = 0.8 # Part minimale de variations valides dans la fenêtre (sinon NaN)
+MAX_CORRELATIONS = 300 # Fichiers de corrélation gardés (un par série et par ticker consulté) : les plus anciens sont supprimés
+JOURS_ANNEE = 365
+
+
+def libelle(symbole):
+    for series in SERIES_MACRO.values():
+        if symbole in series:
+            return series[symbole]
+    return symbole
+
+
+def cloture_macro(symbole, stockage=None):
+    """
+    Clôtures de la série (index sans fuseau horaire, une valeur par jour) : le stockage local ne télécharge
+    que les barres manquantes depuis la dernière synchronisation, via le fournisseur de données habituel.
+    """
+    stockage = stockage or get_stockage()
+    hist = stockage.historique(symbole, columns=["Close"])
+    if hist.empty:
+        return pd.Series(dtype=float, name=symbole)
+    cloture = hist["Close"].astype(float)
+    index = cloture.index.tz_localize(None) if cloture.index.tz is not None else cloture.index
+    cloture.index = index.normalize()
+    cloture = cloture[~cloture.index.duplicated(keep="last")].dropna()
+    cloture.name = symbole
+    return cloture
+
+
+# ---------------------------------
+# --- Calculs (vectorisés) ---
+# ---------------------------------
+def glissement_annuel(cloture, depuis=None):
+    """
+    Variation sur 1 an de chaque date (>= depuis) : valeur / dernière valeur connue 365 jours plus tôt - 1.
+    NaN tant que la série n'a pas un an d'historique.
+    """
+    dates = cloture.index.values
+    valeurs = cloture.to_numpy(dtype=float)
+    debut = 0 if depuis is None else np.searchsorted(dates, np.datetime64(depuis), side="right")
+    references = np.searchsorted(dates, dates[debut:] - np.timedelta64(JOURS_ANNEE, "D"), side="right") - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yoy = np.where(references >= 0, valeurs[debut:] / valeurs[np.maximum(references, 0)] - 1, np.nan)
+    return pd.Series(yoy, index=cloture.index[debut:], name="yoy")
+
+
+def drawdown(cloture, pic_precedent=np.nan):
+    """
+    Baisse depuis le plus haut (0 = au plus haut). pic_precedent : plus haut déjà connu avant le début de `cloture`
+    (reprise incrémentale). Renvoie un DataFrame : drawdown, pic.
+    """
+    valeurs = cloture.to_numpy(dtype=float)
+    pic = np.fmax.accumulate(np.concatenate([[pic_precedent], valeurs]))[1:]
+    return pd.DataFrame({"drawdown": valeurs / pic - 1, "pic": pic}, index=cloture.index)
+
+
+def variations(valeurs, ecarts=False):
+    """
+    Variations quotidiennes : rendements log, ou écarts (ex: taux, qui peuvent être nuls ou négatifs).
+    Une variation incalculable (valeur nulle ou négative en log, NaN) vaut NaN et ne touche que les fenêtres qui la contiennent.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultat = np.diff(valeurs if ecarts else np.log(valeurs))
+    resultat[~np.isfinite(resultat)] = np.nan
+    return resultat
+
+
+def correlation_glissante(serie, reference, fenetre=FENETRE_CORRELATION, depuis=None, ecarts=False):
+    """
+    Corrélation des variations quotidiennes de `serie` (rendements log, ou écarts si `ecarts`) et des rendements log
+    de `reference`, sur les `fenetre` dernières séances communes, pour chaque date (>= depuis).
+    NaN si moins de PART_MIN_CORRELATION de la fenêtre est calculable.
+    """
+    communes = pd.concat([serie, reference], axis=1, join="inner").dropna()
+    if len(communes) <= fenetre:
+        return pd.Series(dtype=float, name="correlation")
+    valeurs = communes.to_numpy(dtype=float)
+    x = pd.Series(variations(valeurs[:, 0], ecarts), index=communes.index[1:])
+    y = pd.Series(variations(valeurs[:, 1]), index=communes.index[1:])
+    minimum = max(2, int(np.ceil(fenetre * PART_MIN_CORRELATION)))
+    correlation = x.rolling(fenetre, min_periods=minimum).corr(y).iloc[fenetre - 1:]
+    resultat = correlation.clip(-1, 1).rename("correlation")
+    return resultat if depuis is None else resultat[resultat.index > depuis]
+
+
+# -----------------------------------------
+# --- Cache des séries dérivées (Parquet) ---
+# -----------------------------------------
+class SeriesDerivees:
+    """
+    Une série dérivée = un fichier Parquet (ex: <dossier>/yoy/^GSPC.parquet). À chaque lecture, la dernière date
+    enregistrée (séance peut-être en cours quand elle a été calculée) et les dates postérieures sont calculées
+    (avec le contexte minimal), puis remplacent / prolongent la table. Le fichier n'est réécrit que si quelque chose a changé.
+    Si la série source a été réécrite (dernière date enregistrée absente de la source), tout est recalculé.
+    """
+
+    def __init__(self, dossier=DOSSIER_DERIVEES):
+        self.dossier = Path(dossier)
+        self._verrou = threading.Lock()
+
+    def _chemin(self, nature, cle):
+        return self.dossier / nature / f"{_slug(cle)}.parquet"
+
+    def _lire(self, chemin):
+        try:
+            return pd.read_parquet(chemin)
+        except (OSError, ValueError):
+            return pd.DataFrame()
+
+    def _ecrire(self, chemin, table):
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = chemin.with_suffix(".tmp")
+        table.to_parquet(temporaire)
+        os.replace(temporaire, chemin)
+
+    def _evincer(self, nature, maximum):
+        """Garde les `maximum` fichiers de la nature les plus récemment écrits."""
+        try:
+            fichiers = sorted(self.dossier.joinpath(nature).glob("*.parquet"), key=lambda f: f.stat().st_mtime)
+        except OSError:
+            return
+        for fichier in fichiers[:max(0, len(fichiers) - maximum)]:
+            fichier.unlink(missing_ok=True)
+
+    def _mettre_a_jour(self, nature, cle, source, calcul, colonne, parametres=None):
+        """
+        calcul(enregistre) -> nouvelles lignes (DataFrame, dates > dernière date de `enregistre`) ;
+        enregistre = lignes déjà calculées et définitives, sans la dernière (vide au premier appel, si la source a changé,
+        ou si les `parametres` enregistrés avec la table sont différents).
+        Renvoie la colonne `colonne` de la série complète (vide si rien n'est calculable).
+        """
+        table = self._table_a_jour(nature, cle, source, calcul, parametres or {})
+        return table[colonne] if colonne in table.columns else pd.Series(dtype=float, name=colonne)
+
+    def _table_a_jour(self, nature, cle, source, calcul, parametres):
+        chemin = self._chemin(nature, cle)
+        with self._verrou:
+            enregistre = self._lire(chemin)
+            if not enregistre.empty and enregistre.index[-1] not in source.index:
+                enregistre = enregistre.iloc[0:0] # Source réécrite (ex: historique ajusté) : on repart de zéro
+            if any(nom not in enregistre.columns or (enregistre[nom] != valeur).any() for nom, valeur in parametres.items()):
+                enregistre = enregistre.iloc[0:0] # Autre réglage (ex: fenêtre de corrélation) : on repart de zéro
+            # La dernière ligne est toujours recalculée : sa clôture (séance en cours) a pu bouger depuis,
+            # et elle sert de point de départ (ex: pic du drawdown) aux mises à jour suivantes
+            derniere_ligne = enregistre.iloc[-1:]
+            enregistre = enregistre.iloc[:-1]
+            nouvelles = calcul(enregistre).assign(**parametres)
+            if nouvelles.empty:
+                return enregistre
+            if nouvelles.index.equals(derniere_ligne.index) and nouvelles.equals(derniere_ligne):
+                return pd.concat([enregistre, derniere_ligne]) # Rien de changé : pas de réécriture
+            table = pd.concat([enregistre, nouvelles]) if not enregistre.empty else nouvelles
+            self._ecrire(chemin, table)
+            if nature == "correlation":
+                self._evincer(nature, MAX_CORRELATIONS)
+            return table
+
+    # --- API publique ---
+    def glissement_annuel(self, symbole, cloture):
+        def calcul(enregistre):
+            depuis = enregistre.index[-1] if not enregistre.empty else None
+            return glissement_annuel(cloture, depuis=depuis).to_frame()
+        return self._mettre_a_jour("yoy", symbole, cloture, calcul, "yoy") if not cloture.empty else pd.Series(dtype=float)
+
+    def drawdown(self, symbole, cloture):
+        def calcul(enregistre):
+            if enregistre.empty:
+                return drawdown(cloture)
+            return drawdown(cloture[cloture.index > enregistre.index[-1]], pic_precedent=enregistre["pic"].iloc[-1])
+        return self._mettre_a_jour("drawdown", symbole, cloture, calcul, "drawdown") if not cloture.empty else pd.Series(dtype=float)
+
+    def correlation(self, symbole, cloture, ticker, cloture_ticker, fenetre=FENETRE_CORRELATION):
+        if cloture.empty or cloture_ticker.empty:
+            return pd.Series(dtype=float)
+        communes = cloture.index.intersection(cloture_ticker.index)
+        if communes.empty:
+            return pd.Series(dtype=float)
+        ecarts = symbole in SERIES_MACRO["Taux"] # Taux : écarts en points (un taux peut être nul), pas de rendement log
+
+        def calcul(enregistre):
+            if enregistre.empty:
+                return correlation_glissante(cloture, cloture_ticker, fenetre, ecarts=ecarts).to_frame()
+            # Contexte : les `fenetre` + 1 dernières séances communes avant la dernière date enregistrée suffisent
+            derniere = enregistre.index[-1]
+            debut = communes[max(communes.searchsorted(derniere) - fenetre - 1, 0)]
+            return correlation_glissante(cloture[cloture.index >= debut], cloture_ticker[cloture_ticker.index >= debut],
+                                         fenetre, depuis=derniere, ecarts=ecarts).to_frame()
+        source = pd.Series(index=communes, dtype=float)
+        return self._mettre_a_jour("correlation", f"{symbole}_{ticker}", source, calcul, "correlation",
+                                   parametres={"fenetre": fenetre, "ecarts": ecarts})
+
+
+_series_derivees = None
+_verrou_derivees = threading.Lock()
+
+def get_series_derivees():
+    global _series_derivees
+    with _verrou_derivees:
+        if _series_derivees is None:
+            _series_derivees = SeriesDerivees()
+        return _series_derivees
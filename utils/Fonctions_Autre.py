@@ -8,6 +8,7 @@ Sommaire des fonctions ajoutées :
 
     - get_currency_symbol : Transforme le code ISO (USD, EUR) en symbole ($, €)
     - translate_sector : Traduit les secteurs Yahoo Finance (EN) vers le Français (FR)
+    - formater_age : Durée en secondes -> texte court ("12 min", "3 h", "2 j")
 
 """
 
@@ -51,4 +52,18 @@ def translate_sector(sector_name):
         "Utilities": "Services Publics" # Eau, Élec...
     }    
     # On renvoie la traduction, ou le nom anglais si on ne trouve pas
-    return mapping.get(sector_name, sector_name)
\ No newline at end of file
+    return mapping.get(sector_name, sector_name)
+
+
+# ----------------------
+# --- ÂGE D'UNE DONNÉE ---
+# ----------------------
+def formater_age(secondes):
+    """Âge d'une donnée servie depuis le cache (None = inconnu)."""
+    if secondes is None:
+        return "âge inconnu"
+    if secondes < 3600:
+        return f"{max(1, round(secondes / 60))} min"
+    if secondes < 48 * 3600:
+        return f"{round(secondes / 3600)} h"
+    return f"{round(secondes / 86400)} j"
@@ -0,0 +1,431 @@
+# --------------------------------------------------
+# --- Création des fournisseurs de données marché ---
+# --------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - FournisseurDonnees : interface commune (info, historique, téléchargement groupé, états financiers, dividendes, recherche)
+    - FournisseurYahoo : fournisseur "live" (yfinance + endpoint de recherche Yahoo)
+    - FournisseurRejeu : rejoue des réponses enregistrées (fixtures Parquet/JSON), sans réseau.
+      Avec une `source`, il enregistre au passage les réponses de cette source (mode enregistrement).
+    - get_fournisseur / set_fournisseur : fournisseur utilisé par toute l'application
+
+    Choix du fournisseur par variables d'environnement :
+        DASHBOARD_FOURNISSEUR = yahoo (défaut) | rejeu | enregistrement
+        DASHBOARD_FIXTURES = dossier des fixtures (défaut : ./fixtures)
+
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+# pandas est importé à la première utilisation (dans les méthodes) : importer ce module ne le charge pas
+ETATS_FINANCIERS = [
+    "financials", "quarterly_financials",
+    "balance_sheet", "quarterly_balance_sheet",
+    "cashflow", "quarterly_cashflow",
+]
+
+DOSSIER_FIXTURES = Path(os.environ.get("DASHBOARD_FIXTURES", Path(__file__).resolve().parent.parent / "fixtures"))
+
+
+class DonneesIntrouvables(LookupError):
+    """
+    Donnée inexistante : aucune réponse enregistrée (mode rejeu), ou ticker inconnu de Yahoo (404, ticker manquant).
+    Ne dit rien de l'état du fournisseur : le disjoncteur ne la compte pas comme un échec.
+    """
+
+
+# ---------------------------
+# --- INTERFACE COMMUNE ---
+# ---------------------------
+class FournisseurDonnees:
+    """
+    Interface que doit respecter chaque fournisseur.
+    `appels` compte les appels par type de donnée (utile pour les benchmarks et les tests de charge).
+    """
+    nom = "abstrait"
+
+    def __init__(self):
+        self.appels = Counter()
+        self._verrou_compteur = threading.Lock()
+
+    def _compter(self, donnee):
+        with self._verrou_compteur:
+            self.appels[donnee] += 1
+
+    def info(self, ticker):
+        """Dictionnaire d'informations (cotation, secteur, ratios...) équivalent à yf.Ticker.info"""
+        raise NotImplementedError
+
+    def history(self, ticker, **kwargs):
+        """Historique OHLCV (mêmes paramètres que yf.Ticker.history : start, end, period, auto_adjust...)"""
+        raise NotImplementedError
+
+    def download(self, tickers, **kwargs):
+        """
+        Historique de plusieurs tickers en un seul appel (équivalent de yf.download).
+        Colonnes à deux niveaux : (champ, ticker), ex: ('Close', 'AAPL').
+        """
+        raise NotImplementedError
+
+    def statement(self, ticker, nom):
+        """État financier `nom` (voir ETATS_FINANCIERS) : lignes = postes, colonnes = dates de clôture"""
+        raise NotImplementedError
+
+    def dividends(self, ticker):
+        """Série des dividendes versés (index = date de détachement)"""
+        raise NotImplementedError
+
+    def search(self, query):
+        """Liste de dictionnaires {'symbol', 'name', 'exchange'} correspondant à la recherche"""
+        raise NotImplementedError
+
+
+# -----------------------------
+# --- FOURNISSEUR YAHOO ---
+# -----------------------------
+class FournisseurYahoo(FournisseurDonnees):
+    nom = "yahoo"
+
+    URL_RECHERCHE = "https://query1.finance.yahoo.com/v1/finance/search"
+
+    # On se fait passer pour un navigateur standard
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    }
+
+    NB_RESULTATS_RECHERCHE = 10
+
+    def __init__(self):
+        super().__init__()
+        self._session = None
+        self._verrou_session = threading.Lock()
+
+    @property
+    def session(self):
+        """Session HTTP réutilisée (connexions TCP/TLS gardées ouvertes d'une frappe à l'autre)."""
+        with self._verrou_session:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                self._session.headers.update(self.HEADERS)
+                self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            return self._session
+
+    @staticmethod
+    def _ticker(ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker)
+
+    @staticmethod
+    def _introuvable(erreur):
+        """Réponse « n'existe pas » de Yahoo (HTTP 404, ticker sans cotation) plutôt qu'une panne du service."""
+        from yfinance.exceptions import YFTickerMissingError # yfinance déjà chargé : l'appel vient de l'utiliser
+        reponse = getattr(erreur, "response", None)
+        return isinstance(erreur, YFTickerMissingError) or getattr(reponse, "status_code", None) == 404
+
+    @contextmanager
+    def _requete(self, ticker):
+        """Traduit les réponses « n'existe pas » en DonneesIntrouvables (ignorées par le disjoncteur)."""
+        try:
+            yield
+        except Exception as erreur:
+            if self._introuvable(erreur):
+                raise DonneesIntrouvables(str(ticker)) from erreur
+            raise
+
+    def info(self, ticker):
+        self._compter("info")
+        with self._requete(ticker):
+            return self._ticker(ticker).info or {}
+
+    def history(self, ticker, **kwargs):
+        self._compter("history")
+        with self._requete(ticker):
+            return self._ticker(ticker).history(**kwargs)
+
+    def download(self, tickers, **kwargs):
+        import pandas as pd
+        import yfinance as yf
+        self._compter("download")
+        kwargs = {"auto_adjust": True, **kwargs}
+        with self._requete(",".join(tickers)):
+            cours = yf.download(list(tickers), group_by="column", progress=False, threads=True, multi_level_index=True, **kwargs)
+        return pd.DataFrame() if cours is None else cours
+
+    def statement(self, ticker, nom):
+        if nom not in ETATS_FINANCIERS:
+            raise ValueError(f"État financier inconnu : {nom}")
+        self._compter(nom)
+        with self._requete(ticker):
+            return getattr(self._ticker(ticker), nom)
+
+    def dividends(self, ticker):
+        self._compter("dividends")
+        with self._requete(ticker):
+            return self._ticker(ticker).dividends
+
+    def search(self, query):
+        self._compter("search")
+
+        params = {
+            "q": query,
+            "quotesCount": self.NB_RESULTATS_RECHERCHE,
+            "newsCount": 0,
+            "enableFuzzyQuery": "false",
+            "quotesQueryId": "tss_match_phrase_query"
+        }
+        response = self.session.get(self.URL_RECHERCHE, params=params, timeout=3)
+        data = response.json()
+
+        results = []
+        for item in data.get('quotes', []):
+            if 'symbol' in item:
+                results.append({
+                    "symbol": item['symbol'],
+                    "name": item.get('shortname') or item.get('longname') or item['symbol'],
+                    "exchange": item.get('exchDisp', item.get('exchange', 'N/A')),
+                })
+        return results
+
+
+# ----------------------------------------------
+# --- FOURNISSEUR REJEU (FIXTURES LOCALES) ---
+# ----------------------------------------------
+def _slug(texte):
+    """Nom de fichier sûr pour un ticker ou une recherche (ex: '^FCHI' -> '_FCHI')."""
+    return re.sub(r"[^A-Za-z0-9.\-]", "_", texte.strip().upper()) or "_"
+
+
+def _avec_ext(chemin, ext):
+    """Ajoute l'extension sans toucher aux points du nom (ex: 'BRK.B' reste 'BRK.B.json')."""
+    return chemin.parent / (chemin.name + ext)
+
+
+def _parquet_disponible():
+    try:
+        import pyarrow # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class FournisseurRejeu(FournisseurDonnees):
+    """
+    Sert des réponses enregistrées, sans aucun appel réseau. Organisation du dossier :
+        <dossier>/<TICKER>/info.json
+        <dossier>/<TICKER>/history.parquet       (historique complet, filtré sur start/end/period au rejeu)
+        <dossier>/<TICKER>/<etat>.parquet        (transposé : dates en lignes, postes en colonnes)
+        <dossier>/<TICKER>/dividends.parquet
+        <dossier>/_recherche/<REQUETE>.json
+    Les fichiers .json (orient="split") sont acceptés à la place des .parquet si pyarrow est absent.
+    Si `source` est donné, chaque réponse est demandée à la source puis enregistrée (mode enregistrement) ;
+    les cours reçus sont fusionnés dans l'historique déjà enregistré (une synchro incrémentale ne le raccourcit pas).
+    """
+    nom = "rejeu"
+
+    def __init__(self, dossier=DOSSIER_FIXTURES, source=None):
+        super().__init__()
+        self.dossier = Path(dossier)
+        self.source = source
+
+    # --- Lecture / écriture des fixtures ---
+    def _chemin(self, ticker, donnee):
+        return self.dossier / _slug(ticker) / donnee
+
+    def _lire_json(self, chemin):
+        if not _avec_ext(chemin, ".json").exists():
+            raise DonneesIntrouvables(str(chemin))
+        with open(_avec_ext(chemin, ".json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _ecrire_json(self, chemin, valeur):
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(_avec_ext(chemin, ".json"), "w", encoding="utf-8") as f:
+            json.dump(valeur, f, ensure_ascii=False, indent=1, default=str)
+
+    def _lire_table(self, chemin):
+        import pandas as pd
+        if _avec_ext(chemin, ".parquet").exists():
+            return pd.read_parquet(_avec_ext(chemin, ".parquet"))
+        if _avec_ext(chemin, ".json").exists():
+            return pd.read_json(_avec_ext(chemin, ".json"), orient="split")
+        raise DonneesIntrouvables(str(chemin))
+
+    def _ecrire_table(self, chemin, df):
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        df = df.copy()
+        df.columns = [str(c) for c in df.columns]
+        if _parquet_disponible():
+            df.to_parquet(_avec_ext(chemin, ".parquet"))
+        else:
+            df.to_json(_avec_ext(chemin, ".json"), orient="split", date_format="iso")
+
+    # --- API du fournisseur ---
+    def info(self, ticker):
+        self._compter("info")
+        chemin = self._chemin(ticker, "info")
+        if self.source is not None:
+            valeur = self.source.info(ticker)
+            self._ecrire_json(chemin, valeur)
+            return valeur
+        return self._lire_json(chemin)
+
+    def history(self, ticker, **kwargs):
+        self._compter("history")
+        chemin = self._chemin(ticker, "history")
+        if self.source is not None:
+            hist = self.source.history(ticker, **kwargs)
+            self._enregistrer_historique(ticker, hist)
+            return hist
+
+        return self._rejouer_historique(ticker, **kwargs)
+
+    def _enregistrer_historique(self, ticker, hist):
+        """Ajoute les barres reçues à l'historique enregistré (les barres déjà présentes sont remplacées)."""
+        import pandas as pd
+        chemin = self._chemin(ticker, "history")
+        try:
+            ancien = self._lire_table(chemin)
+        except DonneesIntrouvables:
+            ancien = None
+        if ancien is not None and hist.empty:
+            return
+        if ancien is not None and not ancien.empty:
+            if ancien.index.tz is not None and hist.index.tz is not None:
+                hist = hist.tz_convert(ancien.index.tz)
+            hist = pd.concat([ancien, hist])
+            hist = hist[~hist.index.duplicated(keep="last")].sort_index(kind="stable")
+        self._ecrire_table(chemin, hist)
+
+    def _rejouer_historique(self, ticker, start=None, end=None, period=None, **kwargs):
+        """
+        On rejoue la fenêtre demandée (start/end, ou period comme yfinance : "5d", "6mo", "1y", "ytd", "max")
+        à partir de l'historique complet enregistré. La période se compte depuis la dernière barre enregistrée.
+        """
+        import pandas as pd
+        hist = self._lire_table(self._chemin(ticker, "history"))
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start).tz_localize(hist.index.tz)]
+        if end is not None:
+            hist = hist[hist.index < pd.Timestamp(end).tz_localize(hist.index.tz)]
+        if start is None and end is None and period not in (None, "max") and not hist.empty:
+            fin = hist.index.max()
+            if period == "ytd":
+                return hist[hist.index >= fin.normalize().replace(month=1, day=1)]
+            nombre = re.fullmatch(r"(\d+)(d|mo|y)", period)
+            if nombre is None:
+                raise ValueError(f"Période inconnue : {period}")
+            n, unite = int(nombre[1]), nombre[2]
+            if unite == "d":
+                return hist.iloc[-n:] # En séances, comme yfinance
+            debut = fin - pd.DateOffset(**{"mo": {"months": n}, "y": {"years": n}}[unite])
+            hist = hist[hist.index > debut]
+        return hist
+
+    def download(self, tickers, **kwargs):
+        self._compter("download")
+        if self.source is not None:
+            cours = self.source.download(tickers, **kwargs)
+            # On enregistre un historique par ticker, pour pouvoir rejouer n'importe quel lot
+            for ticker in cours.columns.get_level_values(1).unique():
+                self._enregistrer_historique(ticker, cours.xs(ticker, axis=1, level=1).dropna(how="all"))
+            return cours
+
+        historiques = {}
+        for ticker in tickers:
+            try:
+                historiques[ticker] = self._rejouer_historique(ticker, **kwargs)
+            except DonneesIntrouvables:
+                continue # Comme yf.download : un ticker introuvable n'empêche pas les autres
+        import pandas as pd
+        if not historiques:
+            return pd.DataFrame()
+        cours = pd.concat(historiques, axis=1) # colonnes (ticker, champ)
+        return cours.swaplevel(axis=1).sort_index(axis=1)
+
+    def statement(self, ticker, nom):
+        if nom not in ETATS_FINANCIERS:
+            raise ValueError(f"État financier inconnu : {nom}")
+        self._compter(nom)
+        chemin = self._chemin(ticker, nom)
+        if self.source is not None:
+            etat = self.source.statement(ticker, nom)
+            self._ecrire_table(chemin, etat.T)
+            return etat
+
+        import pandas as pd
+        etat_T = self._lire_table(chemin)
+        etat_T.index = pd.to_datetime(etat_T.index)
+        return etat_T.T
+
+    def dividends(self, ticker):
+        self._compter("dividends")
+        chemin = self._chemin(ticker, "dividends")
+        if self.source is not None:
+            divs = self.source.dividends(ticker)
+            self._ecrire_table(chemin, divs.to_frame("Dividends"))
+            return divs
+        return self._lire_table(chemin)["Dividends"]
+
+    def search(self, query):
+        self._compter("search")
+        chemin = self.dossier / "_recherche" / _slug(query)
+        if self.source is not None:
+            resultats = self.source.search(query)
+            self._ecrire_json(chemin, resultats)
+            return resultats
+        return self._lire_json(chemin)
+
+
+# -----------------------------------
+# --- FOURNISSEUR DE L'APPLICATION ---
+# -----------------------------------
+_fournisseur = None
+_verrou_fournisseur = threading.Lock()
+
+def get_fournisseur():
+    """Fournisseur unique par processus, choisi par la variable d'environnement DASHBOARD_FOURNISSEUR."""
+    global _fournisseur
+    with _verrou_fournisseur:
+        if _fournisseur is None:
+            mode = os.environ.get("DASHBOARD_FOURNISSEUR", "yahoo").lower()
+            if mode == "rejeu":
+                _fournisseur = FournisseurRejeu()
+            elif mode == "enregistrement":
+                _fournisseur = FournisseurRejeu(source=FournisseurYahoo())
+            else:
+                _fournisseur = FournisseurYahoo()
+        return _fournisseur
+
+def set_fournisseur(fournisseur):
+    """Remplace le fournisseur de l'application (benchmarks, tests de charge...)."""
+    global _fournisseur
+    with _verrou_fournisseur:
+        _fournisseur = fournisseur
+
+
+# ------------------------------------------
+# --- CAPTURE DE FIXTURES POUR LE REJEU ---
+# ------------------------------------------
+def enregistrer_ticker(ticker, dossier=DOSSIER_FIXTURES, source=None, period="10y"):
+    """
+    Capture toutes les données d'un ticker (info, historique, 6 états financiers, dividendes)
+    dans `dossier`, pour pouvoir les rejouer ensuite avec FournisseurRejeu.
+    """
+    enregistreur = FournisseurRejeu(dossier, source=source or FournisseurYahoo())
+    enregistreur.info(ticker)
+    enregistreur.history(ticker, period=period, auto_adjust=True)
+    for nom in ETATS_FINANCIERS:
+        enregistreur.statement(ticker, nom)
+    enregistreur.dividends(ticker)
+    return enregistreur.appels
@@ -10,11 +10,8 @@ import streamlit as st
 # -------------------------------------------
 # --- 00.2 - Importation de nos fonctions ---
 # -------------------------------------------
-from utils.Styles import style_CSS
 from utils.Glossaire.Glossaire_Data import GLOSSARY
 
-style_CSS()
-
 # ---------------------------------------------------------------------------------------------------------------------------------
 # --- Création de notre fonction qui permet d'afficher notre glossaire en fonction d'un dictionnaire de données donné en entrée ---
 # ---------------------------------------------------------------------------------------------------------------------------------
@@ -2,19 +2,120 @@
 # --- Création des graphiques ---
 # -------------------------------
 
+import functools
+import math
+import os
+
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.Croissance import CAGR_OK, LIBELLES_DRAPEAUX
+from utils.Mesures import mesure
 
 """
 
 Sommaire des graphiques ajoutés : 
 
+    - theme : thème Plotly du dashboard (fond transparent), enregistré une seule fois dans plotly.io.templates
+    - FigureFigee : figure mémorisée et partagée, dont le dict / JSON n'est calculé qu'une fois
     - create_gauge : Crée une jauge semi-circulaire avec un design sombre, un arc coloré et un effet de halo
+    - create_bar_chart : graphique en barres style 'Carte' (4 années + LTM, CAGR dans le titre)
+    - sous_echantillonner : réduit une longue série à quelques milliers de points (min / max de chaque intervalle)
+    - create_line_chart : courbes (séries temporelles) sous-échantillonnées, style sombre
+
+    Jauges et barres : même entrée -> même objet figure (cache LRU), construit en copiant un squelette
+    (mise en page et trace déjà validées par Plotly) dont on ne change que les valeurs et les couleurs.
+    Les figures renvoyées sont partagées entre sessions : ne pas les modifier (copier avec go.Figure(fig) si besoin).
 
 """
 
+# ----------------------
+# --- Thème commun ---
+# ----------------------
+NOM_THEME = "dashboard_sombre"
+THEME_SOMBRE = dict(
+    paper_bgcolor="rgba(0,0,0,0)", # Fond transparent
+    plot_bgcolor="rgba(0,0,0,0)",
+)
+TAILLE_CACHE_FIGURES = int(os.environ.get("DASHBOARD_CACHE_FIGURES", 256)) # Figures mémorisées par type de graphique
+
+
+def theme():
+    """
+    Nom du thème du dashboard, enregistré au premier appel. Le thème par défaut (celui de Streamlit) est recopié
+    en entier dans chaque figure (~4 Ko de JSON) : le nôtre ne contient que quelques propriétés.
+    """
+    if NOM_THEME not in pio.templates:
+        pio.templates[NOM_THEME] = go.layout.Template(layout=THEME_SOMBRE)
+    return NOM_THEME
+
+
+class FigureFigee(go.Figure):
+    """
+    Figure mémorisée : to_dict() (appelé par st.plotly_chart) et to_json() ne sont calculés qu'au premier appel.
+    Ne pas la modifier après l'affichage : le dict mémorisé ne serait pas mis à jour.
+    """
+    _dict_fige = None
+    _json_fige = None
+
+    def to_dict(self):
+        if self._dict_fige is None:
+            self._dict_fige = super().to_dict()
+        return self._dict_fige
+
+    def to_json(self, *args, **kwargs):
+        if args or kwargs:
+            return super().to_json(*args, **kwargs)
+        if self._json_fige is None:
+            self._json_fige = super().to_json()
+        return self._json_fige
+
+
+def _cle(valeur):
+    """NaN -> None : NaN != NaN, une clé de cache contenant un NaN ne serait jamais retrouvée."""
+    return None if isinstance(valeur, float) and math.isnan(valeur) else valeur
+
+
 # ------------------------
 # --- Jauge de données ---
 # ------------------------
+# Initialisation des couleurs 
+COLORS = {
+    "good": "#37C36C",   # Vert
+    "mid":  "#FACF3D",   # Jaune
+    "bad":  "#EA424B"    # Rouge
+}
+
+
+@functools.cache
+def _squelette_jauge():
+    """Jauge sans valeur : mise en page et trace validées une seule fois."""
+    return go.Figure(
+        go.Indicator(
+            mode="gauge+number",
+            gauge={
+                "shape": "angular",
+                "bar": {"thickness": 1.0},
+                "bgcolor": "#1E222D",
+                "axis": {"visible": False} # Désactivation de l'affichage de l'axe de la jauge
+            }
+        ),
+        layout=dict(template=theme(), **THEME_SOMBRE, margin=dict(l=0, r=0, t=0, b=0), height=60),
+    )
+
+
+@functools.lru_cache(maxsize=TAILLE_CACHE_FIGURES)
+def _figure_jauge(value, color, min_val, max_val):
+    fig = FigureFigee(_squelette_jauge())
+    indicateur = fig.data[0]
+    indicateur.value = value
+    indicateur.gauge.bar.color = color
+    indicateur.gauge.axis.range = [min_val, max_val] # Plage des axes de la jauge
+    return fig
+
+
+@mesure("figures.jauge")
 def create_gauge(value, title, min_val, max_val, thresholds, metric_mode="higher_is_better", suffix="" ):
     """
     thresholds (seuils) : important pour inverser ou non les couleurs en fonction de la métrique utilisée
@@ -22,13 +123,6 @@ def create_gauge(value, title, min_val, max_val, thresholds, metric_mode="higher
         "lower_is_better" → plus c’est bas, mieux c’est (PER, drawdown, volatilité…)
         "range_optimal" → une zone optimale (RSI, marge cible…)
     """
-    # Initialisation des couleurs 
-    COLORS = {
-        "good": "#37C36C",   # Vert
-        "mid":  "#FACF3D",   # Jaune
-        "bad":  "#EA424B"    # Rouge
-    }
-
     # Détermination de la couleur en fonction du paramètre entrée dans la fonction
     if metric_mode == "higher_is_better":
         if value < thresholds[0]:
@@ -57,22 +151,114 @@ def create_gauge(value, title, min_val, max_val, thresholds, metric_mode="higher
     else:
         raise ValueError("metric_mode inconnu")
 
-    # Création de la jauge
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=value,
-        gauge={
-            "shape": "angular",
-            "bar": {"color": color, "thickness": 1.0},
-            "bgcolor": "#1E222D",
-            "axis": {"range": [min_val, max_val], "visible": False} # Création de la plage des axes de la jauge + désactivation de l'affichage
-        }
-    ))
-    fig.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        margin=dict(l=0, r=0, t=0, b=0),
-        height=60
+    # Création de la jauge (ou figure déjà construite pour les mêmes valeurs)
+    return _figure_jauge(_cle(value), color, min_val, max_val), color
+
+
+# --------------------------------
+# --- Barres (style 'Carte') ---
+# --------------------------------
+@functools.cache
+def _squelette_barres():
+    return go.Figure(
+        go.Bar(textposition='auto'),
+        layout=dict(
+            template=theme(),
+            **THEME_SOMBRE,
+            title=dict(font=dict(size=20)),
+            margin=dict(l=10, r=10, t=50, b=10),
+            height=250,
+            yaxis=dict(showgrid=False, visible=False), # On cache l'axe Y pour faire propre
+            xaxis=dict(showgrid=False),
+            dragmode=False
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=TAILLE_CACHE_FIGURES)
+def _figure_barres(title, dates, values, cagr, color, drapeau):
+    # Couleur du CAGR (Vert si positif, Rouge si négatif, Gris si non calculable)
+    if cagr is None:
+        cagr_color = "#B2B5BE"
+        cagr_txt = f"N/A ({LIBELLES_DRAPEAUX.get(drapeau) or 'non calculable'})"
+    else:
+        cagr_color = "#4CAF50" if cagr >= 0 else "#FF5252"
+        cagr_txt = f"+{cagr:.1%}" if cagr >= 0 else f"{cagr:.1%}"
+
+    fig = FigureFigee(_squelette_barres())
+    fig.data[0].update(
+        x=dates,
+        y=[np.nan if v is None else v for v in values],
+        marker_color=color,
+        text=["" if v is None else f"{v/1e9:.1f}" if abs(v) > 1e9 else f"{v:.2f}" for v in values], # Texte sur les barres
     )
+    fig.layout.title.text = f"<b>{title}</b> <br><span style='font-size:14px; color:{cagr_color};'>CAGR 5 ans: {cagr_txt}</span>"
+    return fig
 
-    return fig, color
+
+@mesure("figures.barres")
+def create_bar_chart(title, dates, values, cagr, color, unit="Mds $", drapeau=CAGR_OK):
+    """Crée le graphique Plotly style 'Carte'"""
+    return _figure_barres(title, tuple(dates), tuple(_cle(float(v)) for v in values), _cle(float(cagr)), color, int(drapeau))
+
+
+# -------------------------------------
+# --- Sous-échantillonnage (affichage) ---
+# -------------------------------------
+MAX_POINTS = 2000 # Au-delà, 30 ans de cours journaliers enverraient des Mo de JSON au navigateur
+
+def sous_echantillonner(serie, max_points=MAX_POINTS):
+    """
+    Garde au plus ~max_points points : la série est découpée en intervalles de même taille et l'on garde,
+    dans chacun, le point le plus bas et le plus haut (les pics et les creux restent visibles), + le premier et le dernier.
+    Entièrement vectorisé (une matrice intervalles x taille, argmin / argmax par ligne).
+    """
+    serie = serie.dropna()
+    n = len(serie)
+    if n <= max_points:
+        return serie
+    taille = int(np.ceil(n / (max_points // 2)))
+    nb_intervalles = int(np.ceil(n / taille))
+    valeurs = np.full(nb_intervalles * taille, np.nan)
+    valeurs[:n] = serie.to_numpy(dtype=float)
+    blocs = valeurs.reshape(nb_intervalles, taille)
+    debut_blocs = np.arange(nb_intervalles) * taille
+    positions = np.concatenate([
+        debut_blocs + np.nanargmin(blocs, axis=1),
+        debut_blocs + np.nanargmax(blocs, axis=1),
+        [0, n - 1],
+    ])
+    return serie.iloc[np.unique(positions)]
+
+
+# ---------------------------------
+# --- Courbes (séries temporelles) ---
+# ---------------------------------
+@mesure("figures.courbe")
+def create_line_chart(series, title="", suffix="", height=320, max_points=MAX_POINTS):
+    """
+    series : {libellé: pd.Series (index = dates)}. Chaque série est sous-échantillonnée avant d'être tracée.
+    """
+    traces = []
+    for nom, serie in series.items():
+        reduite = sous_echantillonner(serie, max_points)
+        traces.append(go.Scatter(
+            x=reduite.index,
+            y=reduite.to_numpy(),
+            mode="lines",
+            name=nom,
+            line=dict(width=1.5),
+            hovertemplate=f"%{{y:.2f}}{suffix}<extra>{nom}</extra>",
+        ))
+    # Mise en page passée au constructeur (update_layout après coup revalide tout le layout)
+    return go.Figure(traces, layout=dict(
+        template=theme(),
+        **THEME_SOMBRE,
+        title=dict(text=f"<b>{title}</b>", font=dict(size=16)) if title else None,
+        margin=dict(l=10, r=10, t=40 if title else 10, b=10),
+        height=height,
+        hovermode="x unified",
+        legend=dict(orientation="h", y=-0.15),
+        xaxis=dict(showgrid=False),
+        yaxis=dict(gridcolor="#2A2E39"),
+    ))
@@ -2,14 +2,18 @@
 # --- Création de nos indicateurs et KPI ---
 # ------------------------------------------
 import datetime
+import numpy as np
 import pandas as pd
 
+from utils.Mesures import mesure
+
 """
 
 Sommaire des indicateurs : 
 
-    - calculate_rsi : RSI (14 jours)
+    - calculate_rsi : RSI (14 jours), moyenne simple ou lissage de Wilder
     - calculate_ytd_performance : calcule la variation en % par rapport à la FERMETURE de l'année N-1
+    - calculate_universe_performance : YTD, MTD, 1 an et depuis l'IPO de tout un univers de tickers (vectorisé)
 
 """
 
@@ -17,7 +21,13 @@ Sommaire des indicateurs :
 # -----------
 # --- RSI ---
 # -----------
-def calculate_rsi(data, window=14):
+@mesure("indicateurs.rsi")
+def calculate_rsi(data, window=14, method="simple"):
+    """
+    method="simple" : moyenne mobile simple des gains et des pertes (comportement historique)
+    method="wilder" : lissage de Wilder (1ère moyenne simple sur la fenêtre, puis moy = (moy * (n-1) + valeur) / n)
+    Pour les mises à jour en temps réel, voir RSIFlux (utils.Indicateurs_Flux) qui donne les mêmes valeurs en O(1).
+    """
     # 1. Calculer la variation de prix par rapport à la veille
     delta = data.diff()
 
@@ -32,6 +42,20 @@ def calculate_rsi(data, window=14):
     avg_gain = gain.rolling(window=window).mean()
     avg_loss = loss.rolling(window=window).mean()
 
+    if method == "wilder":
+        # Lissage de Wilder = moyenne exponentielle (alpha = 1/n) qui démarre sur la 1ère moyenne simple
+        def wilder(serie, moyenne_simple):
+            depart = moyenne_simple.first_valid_index()
+            if depart is None:
+                return moyenne_simple
+            suite = serie.loc[depart:].copy()
+            suite.iloc[0] = moyenne_simple.loc[depart]
+            return suite.ewm(alpha=1 / window, adjust=False).mean().reindex(serie.index)
+        avg_gain = wilder(gain, avg_gain)
+        avg_loss = wilder(loss, avg_loss)
+    elif method != "simple":
+        raise ValueError("method inconnue")
+
     # 4. Calculer le RS (Relative Strength)
     rs = avg_gain / avg_loss
 
@@ -44,10 +68,12 @@ def calculate_rsi(data, window=14):
 # -----------
 # --- YTD ---
 # -----------
-def calculate_ytd_performance(stock_object, current_price):
+@mesure("indicateurs.ytd")
+def calculate_ytd_performance(snapshot, current_price):
     """
     Calcule la variation en % par rapport à la FERMETURE de l'année N-1.
     Standard financier pour le calcul YTD.
+    L'historique (depuis le 20 décembre N-1) est déjà chargé dans le FinancialSnapshot.
     """
     try:
         # 1. Identifier les années
@@ -55,13 +81,10 @@ def calculate_ytd_performance(stock_object, current_price):
         current_year = today.year
         prev_year = current_year - 1
         
-        # 2. On récupère un petit historique commençant fin de l'année d'avant
-        # On prend large (20 décembre) pour être sûr d'avoir le dernier jour de bourse
-        # même s'il y a des vacances ou des week-ends.
-        start_date = f"{prev_year}-12-20"
-        
-        # On charge l'historique
-        hist = stock_object.history(start=start_date, auto_adjust=True)
+        # 2. On récupère l'historique du snapshot, qui commence fin de l'année d'avant
+        # (on prend large : 20 décembre, pour être sûr d'avoir le dernier jour de bourse
+        # même s'il y a des vacances ou des week-ends).
+        hist = snapshot.history
         
         if hist.empty:
             return 0.0
@@ -88,74 +111,94 @@ def calculate_ytd_performance(stock_object, current_price):
     except Exception as e:
         print(f"Erreur calcul YTD : {e}")
         return 0.0
-    
 
+
+# ----------------------------------------------
+# --- PERFORMANCES D'UN UNIVERS (VECTORISÉ) ---
+# ----------------------------------------------
+# Codes renvoyés à la place d'un 0 silencieux quand une performance ne peut pas être calculée
+RAISONS_PERFORMANCE = {
+    "": "OK",
+    "ipo": "Introduction en bourse pendant la période : référence = premier cours disponible",
+    "historique_court": "Cours téléchargés à partir d'une date postérieure au début de la période",
+    "sans_donnees": "Aucun cours pour ce ticker",
+    "sans_cours_actuel": "Pas de cours actuel",
+    "reference_invalide": "Cours de référence nul ou négatif",
+}
+
+def calculate_universe_performance(prices, current_prices=None, today=None):
     """
-    Calcule le NOPAT (Net Operating Profit After Tax) en utilisant la méthode précise :
-    Tax Rate = Tax Provision / Pretax Income.
-    
-    Retourne : 
-    - current_nopat (float) : Le NOPAT de la dernière année disponible
-    - nopat_history (pd.Series) : L'historique complet (Index=Date, Value=NOPAT)
+    Performances YTD, MTD, 1 an et depuis l'IPO (en %) de chaque colonne d'une matrice de prix (dates x tickers),
+    en une seule passe NumPy (aucune boucle sur les tickers).
+    - Référence YTD : dernière clôture de l'année N-1 (même règle que calculate_ytd_performance)
+    - Référence MTD : dernière clôture du mois précédent
+    - Référence 1 an : dernière clôture à J-1 an
+    - Si le ticker n'existait pas encore à la date de référence (IPO), on prend son premier cours disponible.
+      IPO = premier cours du ticker postérieur au début de la matrice ; un ticker coté dès la première ligne
+      d'une matrice qui commence après la date de référence n'a pas de référence ("historique_court", NaN).
+    current_prices (optionnel) : Series ticker -> cours actuel (sinon : dernière clôture connue).
+
+    Retourne : (performances, raisons), deux DataFrames (index = tickers, colonnes = YTD, MTD, 1Y, IPO).
+    Une performance impossible à calculer vaut NaN et sa raison est renseignée (voir RAISONS_PERFORMANCE).
     """
-    try:
-        # 1. On transpose immédiatement (.T) pour avoir les Dates en Index et les Métriques en Colonnes
-        # C'est ta méthode, beaucoup plus propre pour les calculs vectoriels
-        fin_T = stock.financials.T
-        
-        # Vérification minimale : est-ce qu'on a des données ?
-        if fin_T.empty:
-            return 0, pd.Series()
-
-        # ---------------------------------------------------------
-        # A. CALCUL DU TAUX D'IMPOSITION (Ta méthode précise)
-        # ---------------------------------------------------------
-        # On vérifie si les colonnes nécessaires existent
-        if 'Pretax Income' in fin_T.columns and 'Tax Provision' in fin_T.columns:
-            # Calcul du taux réel
-            fin_T['Effective Tax Rate'] = fin_T['Tax Provision'] / fin_T['Pretax Income']
-            
-            # NETTOYAGE DES VALEURS ABERRANTES :
-            # Parfois le taux est infini (div par 0) ou négatif (crédit d'impôt exceptionnel)
-            # Pour un ROIC cohérent sur le long terme, on "borne" le taux entre 0% et 50%
-            # Si c'est hors bornes, on applique le taux par défaut.
-            fin_T['Effective Tax Rate'] = fin_T['Effective Tax Rate'].apply(
-                lambda x: default_tax_rate if (pd.isna(x) or x < 0 or x > 0.50) else x
-            )
-        else:
-            # Si colonnes manquantes, on utilise le taux par défaut
-            fin_T['Effective Tax Rate'] = default_tax_rate
-
-        # ---------------------------------------------------------
-        # B. RÉCUPERATION DE L'EBIT
-        # ---------------------------------------------------------
-        if 'EBIT' in fin_T.columns:
-            fin_T['EBIT_Clean'] = fin_T['EBIT']
-        elif 'Pretax Income' in fin_T.columns and 'Interest Expense' in fin_T.columns:
-            # Reconstruction : EBIT = Pretax + Interest (on prend la valeur absolue des intérêts)
-            # fillna(0) est important si Interest Expense est vide par endroits
-            fin_T['EBIT_Clean'] = fin_T['Pretax Income'] + fin_T['Interest Expense'].fillna(0).abs()
-        else:
-            # Impossible de calculer sans EBIT
-            return 0, pd.Series()
-
-        # ---------------------------------------------------------
-        # C. CALCUL FINAL DU NOPAT
-        # Formule : EBIT * (1 - Tax Rate)
-        # ---------------------------------------------------------
-        fin_T['NOPAT'] = fin_T['EBIT_Clean'] * (1 - fin_T['Effective Tax Rate'])
-        
-        # Le DataFrame est trié du plus récent au plus ancien par défaut chez Yahoo
-        # current_nopat est la première ligne (iloc[0])
-        current_nopat = fin_T['NOPAT'].iloc[0]
-        
-        # nopat_history est la série complète. 
-        # Important : Les index sont des Dates, ce qui est compatible avec Onglet_Finance.py
-        nopat_history = fin_T['NOPAT']
-
-        return current_nopat, nopat_history
-
-    except Exception as e:
-        print(f"Erreur dans le calcul du NOPAT : {e}")
-        # En cas de crash, on retourne 0 pour ne pas casser l'app
-        return 0, pd.Series()
\ No newline at end of file
+    colonnes = ["YTD", "MTD", "1Y", "IPO"]
+    tickers = prices.columns
+    if prices.empty:
+        return (pd.DataFrame(np.nan, index=tickers, columns=colonnes),
+                pd.DataFrame("sans_donnees", index=tickers, columns=colonnes))
+
+    today = pd.Timestamp(today or datetime.date.today())
+    dates = prices.index.tz_localize(None) if prices.index.tz is not None else prices.index
+    dates = dates.values
+    P = prices.to_numpy(dtype=float)
+    nb_dates, nb_tickers = P.shape
+    col = np.arange(nb_tickers)
+
+    # 1. Report de la dernière valeur connue (ffill) en NumPy : indice de la dernière ligne valide par colonne
+    valide = ~np.isnan(P)
+    derniere_ligne = np.where(valide, np.arange(nb_dates)[:, None], -1)
+    np.maximum.accumulate(derniere_ligne, axis=0, out=derniere_ligne)
+    P_ffill = np.where(derniere_ligne >= 0, P[np.maximum(derniere_ligne, 0), col], np.nan)
+
+    # 2. Premier cours (IPO) et cours actuel
+    a_des_donnees = valide.any(axis=0)
+    premiere_ligne = valide.argmax(axis=0)
+    premier_prix = np.where(a_des_donnees, P[premiere_ligne, col], np.nan)
+    introduit = a_des_donnees & (premiere_ligne > 0) # Premier cours après le début de la matrice
+    actuel = P_ffill[-1]
+    if current_prices is not None:
+        courant = pd.Series(current_prices, dtype=float).reindex(tickers).to_numpy()
+        actuel = np.where(np.isnan(courant), actuel, courant)
+
+    # 3. Ligne de référence de chaque période (dernière séance AVANT le début de la période)
+    debuts = {
+        "YTD": (pd.Timestamp(today.year, 1, 1), "left"),
+        "MTD": (pd.Timestamp(today.year, today.month, 1), "left"),
+        "1Y": (today - pd.DateOffset(years=1), "right"),
+    }
+    references, ipo, court = {}, {}, {}
+    for nom, (debut, cote) in debuts.items():
+        ligne = np.searchsorted(dates, np.datetime64(debut), side=cote) - 1
+        ref = P_ffill[ligne] if ligne >= 0 else np.full(nb_tickers, np.nan)
+        sans_reference = np.isnan(ref) & a_des_donnees
+        ipo[nom] = sans_reference & introduit
+        court[nom] = sans_reference & ~introduit # Coté dès la 1re ligne : c'est la matrice qui commence trop tard
+        references[nom] = np.where(ipo[nom], premier_prix, ref)
+    references["IPO"] = premier_prix
+    ipo["IPO"] = court["IPO"] = np.zeros(nb_tickers, dtype=bool)
+
+    # 4. Calcul de toutes les performances à la fois + codes raison
+    ref = np.column_stack([references[c] for c in colonnes])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        perf = (actuel[:, None] - ref) / ref * 100
+
+    raisons = np.full(perf.shape, "", dtype=object)
+    raisons[np.column_stack([ipo[c] for c in colonnes])] = "ipo"
+    raisons[~(ref > 0)] = "reference_invalide"
+    raisons[np.column_stack([court[c] for c in colonnes])] = "historique_court" # Référence absente, et non invalide
+    raisons[np.isnan(actuel)] = "sans_cours_actuel"
+    raisons[~a_des_donnees] = "sans_donnees"
+    perf[~np.isin(raisons, ["", "ipo"])] = np.nan
+
+    return (pd.DataFrame(perf, index=tickers, columns=colonnes),
+            pd.DataFrame(raisons, index=tickers, columns=colonnes))
@@ -0,0 +1,243 @@
+# ----------------------------------------------------------
+# --- Indicateurs techniques en flux (mise à jour en O(1)) ---
+# ----------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - SMAFlux : moyenne mobile simple
+    - EMAFlux : moyenne mobile exponentielle (même convention que pandas ewm(span, adjust=False))
+    - RSIFlux : RSI, lissage "simple" (comme calculate_rsi) ou "wilder"
+    - MACDFlux : MACD (EMA 12 - EMA 26), signal (EMA 9) et histogramme
+    - BollingerFlux : bandes de Bollinger (SMA 20 +/- 2 écarts-types)
+    - MoteurIndicateurs : garde l'état de chaque indicateur par ticker
+
+    Chaque indicateur garde un petit état (dernière clôture, sommes glissantes, moyennes...) :
+    l'arrivée d'une nouvelle barre coûte O(1) au lieu de recalculer des années d'historique.
+    annuler() défait la dernière barre ajoutée à partir d'un petit enregistrement (valeur sortie de la fenêtre,
+    anciens scalaires) : c'est ce qui permet de remplacer la dernière barre lors d'un rafraîchissement intraday.
+    Amorcé avec l'historique, il donne les mêmes valeurs qu'un recalcul complet (calculate_rsi, rolling, ewm).
+
+"""
+
+import math
+from collections import deque
+
+
+# ------------------------------
+# --- Moyenne mobile simple ---
+# ------------------------------
+class SMAFlux:
+    def __init__(self, window=20):
+        self.window = window
+        self.fenetre = deque(maxlen=window)
+        self.somme = 0.0
+        self.valeur = math.nan
+        self._annulation = None # (valeur sortie de la fenêtre ou None, somme, valeur) avant la dernière barre
+
+    def ajouter(self, x):
+        sortie = self.fenetre[0] if len(self.fenetre) == self.window else None
+        self._annulation = (sortie, self.somme, self.valeur)
+        if sortie is not None:
+            self.somme -= sortie
+        self.fenetre.append(x)
+        self.somme += x
+        self.valeur = self.somme / self.window if len(self.fenetre) == self.window else math.nan
+        return self.valeur
+
+    def annuler(self):
+        sortie, self.somme, self.valeur = self._annulation
+        self.fenetre.pop()
+        if sortie is not None:
+            self.fenetre.appendleft(sortie)
+        self._annulation = None
+
+
+# -----------------------------------
+# --- Moyenne mobile exponentielle ---
+# -----------------------------------
+class EMAFlux:
+    def __init__(self, span=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.valeur = math.nan
+        self._annulation = None
+
+    def ajouter(self, x):
+        self._annulation = self.valeur
+        # Même convention que pandas ewm(adjust=False) : la première valeur sert de point de départ
+        self.valeur = x if math.isnan(self.valeur) else self.valeur + self.alpha * (x - self.valeur)
+        return self.valeur
+
+    def annuler(self):
+        self.valeur, self._annulation = self._annulation, None
+
+
+# -----------
+# --- RSI ---
+# -----------
+class RSIFlux:
+    """
+    lissage="simple" : moyenne simple des gains/pertes sur la fenêtre (identique à calculate_rsi)
+    lissage="wilder" : moyenne de Wilder (1ère moyenne simple, puis moy = (moy * (n-1) + valeur) / n)
+    """
+    def __init__(self, window=14, lissage="simple"):
+        if lissage not in ("simple", "wilder"):
+            raise ValueError("lissage inconnu")
+        self.window = window
+        self.lissage = lissage
+        self.derniere_cloture = None
+        self.gains = SMAFlux(window)
+        self.pertes = SMAFlux(window)
+        self.moy_gain = math.nan
+        self.moy_perte = math.nan
+        self.valeur = math.nan
+        self._annulation = None
+
+    def ajouter(self, cloture):
+        # 1ère barre : pas de variation, comptée comme gain = perte = 0 (comme delta.where(...) dans calculate_rsi)
+        delta = 0.0 if self.derniere_cloture is None else cloture - self.derniere_cloture
+        wilder = self.lissage == "wilder" and not math.isnan(self.moy_gain)
+        self._annulation = (self.derniere_cloture, self.moy_gain, self.moy_perte, self.valeur, not wilder)
+        self.derniere_cloture = cloture
+        gain, perte = max(delta, 0.0), max(-delta, 0.0)
+
+        if wilder:
+            n = self.window
+            self.moy_gain = (self.moy_gain * (n - 1) + gain) / n
+            self.moy_perte = (self.moy_perte * (n - 1) + perte) / n
+        else:
+            self.moy_gain = self.gains.ajouter(gain)
+            self.moy_perte = self.pertes.ajouter(perte)
+
+        if math.isnan(self.moy_gain):
+            self.valeur = math.nan
+        elif self.moy_perte == 0:
+            self.valeur = 100.0 if self.moy_gain > 0 else math.nan # Même résultat que 100 - 100 / (1 + inf)
+        else:
+            self.valeur = 100 - (100 / (1 + self.moy_gain / self.moy_perte))
+        return self.valeur
+
+    def annuler(self):
+        self.derniere_cloture, self.moy_gain, self.moy_perte, self.valeur, moyennes_simples = self._annulation
+        if moyennes_simples:
+            self.gains.annuler()
+            self.pertes.annuler()
+        self._annulation = None
+
+
+# ------------
+# --- MACD ---
+# ------------
+class MACDFlux:
+    def __init__(self, rapide=12, lente=26, signal=9):
+        self.ema_rapide = EMAFlux(span=rapide)
+        self.ema_lente = EMAFlux(span=lente)
+        self.ema_signal = EMAFlux(span=signal)
+        self.valeur = (math.nan, math.nan, math.nan)
+        self._annulation = None
+
+    def ajouter(self, cloture):
+        self._annulation = self.valeur
+        macd = self.ema_rapide.ajouter(cloture) - self.ema_lente.ajouter(cloture)
+        signal = self.ema_signal.ajouter(macd)
+        self.valeur = (macd, signal, macd - signal) # (MACD, signal, histogramme)
+        return self.valeur
+
+    def annuler(self):
+        for ema in (self.ema_rapide, self.ema_lente, self.ema_signal):
+            ema.annuler()
+        self.valeur, self._annulation = self._annulation, None
+
+
+# -----------------
+# --- Bollinger ---
+# -----------------
+class BollingerFlux:
+    """
+    Bandes (basse, milieu, haute) avec l'écart-type de l'échantillon (ddof=1, comme pandas rolling.std).
+    Moyenne et écart-type recalculés sur les `window` valeurs de la fenêtre (deux passes, math.fsum) :
+    des sommes courantes de x et x² s'annulent catastrophiquement sur un cours élevé et peu volatil
+    (ex: cours à 5e4, volatilité de 1 %). Coût constant : 20 valeurs, quel que soit l'historique.
+    """
+    def __init__(self, window=20, nb_ecarts=2):
+        self.window = window
+        self.nb_ecarts = nb_ecarts
+        self.fenetre = deque(maxlen=window)
+        self.valeur = (math.nan, math.nan, math.nan)
+        self._annulation = None
+
+    def ajouter(self, x):
+        self._annulation = (self.fenetre[0] if len(self.fenetre) == self.window else None, self.valeur)
+        self.fenetre.append(x)
+        if len(self.fenetre) < self.window:
+            return self.valeur
+        n = self.window
+        moyenne = math.fsum(self.fenetre) / n
+        variance = math.fsum((v - moyenne) ** 2 for v in self.fenetre) / (n - 1)
+        ecart = self.nb_ecarts * math.sqrt(variance)
+        self.valeur = (moyenne - ecart, moyenne, moyenne + ecart)
+        return self.valeur
+
+    def annuler(self):
+        sortie, self.valeur = self._annulation
+        self.fenetre.pop()
+        if sortie is not None:
+            self.fenetre.appendleft(sortie)
+        self._annulation = None
+
+
+# -------------------------------------------
+# --- Moteur : état des indicateurs par ticker ---
+# -------------------------------------------
+def indicateurs_par_defaut():
+    return {
+        "RSI": RSIFlux(14),
+        "RSI_Wilder": RSIFlux(14, lissage="wilder"),
+        "SMA_50": SMAFlux(50),
+        "SMA_200": SMAFlux(200),
+        "EMA_20": EMAFlux(span=20),
+        "MACD": MACDFlux(),
+        "Bollinger": BollingerFlux(),
+    }
+
+
+class MoteurIndicateurs:
+    """
+    Garde, pour chaque ticker, l'état de ses indicateurs.
+        - amorcer(ticker, clotures) : une seule passe sur l'historique (au premier affichage)
+        - mettre_a_jour(ticker, cloture) : nouvelle barre en O(1)
+        - mettre_a_jour(ticker, cloture, nouvelle_barre=False) : rafraîchissement intraday,
+          la dernière barre est remplacée (chaque indicateur l'annule, puis ajoute la nouvelle clôture) : O(1) aussi
+    """
+
+    def __init__(self, fabrique=indicateurs_par_defaut):
+        self.fabrique = fabrique
+        self.etats = {} # ticker -> {"indicateurs": {...}, "barres": nombre de barres ajoutées}
+
+    def amorcer(self, ticker, clotures):
+        indicateurs = self.fabrique()
+        valeurs = [float(c) for c in clotures if c == c] # on ignore les NaN
+        for cloture in valeurs:
+            for indicateur in indicateurs.values():
+                indicateur.ajouter(cloture)
+        self.etats[ticker] = {"indicateurs": indicateurs, "barres": len(valeurs)}
+        return self.valeurs(ticker)
+
+    def mettre_a_jour(self, ticker, cloture, nouvelle_barre=True):
+        if ticker not in self.etats:
+            return self.amorcer(ticker, [cloture])
+        etat = self.etats[ticker]
+
+        remplacer = not nouvelle_barre and etat["barres"] > 0
+        for indicateur in etat["indicateurs"].values():
+            if remplacer:
+                indicateur.annuler()
+            indicateur.ajouter(float(cloture))
+        if not remplacer:
+            etat["barres"] += 1
+        return self.valeurs(ticker)
+
+    def valeurs(self, ticker):
+        """Dernière valeur de chaque indicateur du ticker."""
+        return {nom: indicateur.valeur for nom, indicateur in self.etats[ticker]["indicateurs"].items()}
@@ -0,0 +1,262 @@
+# -------------------------------------------------------------
+# --- Mesures : temps par étape, nombre d'appels, taux de cache ---
+# -------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - mesure : décorateur qui chronomètre une fonction (ex: @mesure("indicateurs.calculate_rsi"))
+    - chrono : même chose pour un bloc de code (with chrono("fournisseur.info"): ...)
+    - Mesures : registre du processus (histogramme des durées par étape, appels, erreurs)
+        - activer / actif : les mesures sont coupées par défaut (DASHBOARD_MESURES=1 pour les activer au démarrage) ;
+          coupées, une fonction mesurée ne coûte qu'un test de booléen
+        - stats : par étape -> appels, erreurs, durée totale, quantiles p50 / p95 / p99 (estimés sur l'histogramme)
+        - openmetrics / jsonl : export (texte OpenMetrics pour Prometheus, ou une ligne JSON par étape)
+    - indicateurs_caches : taux de hits des caches (données, figures) et état du fournisseur (regroupements, disjoncteur)
+    - get_mesures : registre partagé
+
+    Étapes mesurées : appels au fournisseur (fournisseur.<donnée>), indicateurs (RSI, YTD, CAGR/LTM),
+    figures (jauges, barres, courbes) et mise en forme des tableaux. Affichage : utils.Panneau_Mesures.
+
+"""
+
+import bisect
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+# Bornes des intervalles de l'histogramme (secondes) : de 0,1 ms à 10 s
+BORNES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIXE_OPENMETRICS = "dashboard"
+
+
+class _Histogramme:
+    __slots__ = ("intervalles", "somme", "nombre", "erreurs", "maximum")
+
+    def __init__(self):
+        self.intervalles = [0] * (len(BORNES) + 1) # Dernier intervalle : au-delà de la plus grande borne
+        self.somme = 0.0
+        self.nombre = 0
+        self.erreurs = 0
+        self.maximum = 0.0
+
+    def quantile(self, q):
+        """Quantile estimé : borne haute de l'intervalle qui le contient (le maximum observé pour le dernier)."""
+        if not self.nombre:
+            return float("nan")
+        rang = q * self.nombre
+        cumul = 0
+        for i, n in enumerate(self.intervalles):
+            cumul += n
+            if cumul >= rang and n:
+                return min(BORNES[i], self.maximum) if i < len(BORNES) else self.maximum
+        return self.maximum
+
+
+class Mesures:
+
+    def __init__(self, actif=False):
+        self.actif = actif
+        self._verrou = threading.Lock()
+        self._histogrammes = {} # étape -> _Histogramme
+        self.compteurs = Counter() # compteurs libres (ex: "cache.perimees_servies")
+        self.depuis = time.time()
+
+    def activer(self, actif=True):
+        self.actif = actif
+
+    def reinitialiser(self):
+        with self._verrou:
+            self._histogrammes.clear()
+            self.compteurs.clear()
+            self.depuis = time.time()
+
+    def enregistrer(self, etape, duree, erreur=False):
+        with self._verrou:
+            histogramme = self._histogrammes.get(etape)
+            if histogramme is None:
+                histogramme = self._histogrammes[etape] = _Histogramme()
+            histogramme.intervalles[bisect.bisect_left(BORNES, duree)] += 1
+            histogramme.somme += duree
+            histogramme.nombre += 1
+            histogramme.maximum = max(histogramme.maximum, duree)
+            if erreur:
+                histogramme.erreurs += 1
+
+    def compter(self, nom, n=1):
+        if self.actif:
+            with self._verrou:
+                self.compteurs[nom] += n
+
+    # --- Lecture ---
+    def stats(self):
+        """{étape: {appels, erreurs, total_ms, moyenne_ms, p50_ms, p95_ms, p99_ms, max_ms}}, triées par temps total décroissant."""
+        with self._verrou:
+            resultats = {
+                etape: {
+                    "appels": h.nombre,
+                    "erreurs": h.erreurs,
+                    "total_ms": h.somme * 1000,
+                    "moyenne_ms": h.somme / h.nombre * 1000 if h.nombre else float("nan"),
+                    "p50_ms": h.quantile(0.50) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                    "p99_ms": h.quantile(0.99) * 1000,
+                    "max_ms": h.maximum * 1000,
+                }
+                for etape, h in self._histogrammes.items()
+            }
+        return dict(sorted(resultats.items(), key=lambda e: -e[1]["total_ms"]))
+
+    def _copie(self):
+        with self._verrou:
+            return ({etape: (list(h.intervalles), h.somme, h.nombre, h.erreurs) for etape, h in self._histogrammes.items()},
+                    dict(self.compteurs))
+
+    # --- Exports ---
+    def openmetrics(self, jauges=None):
+        """
+        Texte OpenMetrics (format d'exposition Prometheus) : histogramme des durées et erreurs par étape,
+        compteurs libres, et jauges (ex: indicateurs_caches()) {nom: valeur}.
+        """
+        histogrammes, compteurs = self._copie()
+        nom = f"{PREFIXE_OPENMETRICS}_duree_secondes"
+        lignes = [f"# TYPE {nom} histogram", f"# HELP {nom} Durée de chaque étape du rendu."]
+        for etape, (intervalles, somme, nombre, _) in sorted(histogrammes.items()):
+            cumul = 0
+            for borne, n in zip(BORNES + (math.inf,), intervalles):
+                cumul += n
+                le = "+Inf" if borne == math.inf else repr(borne)
+                lignes.append(f'{nom}_bucket{{etape="{etape}",le="{le}"}} {cumul}')
+            lignes.append(f'{nom}_count{{etape="{etape}"}} {nombre}')
+            lignes.append(f'{nom}_sum{{etape="{etape}"}} {somme!r}')
+
+        nom = f"{PREFIXE_OPENMETRICS}_erreurs"
+        lignes += [f"# TYPE {nom} counter", f"# HELP {nom} Appels terminés par une exception."]
+        for etape, (_, _, _, erreurs) in sorted(histogrammes.items()):
+            lignes.append(f'{nom}_total{{etape="{etape}"}} {erreurs}')
+
+        if compteurs:
+            nom = f"{PREFIXE_OPENMETRICS}_evenements"
+            lignes.append(f"# TYPE {nom} counter")
+            for compteur, valeur in sorted(compteurs.items()):
+                lignes.append(f'{nom}_total{{nom="{compteur}"}} {valeur}')
+
+        if jauges:
+            nom = f"{PREFIXE_OPENMETRICS}_etat"
+            lignes.append(f"# TYPE {nom} gauge")
+            for jauge, valeur in sorted(jauges.items()):
+                lignes.append(f'{nom}{{nom="{jauge}"}} {float(valeur)!r}')
+        lignes.append("# EOF")
+        return "\n".join(lignes) + "\n"
+
+    def jsonl(self, jauges=None):
+        """Une ligne JSON par étape (+ une pour les compteurs et jauges), horodatée : facile à ajouter à un journal."""
+        maintenant = time.time()
+        histogrammes, compteurs = self._copie()
+        stats = self.stats()
+        lignes = []
+        for etape, (intervalles, somme, nombre, erreurs) in histogrammes.items():
+            lignes.append(json.dumps({
+                "ts": maintenant, "etape": etape, **stats[etape],
+                "intervalles": dict(zip([repr(b) for b in BORNES] + ["+Inf"], intervalles)),
+            }))
+        if compteurs or jauges:
+            lignes.append(json.dumps({"ts": maintenant, "compteurs": compteurs, "jauges": jauges or {}}))
+        return "".join(ligne + "\n" for ligne in lignes)
+
+
+# --------------------------
+# --- INSTANCE PARTAGÉE ---
+# --------------------------
+_mesures = Mesures(actif=os.environ.get("DASHBOARD_MESURES", "0") == "1")
+
+def get_mesures():
+    return _mesures
+
+
+class _ChronoInactif:
+    """Contexte vide, partagé : coût quasi nul quand les mesures sont coupées."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_CHRONO_INACTIF = _ChronoInactif()
+
+
+class _Chrono:
+    __slots__ = ("etape", "debut")
+
+    def __init__(self, etape):
+        self.etape = etape
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, type_erreur, *exc):
+        _mesures.enregistrer(self.etape, time.perf_counter() - self.debut, erreur=type_erreur is not None)
+        return False
+
+
+def chrono(etape):
+    """with chrono("fournisseur.info"): ... (ne fait rien si les mesures sont coupées)."""
+    return _Chrono(etape) if _mesures.actif else _CHRONO_INACTIF
+
+
+def mesure(etape):
+    """Décorateur : chronomètre chaque appel de la fonction sous le nom `etape`."""
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not _mesures.actif:
+                return fonction(*args, **kwargs)
+            debut = time.perf_counter()
+            erreur = True
+            try:
+                resultat = fonction(*args, **kwargs)
+                erreur = False
+                return resultat
+            finally:
+                _mesures.enregistrer(etape, time.perf_counter() - debut, erreur)
+        return enveloppe
+    return decorateur
+
+
+# ----------------------------------
+# --- Caches et fournisseur ---
+# ----------------------------------
+def indicateurs_caches():
+    """
+    Jauges {nom: valeur} : taux de hits du cache des données et des figures, données périmées servies,
+    demandes regroupées, état du disjoncteur (0 = fermé, 1 = ouvert). Lu à la demande (panneau, export).
+    """
+    from utils.Cache_Donnees import get_cache
+    from utils.Graphiques import _figure_barres, _figure_jauge
+
+    cache = get_cache().stats() # Compteurs : clés absentes tant qu'ils sont à zéro
+    jauges = {
+        "cache.taux_hits": cache["taux_hits"],
+        "cache.hits": cache.get("hits", 0),
+        "cache.miss": cache.get("miss", 0),
+        "cache.perimees_servies": cache.get("perimees_servies", 0),
+        "cache.entrees": cache["entrees"],
+        "cache.taille_octets": cache["taille_octets"],
+        "fournisseur.regroupes": cache["appels_uniques"].get("regroupes", 0),
+        "fournisseur.taux_regroupement": cache["appels_uniques"]["taux_regroupement"],
+        "disjoncteur.ouvert": float(cache["disjoncteur"]["etat"] != "fermé"),
+        "disjoncteur.refus": cache["disjoncteur"].get("refus", 0),
+    }
+    for nom, fonction in (("figures.jauges", _figure_jauge), ("figures.barres", _figure_barres)):
+        info = fonction.cache_info()
+        total = info.hits + info.misses
+        jauges[f"{nom}.taux_hits"] = info.hits / total if total else 0.0
+    return jauges
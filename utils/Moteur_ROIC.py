@@ -0,0 +1,172 @@
+# --------------------------------------------------
+# --- Moteur ROIC / NOPAT (vectorisé, multi-tickers) ---
+# --------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - ALIAS_ROIC : noms possibles (selon les actifs) des lignes utilisées par le calcul
+    - preparer_etats : états financiers transposés (dates en lignes) de tous les tickers, empilés, lignes renommées
+    - calculer_roic_lot : taux d'imposition, NOPAT, capital investi et ROIC de TOUTES les périodes en une passe
+    - roic_tickers : historique annuel + trimestriel et résumé (ROIC TTM, dernier exercice) d'un lot de tickers
+    - roic_snapshot : même chose pour un seul ticker (onglet Analyse fondamentale)
+
+    Formules :
+        Taux d'imposition = Impôts / Résultat avant impôts, borné entre 0 % et 50 % (sinon TAUX_IMPOT_DEFAUT)
+        EBIT = EBIT publié, sinon Résultat avant impôts + |Charges d'intérêts|
+        NOPAT = EBIT x (1 - Taux d'imposition)
+        Capital investi = Actif total - Passif courant (sinon Capitaux propres + Dette - Trésorerie)
+        ROIC = NOPAT / Capital investi ; en trimestriel : NOPAT des 4 derniers trimestres (TTM) / Capital investi,
+               NaN si ces 4 trimestres ne sont pas consécutifs (trimestre manquant dans les états publiés)
+
+"""
+
+import numpy as np
+import pandas as pd
+
+TAUX_IMPOT_DEFAUT = 0.21 # Taux utilisé quand le taux effectif est absent ou aberrant (crédit d'impôt, division par 0)
+TAUX_IMPOT_MAX = 0.50
+ECART_TTM_MAX = pd.Timedelta(days=300) # 4 clôtures trimestrielles consécutives : ~9 mois du 1er au 4e trimestre
+
+ALIAS_ROIC = {
+    "ebit": ['EBIT', 'Operating Income', 'OperatingIncome'],
+    "resultat_avant_impots": ['Pretax Income', 'Income Before Tax', 'Pre-Tax Income'],
+    "impots": ['Tax Provision', 'Income Tax Expense', 'Provision for Income Taxes'],
+    "interets": ['Interest Expense', 'Interest Expense Non Operating'],
+    "actif_total": ['Total Assets', 'Assets'],
+    "passif_courant": ['Current Liabilities', 'Total Current Liabilities'],
+    "capitaux_propres": ['Stockholders Equity', 'Total Stockholder Equity'],
+    "dette": ['Total Debt'],
+    "tresorerie": ['Cash And Cash Equivalents', 'Cash Cash Equivalents And Short Term Investments'],
+}
+
+COLONNES_RESULTAT = ["taux_imposition", "ebit_retenu", "nopat", "capital_investi", "roic"]
+
+
+# -------------------------------------
+# --- Préparation des états (transposés) ---
+# -------------------------------------
+def _renommer(etat_T):
+    """Une colonne par clé de ALIAS_ROIC (premier alias trouvé), NaN si la ligne n'existe pas."""
+    colonnes = {}
+    for nom, alias in ALIAS_ROIC.items():
+        trouve = next((a for a in alias if a in etat_T.columns), None)
+        colonnes[nom] = pd.to_numeric(etat_T[trouve], errors="coerce") if trouve else pd.Series(np.nan, index=etat_T.index)
+    return pd.DataFrame(colonnes, index=etat_T.index)
+
+
+def _empiler_etat(etats):
+    """{ticker: état financier (lignes x dates)} -> un seul DataFrame transposé, index = (ticker, date)."""
+    etats = {ticker: etat.T for ticker, etat in etats.items() if etat is not None and not etat.empty}
+    if not etats:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=["ticker", "date"]))
+    return pd.concat(etats, names=["ticker", "date"])
+
+
+def preparer_etats(resultats, bilans):
+    """
+    Comptes de résultat + bilans de plusieurs tickers ({ticker: état}), transposés et empilés en un seul
+    DataFrame (index = (ticker, date), dates du plus ancien au plus récent), réduit aux lignes de ALIAS_ROIC.
+    Les deux états de chaque ticker sont alignés sur leurs dates communes.
+    """
+    resultat = _renommer(_empiler_etat(resultats))
+    bilan = _renommer(_empiler_etat(bilans))
+    # Chaque ligne vient de l'état qui la publie
+    etats = resultat[["ebit", "resultat_avant_impots", "impots", "interets"]].join(
+        bilan[["actif_total", "passif_courant", "capitaux_propres", "dette", "tresorerie"]], how="inner")
+    if etats.empty:
+        return etats
+    etats.index = etats.index.set_levels(pd.to_datetime(etats.index.levels[1]), level=1)
+    return etats.sort_index()
+
+
+# --------------------------------
+# --- Calcul vectorisé (1 passe) ---
+# --------------------------------
+def calculer_roic_lot(etats, trimestriel=False):
+    """
+    etats : DataFrame des lignes de ALIAS_ROIC, index = (ticker, date) trié par date dans chaque ticker.
+    Ajoute les colonnes de COLONNES_RESULTAT pour toutes les lignes d'un coup (opérations sur colonnes entières).
+    trimestriel=True : le NOPAT utilisé pour le ROIC est la somme des 4 derniers trimestres du même ticker (TTM),
+    à condition qu'ils couvrent au plus ECART_TTM_MAX entre la 1re et la 4e clôture (sinon NaN).
+    """
+    etats = etats.copy()
+
+    # A. Taux d'imposition effectif, borné (sinon taux par défaut)
+    taux = etats["impots"] / etats["resultat_avant_impots"].replace(0, np.nan)
+    etats["taux_imposition"] = taux.where((taux >= 0) & (taux <= TAUX_IMPOT_MAX), TAUX_IMPOT_DEFAUT)
+
+    # B. EBIT publié, sinon reconstruit (résultat avant impôts + intérêts)
+    etats["ebit_retenu"] = etats["ebit"].fillna(etats["resultat_avant_impots"] + etats["interets"].abs().fillna(0))
+
+    # C. NOPAT
+    etats["nopat"] = etats["ebit_retenu"] * (1 - etats["taux_imposition"])
+
+    # D. Capital investi (repli : capitaux propres + dette - trésorerie)
+    capital = etats["actif_total"] - etats["passif_courant"]
+    repli = etats["capitaux_propres"] + etats["dette"].fillna(0) - etats["tresorerie"].fillna(0)
+    etats["capital_investi"] = capital.fillna(repli)
+
+    # E. ROIC (TTM en trimestriel : somme glissante des 4 derniers NOPAT de chaque ticker)
+    nopat = etats["nopat"]
+    if trimestriel:
+        # Somme du trimestre et des 3 précédents du même ticker (décalages par groupe : NaN s'il en manque un)
+        par_ticker = nopat.groupby(level=0, sort=False)
+        nopat = nopat + par_ticker.shift(1) + par_ticker.shift(2) + par_ticker.shift(3)
+        # Décalage par position : un trimestre absent ferait sommer 4 lignes étalées sur plus d'un an
+        dates = pd.Series(etats.index.get_level_values("date"), index=etats.index)
+        ecart = dates - dates.groupby(level=0, sort=False).shift(3)
+        nopat = nopat.where(ecart <= ECART_TTM_MAX)
+        etats["nopat_ttm"] = nopat
+    etats["roic"] = nopat / etats["capital_investi"].where(etats["capital_investi"] > 0)
+    return etats
+
+
+def _empiler(donnees, etat_resultat, etat_bilan):
+    return preparer_etats({t: getattr(d, etat_resultat) for t, d in donnees.items()},
+                          {t: getattr(d, etat_bilan) for t, d in donnees.items()})
+
+
+# ------------------------
+# --- API multi-tickers ---
+# ------------------------
+def roic_tickers(donnees):
+    """
+    donnees : {ticker: objet avec financials, balance_sheet, quarterly_financials, quarterly_balance_sheet}
+              (FinancialSnapshot, TickerEnCache ou yf.Ticker).
+    Renvoie (resume, historique) :
+        - resume : une ligne par ticker -> roic_ttm, nopat_ttm, roic_annuel (dernier exercice), capital_investi, date_ttm
+        - historique : index (ticker, periode, date), periode = "annuel" ou "trimestriel", colonnes de COLONNES_RESULTAT
+    """
+    annuel = calculer_roic_lot(_empiler(donnees, "financials", "balance_sheet"))
+    trimestriel = calculer_roic_lot(_empiler(donnees, "quarterly_financials", "quarterly_balance_sheet"), trimestriel=True)
+
+    historique = pd.concat({"annuel": annuel, "trimestriel": trimestriel}, names=["periode"])
+    historique = historique.reorder_levels(["ticker", "periode", "date"]).sort_index()
+
+    # Dernière ligne de chaque ticker où le ROIC est calculé (ex: trimestre sans TTM complet ignoré). tail(1) et non last() :
+    # last() prend la dernière valeur non nulle colonne par colonne et mélangerait deux périodes
+    dernier_annuel = annuel.dropna(subset=["roic"]).reset_index("date").groupby(level="ticker").tail(1)
+    dernier_trim = trimestriel.dropna(subset=["roic"]).reset_index("date").groupby(level="ticker").tail(1)
+
+    resume = pd.DataFrame(index=pd.Index(list(donnees), name="ticker"))
+    resume["roic_ttm"] = dernier_trim["roic"].reindex(resume.index)
+    resume["nopat_ttm"] = dernier_trim["nopat_ttm"].reindex(resume.index)
+    resume["date_ttm"] = dernier_trim["date"].reindex(resume.index)
+    resume["roic_annuel"] = dernier_annuel["roic"].reindex(resume.index)
+    resume["capital_investi"] = dernier_trim["capital_investi"].reindex(resume.index).fillna(dernier_annuel["capital_investi"].reindex(resume.index))
+    return resume.astype({c: float for c in ["roic_ttm", "nopat_ttm", "roic_annuel", "capital_investi"]}), historique
+
+
+def roic_snapshot(snapshot):
+    """
+    ROIC d'un seul ticker. Renvoie (roic_global, historique) :
+        - roic_global : ROIC TTM (4 derniers trimestres), sinon celui du dernier exercice, sinon NaN
+        - historique : même format que roic_tickers, pour ce ticker seulement (index = (periode, date))
+    """
+    resume, historique = roic_tickers({snapshot.ticker: snapshot})
+    ligne = resume.iloc[0]
+    roic = ligne["roic_ttm"] if pd.notna(ligne["roic_ttm"]) else ligne["roic_annuel"]
+    historique = historique.xs(snapshot.ticker, level="ticker") if not historique.empty else historique
+    return roic, historique
@@ -0,0 +1,79 @@
+# ----------------------------------------------------
+# --- Panneau d'administration : mesures du rendu ---
+# ----------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - panneau_visible : panneau réservé à l'administration (DASHBOARD_ADMIN=1, ou ?admin=1 dans l'URL en lecture seule)
+    - panneau_modifiable : activer / couper / remettre à zéro les mesures touche tout le processus -> DASHBOARD_ADMIN=1 seulement
+    - afficher_panneau_mesures : dans la barre latérale (utils.Mesures)
+        - activer / couper les mesures (pour tout le processus)
+        - tableau par étape : appels, erreurs, temps total, moyenne, p50 / p95 / p99
+        - caches : taux de hits (données, figures), périmées servies, demandes regroupées, disjoncteur
+        - téléchargement OpenMetrics / JSON lines, remise à zéro
+
+"""
+
+import os
+
+import streamlit as st
+
+from utils.Mesures import get_mesures, indicateurs_caches
+
+ADMIN = os.environ.get("DASHBOARD_ADMIN", "0") == "1"
+
+
+def panneau_visible():
+    return ADMIN or st.query_params.get("admin") == "1"
+
+
+def panneau_modifiable():
+    """N'importe qui peut ajouter ?admin=1 à l'URL : seul le réglage du serveur autorise à changer l'état des mesures."""
+    return ADMIN
+
+
+def afficher_panneau_mesures():
+    """Expander de la barre latérale (à appeler dans un `with st.sidebar:`) ; rien si le panneau n'est pas visible."""
+    if not panneau_visible():
+        return
+
+    mesures = get_mesures()
+    with st.expander("⏱️ Mesures", expanded=False):
+        modifiable = panneau_modifiable()
+        actif = st.toggle("Mesurer le rendu", value=mesures.actif, key="mesures_actives", disabled=not modifiable,
+                          help="Pour tout le processus (toutes les sessions). Coupé : aucun coût sur les pages."
+                               + ("" if modifiable else " Modifiable avec DASHBOARD_ADMIN=1 seulement."))
+        if modifiable and actif != mesures.actif:
+            mesures.activer(actif)
+        actif = mesures.actif
+
+        stats = mesures.stats()
+        if stats:
+            import pandas as pd
+            tableau = pd.DataFrame.from_dict(stats, orient="index")
+            st.dataframe(
+                tableau[["appels", "erreurs", "total_ms", "moyenne_ms", "p50_ms", "p95_ms", "p99_ms"]],
+                column_config={nom: st.column_config.NumberColumn(format="%.1f") for nom in tableau.columns if nom.endswith("_ms")},
+                width="stretch",
+            )
+        else:
+            st.caption("Aucune mesure pour l'instant." if actif else "Mesures coupées.")
+
+        jauges = indicateurs_caches()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Cache", f"{jauges['cache.taux_hits']:.0%}", help="Part des demandes servies sans appeler Yahoo")
+        col2.metric("Figures", f"{jauges['figures.jauges.taux_hits']:.0%}", help="Jauges reprises du cache de figures")
+        col3.metric("Regroupées", f"{jauges['fournisseur.taux_regroupement']:.0%}", help="Demandes servies par un appel déjà en cours")
+        st.caption(f"Périmées servies : {jauges['cache.perimees_servies']:.0f} · "
+                   f"Disjoncteur : {'ouvert' if jauges['disjoncteur.ouvert'] else 'fermé'}")
+
+        col1, col2 = st.columns(2)
+        col1.download_button("OpenMetrics", mesures.openmetrics(jauges), file_name="mesures.txt",
+                             mime="application/openmetrics-text", width="stretch")
+        col2.download_button("JSON lines", mesures.jsonl(jauges), file_name="mesures.jsonl",
+                             mime="application/jsonl", width="stretch")
+        if st.button("Remettre à zéro", width="stretch", disabled=not modifiable) and modifiable:
+            mesures.reinitialiser()
+            st.rerun()
@@ -0,0 +1,345 @@
+# ---------------------------------------------------------------
+# --- Portefeuille : registre, valorisation et performances ---
+# ---------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - charger_transactions / ajouter_transaction : registre des opérations (CSV ou SQLite)
+    - positions_vers_transactions : un simple relevé de positions (ticker, quantité, PRU) devient un registre d'achats
+    - registre_depuis_tableau : registre ou relevé importé depuis la page
+    - charger_donnees_marche : matrice des clôtures partagée (titres + taux de change, un seul téléchargement groupé) et .info
+    - evaluer_portefeuille : valorisation et performances de tout le portefeuille en une passe NumPy
+        - quantités détenues (dates x titres) = somme cumulée des opérations
+        - valeurs en devise de base = quantités x cours x taux de change (matrices de même forme)
+        - TWR (rendement pondéré par le temps) : enchaînement des rendements quotidiens hors apports / retraits
+        - MWR (rendement pondéré par les capitaux, TRI annualisé) : taux qui annule la valeur actuelle des flux
+        - YTD par ligne : mêmes règles que calculate_ytd_performance (calculate_universe_performance)
+        - poids par secteur (translate_sector)
+
+    Format du registre (une ligne par opération, prix et frais dans la devise de cotation du titre) :
+        date,ticker,type,quantite,prix,frais
+        2024-03-15,AAPL,achat,10,172.5,1
+        2025-02-01,AAPL,vente,4,230,1
+        2025-05-16,AAPL,dividende,0,1.5,0        (dividende : montant total = prix, versé hors du portefeuille)
+
+"""
+
+import datetime
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.Fonctions_Autre import translate_sector
+from utils.Indicateurs import calculate_universe_performance
+
+# --------------------------------
+# --- Réglages du portefeuille ---
+# --------------------------------
+FICHIER_PORTEFEUILLE = Path(os.environ.get("DASHBOARD_PORTEFEUILLE", Path(__file__).resolve().parent.parent / "portefeuille.csv"))
+TABLE_SQLITE = "transactions"
+DEVISE_BASE = "EUR"
+COLONNES_REGISTRE = ["date", "ticker", "type", "quantite", "prix", "frais"]
+TYPES_OPERATIONS = {"achat": 1, "vente": -1, "dividende": 0} # Signe appliqué à la quantité
+
+# Cotations en centièmes (Londres : pence, Johannesburg : cents) -> devise principale
+SOUS_UNITES = {"GBp": ("GBP", 0.01), "GBX": ("GBP", 0.01), "ZAc": ("ZAR", 0.01), "ILA": ("ILS", 0.01)}
+
+JOURS_PAR_AN = 365.25
+
+
+# ---------------------------
+# --- Registre (CSV / SQLite) ---
+# ---------------------------
+def _est_sqlite(chemin):
+    return Path(chemin).suffix.lower() in (".db", ".sqlite", ".sqlite3")
+
+
+def _normaliser_registre(registre):
+    """Colonnes attendues, types numériques, tickers en majuscules, opérations triées par date."""
+    registre = registre.rename(columns=str.lower).copy()
+    for colonne, defaut in (("type", "achat"), ("frais", 0.0)):
+        if colonne not in registre.columns:
+            registre[colonne] = defaut
+    manquantes = set(COLONNES_REGISTRE) - set(registre.columns)
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes dans le registre : {', '.join(sorted(manquantes))}")
+
+    registre = registre[COLONNES_REGISTRE]
+    registre["date"] = pd.to_datetime(registre["date"]).dt.tz_localize(None).dt.normalize()
+    registre["ticker"] = registre["ticker"].astype(str).str.strip().str.upper()
+    registre["type"] = registre["type"].astype(str).str.strip().str.lower()
+    for colonne in ("quantite", "prix", "frais"):
+        registre[colonne] = pd.to_numeric(registre[colonne], errors="coerce").fillna(0.0)
+    inconnus = set(registre["type"]) - set(TYPES_OPERATIONS)
+    if inconnus:
+        raise ValueError(f"Types d'opération inconnus : {', '.join(sorted(inconnus))}")
+    return registre.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def charger_transactions(chemin=FICHIER_PORTEFEUILLE):
+    """Registre des opérations (CSV, ou base SQLite si l'extension est .db / .sqlite). Vide si le fichier n'existe pas."""
+    chemin = Path(chemin)
+    if not chemin.exists():
+        return pd.DataFrame(columns=COLONNES_REGISTRE)
+    if _est_sqlite(chemin):
+        with sqlite3.connect(chemin) as connexion:
+            registre = pd.read_sql_query(f"SELECT * FROM {TABLE_SQLITE}", connexion)
+    else:
+        registre = pd.read_csv(chemin)
+    return _normaliser_registre(registre)
+
+
+def ajouter_transaction(date, ticker, type_operation, quantite, prix, frais=0.0, chemin=FICHIER_PORTEFEUILLE):
+    """Ajoute une opération à la fin du registre (crée le fichier, ou la table SQLite, si besoin)."""
+    operation = _normaliser_registre(pd.DataFrame([{
+        "date": date, "ticker": ticker, "type": type_operation, "quantite": quantite, "prix": prix, "frais": frais,
+    }]))
+    operation["date"] = operation["date"].dt.strftime("%Y-%m-%d")
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    if _est_sqlite(chemin):
+        with sqlite3.connect(chemin) as connexion:
+            operation.to_sql(TABLE_SQLITE, connexion, if_exists="append", index=False)
+    else:
+        operation.to_csv(chemin, mode="a", header=not chemin.exists(), index=False)
+
+
+def positions_vers_transactions(positions, date=None):
+    """
+    Relevé de positions (colonnes ticker, quantite, prix = prix de revient unitaire) -> registre d'achats,
+    tous datés du même jour (par défaut : le 1er janvier de l'année en cours).
+    """
+    positions = positions.rename(columns=str.lower)
+    return _normaliser_registre(pd.DataFrame({
+        "date": pd.Timestamp(date or datetime.date(datetime.date.today().year, 1, 1)),
+        "ticker": positions["ticker"],
+        "type": "achat",
+        "quantite": positions["quantite"],
+        "prix": positions["prix"],
+        "frais": positions["frais"] if "frais" in positions.columns else 0.0,
+    }))
+
+
+def registre_depuis_tableau(tableau):
+    """Tableau importé (ex: CSV envoyé depuis la page) : registre complet, ou relevé de positions s'il n'a pas de date."""
+    if "date" not in {c.lower() for c in tableau.columns}:
+        return positions_vers_transactions(tableau)
+    return _normaliser_registre(tableau)
+
+
+# -----------------------------------------
+# --- Données de marché (1 téléchargement) ---
+# -----------------------------------------
+def devise_cotation(devise):
+    """Devise de cotation Yahoo -> (devise principale, facteur). Ex: 'GBp' -> ('GBP', 0.01)."""
+    if not devise:
+        return DEVISE_BASE, 1.0
+    return SOUS_UNITES.get(devise, (devise.upper(), 1.0))
+
+
+def symbole_change(devise, devise_base=DEVISE_BASE):
+    """Paire Yahoo donnant le prix d'une unité de `devise` en `devise_base` (ex: USD -> EUR : 'USDEUR=X')."""
+    return f"{devise}{devise_base}=X"
+
+
+def charger_donnees_marche(transactions, devise_base=DEVISE_BASE, cache=None):
+    """
+    Clôtures de tous les titres ET des taux de change nécessaires, en un seul téléchargement groupé
+    (depuis la première opération, via le cache), + .info de chaque titre (devise, secteur, nom, cours actuel).
+    Renvoie (cloture, infos) : cloture = matrice dates x symboles, infos = une ligne par titre.
+    """
+    from utils.Telechargement_Groupe import charger_infos, cours_de_cloture, telecharger_cours_groupes
+
+    tickers = list(dict.fromkeys(transactions["ticker"]))
+    if not tickers:
+        return pd.DataFrame(), pd.DataFrame()
+    infos = charger_infos(tickers, cache=cache)
+    devises = infos["currency"] if "currency" in infos.columns else pd.Series(DEVISE_BASE, index=infos.index)
+    paires = {symbole_change(devise_cotation(d)[0], devise_base) for d in devises.fillna(DEVISE_BASE)}
+    paires.discard(symbole_change(devise_base, devise_base))
+
+    debut = (transactions["date"].min() - pd.Timedelta(days=15)).strftime("%Y-%m-%d")
+    # Début de l'année précédente au minimum : la référence YTD (clôture N-1) doit être dans la matrice
+    debut = min(debut, f"{datetime.date.today().year - 1}-12-20")
+    cloture = cours_de_cloture(telecharger_cours_groupes(tickers + sorted(paires), start=debut, cache=cache))
+    if not cloture.empty and cloture.index.tz is not None:
+        cloture.index = cloture.index.tz_localize(None)
+    cloture.index = cloture.index.normalize()
+    cloture = cloture[~cloture.index.duplicated(keep="last")]
+    # Un seul bloc NumPy (et non un bloc par colonne issu du téléchargement groupé) : extractions rapides à chaque rerun
+    return pd.DataFrame(cloture.to_numpy(dtype=float), index=cloture.index, columns=cloture.columns), infos
+
+
+# -----------------------------------
+# --- Évaluation (vectorisée) ---
+# -----------------------------------
+@dataclass(frozen=True)
+class EvaluationPortefeuille:
+    """Résultat de evaluer_portefeuille (montants en devise de base)."""
+    devise_base: str
+    lignes: pd.DataFrame # Une ligne par titre détenu (ou déjà vendu)
+    secteurs: pd.Series # Poids par secteur (traduit), somme = 1
+    valeur: pd.Series # Valeur du portefeuille chaque jour
+    flux: pd.Series # Apports (+) / retraits (-) chaque jour : achats, ventes, dividendes
+    twr: float # Depuis la première opération
+    twr_ytd: float
+    mwr: float # TRI annualisé
+    valeur_totale: float
+    plus_value_latente: float
+
+
+def _taux_rendement_interne(flux, annees, iterations=100, tolerance=1e-10):
+    """
+    TRI : taux r tel que somme(flux_i x (1 + r)^(-annees_i)) = 0 (flux du point de vue de l'investisseur).
+    Newton vectorisé sur les flux, avec repli par dichotomie si Newton sort de l'intervalle ]-1, +inf[.
+    """
+    if not (np.any(flux > 0) and np.any(flux < 0)):
+        return np.nan
+
+    def van(taux):
+        return np.sum(flux * (1 + taux) ** -annees)
+
+    taux = 0.1
+    for _ in range(iterations):
+        facteurs = (1 + taux) ** -annees
+        valeur = np.sum(flux * facteurs)
+        derivee = np.sum(-annees * flux * facteurs / (1 + taux))
+        if derivee == 0:
+            break
+        suivant = taux - valeur / derivee
+        if not np.isfinite(suivant) or suivant <= -1:
+            break
+        if abs(suivant - taux) < tolerance:
+            return suivant
+        taux = suivant
+
+    # Dichotomie sur ]-99 %, +1000 %[
+    bas, haut = -0.99, 10.0
+    if np.sign(van(bas)) == np.sign(van(haut)):
+        return np.nan
+    for _ in range(200):
+        milieu = (bas + haut) / 2
+        if np.sign(van(milieu)) == np.sign(van(bas)):
+            bas = milieu
+        else:
+            haut = milieu
+    return (bas + haut) / 2
+
+
+def _twr(valeur, flux, debut=0):
+    """Rendement pondéré par le temps à partir de la ligne `debut` : produit des (V_t - F_t) / V_(t-1)."""
+    precedente = valeur[debut:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rendements = np.where(precedente > 0, (valeur[debut + 1:] - flux[debut + 1:]) / precedente - 1, 0.0)
+    return float(np.prod(1 + rendements) - 1) if len(rendements) else np.nan
+
+
+def _colonnes(matrice, colonnes, noms):
+    """Colonnes `noms` de la matrice (copie), NaN pour un nom absent."""
+    positions = colonnes.get_indexer(noms)
+    extrait = matrice[:, np.maximum(positions, 0)]
+    extrait[:, positions < 0] = np.nan
+    return extrait
+
+
+def evaluer_portefeuille(transactions, cloture, infos, devise_base=DEVISE_BASE, aujourd_hui=None):
+    """
+    Valorise tout le portefeuille à partir de la matrice des clôtures partagée (titres + taux de change).
+    Toutes les grandeurs sont des matrices (dates x titres) de même forme : aucune boucle sur les lignes.
+    """
+    titres = list(dict.fromkeys(transactions["ticker"]))
+    dates = cloture.index
+    aujourd_hui = pd.Timestamp(aujourd_hui or datetime.date.today())
+
+    # --- 1. Cours natifs et taux de change (alignés sur les titres) ---
+    devises_yahoo = infos["currency"].reindex(titres) if "currency" in infos.columns else pd.Series(None, index=titres)
+    devises, facteurs = zip(*(devise_cotation(d if isinstance(d, str) else None) for d in devises_yahoo))
+    matrice = cloture.to_numpy(dtype=float) # Une seule extraction : les colonnes sont ensuite prises par position
+    prix = _colonnes(matrice, cloture.columns, titres)
+    change = _colonnes(matrice, cloture.columns, [symbole_change(d, devise_base) for d in devises])
+    change[:, np.array(devises) == devise_base] = 1.0
+    change = change * np.array(facteurs) # Conversion d'un cours coté (éventuellement en centièmes) vers la devise de base
+
+    # --- 2. Quantités détenues : opérations placées sur la séance du jour (ou la suivante), puis somme cumulée ---
+    ligne = np.minimum(np.searchsorted(dates.values, transactions["date"].values, side="left"), len(dates) - 1)
+    colonne = pd.Index(titres).get_indexer(transactions["ticker"])
+    signe = transactions["type"].map(TYPES_OPERATIONS).to_numpy(dtype=float)
+    quantites_op = transactions["quantite"].to_numpy(dtype=float)
+    mouvements = np.zeros(prix.shape)
+    np.add.at(mouvements, (ligne, colonne), signe * quantites_op)
+    quantites = np.cumsum(mouvements, axis=0)
+
+    # --- 3. Valeur de chaque ligne et du portefeuille (cours manquant : dernière valeur connue, déjà ffill) ---
+    valeurs = np.nan_to_num(quantites * prix * change)
+    valeur = valeurs.sum(axis=1)
+
+    # --- 4. Flux de l'investisseur (en devise de base, au change du jour de l'opération) ---
+    change_op = change[ligne, colonne]
+    montant = transactions["prix"].to_numpy(dtype=float) * np.where(signe == 0, 1.0, quantites_op)
+    frais = transactions["frais"].to_numpy(dtype=float)
+    # achat : apport (montant + frais) ; vente : retrait (montant - frais) ; dividende : retrait (montant - frais)
+    apports = np.where(signe > 0, montant + frais, -(montant - frais)) * change_op
+    flux = np.zeros(len(dates))
+    np.add.at(flux, ligne, np.nan_to_num(apports))
+
+    # --- 5. Performances ---
+    premiere = int(ligne.min()) if len(ligne) else 0
+    debut_annee = max(np.searchsorted(dates.values, np.datetime64(pd.Timestamp(aujourd_hui.year, 1, 1)), side="left") - 1, premiere)
+    twr = _twr(valeur, flux, premiere)
+    twr_ytd = _twr(valeur, flux, debut_annee)
+    # MWR : flux de l'investisseur (apports négatifs), plus la valeur finale récupérée
+    annees = (dates.values - dates.values[premiere]) / np.timedelta64(1, "D") / JOURS_PAR_AN
+    flux_investisseur = np.append(-flux[flux != 0], valeur[-1])
+    annees_flux = np.append(annees[flux != 0], annees[-1])
+    mwr = _taux_rendement_interne(flux_investisseur, annees_flux)
+
+    # --- 6. Tableau des lignes ---
+    achats = signe > 0
+    cout = np.bincount(colonne[achats], weights=(montant + frais)[achats], minlength=len(titres))
+    quantites_achetees = np.bincount(colonne[achats], weights=quantites_op[achats], minlength=len(titres))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pru = cout / quantites_achetees # Prix de revient unitaire moyen (frais compris), en devise de cotation
+    quantite_actuelle = quantites[-1]
+    cours_actuel = pd.Series(prix[-1], index=titres)
+    if "currentPrice" in infos.columns:
+        cours_actuel = pd.to_numeric(infos["currentPrice"].reindex(titres), errors="coerce").fillna(cours_actuel)
+    valeur_base = np.nan_to_num(quantite_actuelle * cours_actuel.to_numpy() * change[-1])
+    latente = (cours_actuel.to_numpy() - pru) * quantite_actuelle * change[-1]
+    performances, _ = calculate_universe_performance(pd.DataFrame(prix, index=dates, columns=titres),
+                                                     current_prices=cours_actuel, today=aujourd_hui)
+
+    total = valeur_base.sum()
+    secteurs_bruts = infos["sector"].reindex(titres) if "sector" in infos.columns else pd.Series(None, index=titres)
+    lignes = pd.DataFrame({
+        "Nom": infos["shortName"].reindex(titres) if "shortName" in infos.columns else pd.Series(titres, index=titres),
+        "Secteur": secteurs_bruts.map(lambda s: translate_sector(s if isinstance(s, str) else None)),
+        "Devise": list(devises),
+        "Quantité": quantite_actuelle,
+        "PRU": pru * np.array(facteurs),
+        "Cours": cours_actuel.to_numpy() * np.array(facteurs),
+        f"Valeur ({devise_base})": valeur_base,
+        "Poids": valeur_base / total if total else np.nan,
+        f"+/- latente ({devise_base})": latente,
+        "YTD (%)": performances["YTD"].to_numpy(),
+    }, index=pd.Index(titres, name="Ticker"))
+    lignes = lignes[lignes["Quantité"].abs() > 1e-9]
+    secteurs = lignes.groupby("Secteur")["Poids"].sum().sort_values(ascending=False)
+
+    return EvaluationPortefeuille(
+        devise_base=devise_base,
+        lignes=lignes,
+        secteurs=secteurs,
+        valeur=pd.Series(valeur, index=dates).iloc[premiere:],
+        flux=pd.Series(flux, index=dates).iloc[premiere:],
+        twr=twr,
+        twr_ytd=twr_ytd,
+        mwr=mwr,
+        valeur_totale=float(total),
+        plus_value_latente=float(np.nansum(lignes[f"+/- latente ({devise_base})"])),
+    )
@@ -0,0 +1,336 @@
+# ------------------------------------------------------------
+# --- Préchauffage du cache (tickers les plus consultés) ---
+# ------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - Popularite : journal des consultations (ticker choisi dans la barre de recherche) et classement des tickers
+    - marche_ouvert : la place de cotation du ticker est-elle ouverte ? (horaires approximatifs, selon le suffixe)
+    - LimiteurDebit : limite le nombre d'appels par seconde vers le fournisseur (seau à jetons)
+    - Prechauffeur : rafraîchit les données des N tickers les plus consultés AVANT leur expiration dans le cache
+        - cotations (.info, historique) : pendant les heures de marché
+        - états financiers et dividendes : après chaque publication de résultats (ou avant expiration)
+        - échec : nouvel essai plus tard (backoff exponentiel par ticker)
+        - journal des consultations compacté une fois par jour (ou au-delà de TAILLE_COMPACTAGE)
+        - seuils de valorisation par secteur (utils.Seuils_Secteurs) recalculés quand la table a plus d'un jour
+    - demarrer_prechauffage : lance le préchauffeur dans un thread (boucle asyncio), une seule fois par processus
+
+    Le préchauffeur tourne dans le processus de l'application (il partage alors le cache en mémoire),
+    ou à part : python -m utils.Prechauffage (le cache disque est partagé entre les deux processus).
+
+"""
+
+import asyncio
+import datetime
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from zoneinfo import ZoneInfo
+
+from utils.Cache_Donnees import DOSSIER_CACHE, QUART_HEURE, TTL_PAR_DONNEE, TickerEnCache, get_cache
+from utils.Fournisseur_Donnees import ETATS_FINANCIERS, get_fournisseur
+
+# ---------------------------------
+# --- Réglages du préchauffage ---
+# ---------------------------------
+FICHIER_CONSULTATIONS = DOSSIER_CACHE / "consultations.csv"
+NB_TICKERS = 20 # Nombre de tickers populaires gardés au chaud
+DEMI_VIE_POPULARITE = 3 * 24 * 60 * 60 # Une consultation compte deux fois moins au bout de 3 jours
+FENETRE_POPULARITE = 30 * 24 * 60 * 60 # Les consultations plus anciennes sont oubliées
+INTERVALLE_COMPACTAGE = 24 * 60 * 60 # Le journal des consultations est réécrit sans elles une fois par jour...
+TAILLE_COMPACTAGE = 1024 * 1024 # ... ou dès qu'il dépasse 1 Mo (classement() relit tout le fichier à chaque tour)
+INTERVALLE_TOUR = 60 # Secondes entre deux passages du préchauffeur
+MARGE_EXPIRATION = 3 * 60 # On rafraîchit une donnée quand il lui reste moins de 3 min
+DELAI_PUBLICATION = 24 * 60 * 60 # Yahoo met à jour les états financiers environ un jour après les résultats
+APPELS_PAR_SECONDE = 2 # Quota du préchauffeur (l'application garde le reste de la bande passante)
+RAFALE = 4
+BACKOFF_INITIAL = 60
+BACKOFF_MAX = 60 * 60
+
+DONNEES_PUBLICATIONS = tuple(ETATS_FINANCIERS) + ("dividends",)
+
+# Heures d'ouverture approximatives (fuseau, ouverture, fermeture) selon le suffixe du ticker
+HORAIRES_MARCHES = {
+    "": ("America/New_York", datetime.time(9, 30), datetime.time(16, 0)), # Pas de suffixe : marché US
+    "PA": ("Europe/Paris", datetime.time(9, 0), datetime.time(17, 30)),
+    "AS": ("Europe/Amsterdam", datetime.time(9, 0), datetime.time(17, 30)),
+    "BR": ("Europe/Brussels", datetime.time(9, 0), datetime.time(17, 30)),
+    "DE": ("Europe/Berlin", datetime.time(9, 0), datetime.time(17, 30)),
+    "MI": ("Europe/Rome", datetime.time(9, 0), datetime.time(17, 30)),
+    "MC": ("Europe/Madrid", datetime.time(9, 0), datetime.time(17, 30)),
+    "SW": ("Europe/Zurich", datetime.time(9, 0), datetime.time(17, 30)),
+    "L": ("Europe/London", datetime.time(8, 0), datetime.time(16, 30)),
+    "OL": ("Europe/Oslo", datetime.time(9, 0), datetime.time(16, 20)),
+    "TO": ("America/Toronto", datetime.time(9, 30), datetime.time(16, 0)),
+    "T": ("Asia/Tokyo", datetime.time(9, 0), datetime.time(15, 0)),
+    "HK": ("Asia/Hong_Kong", datetime.time(9, 30), datetime.time(16, 0)),
+}
+
+
+def marche_ouvert(ticker, maintenant=None):
+    """True si la place du ticker est ouverte (jours de semaine, sans gestion des jours fériés)."""
+    suffixe = ticker.rsplit(".", 1)[1].upper() if "." in ticker else ""
+    if ticker.startswith("^") or ticker.endswith("=X") or "-" in ticker:
+        return True # Indices, devises, cryptos : on ne cherche pas à deviner, on considère ouvert
+    fuseau, ouverture, fermeture = HORAIRES_MARCHES.get(suffixe, HORAIRES_MARCHES[""])
+    local = (maintenant or datetime.datetime.now(datetime.timezone.utc)).astimezone(ZoneInfo(fuseau))
+    return local.weekday() < 5 and ouverture <= local.time() <= fermeture
+
+
+# ---------------------------------
+# --- POPULARITÉ DES TICKERS ---
+# ---------------------------------
+class Popularite:
+    """
+    Journal en ajout seul (une ligne "ticker,date" par consultation) : plusieurs sessions ou processus
+    peuvent écrire en même temps sans se marcher dessus. Le classement pondère chaque consultation
+    par sa fraîcheur (demi-vie de DEMI_VIE_POPULARITE).
+    """
+
+    def __init__(self, fichier=FICHIER_CONSULTATIONS):
+        self.fichier = fichier
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, ticker):
+        ligne = f"{ticker.strip().upper()},{time.time():.0f}\n"
+        with self._verrou:
+            self.fichier.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.fichier, "a", encoding="utf-8") as f:
+                f.write(ligne)
+
+    def classement(self, n=NB_TICKERS, maintenant=None):
+        """Les n tickers les plus consultés récemment, du plus au moins populaire."""
+        maintenant = maintenant or time.time()
+        scores = Counter()
+        try:
+            with open(self.fichier, encoding="utf-8") as f:
+                for ligne in f:
+                    ticker, _, date = ligne.strip().rpartition(",")
+                    try:
+                        age = maintenant - float(date)
+                    except ValueError:
+                        continue
+                    if ticker and age < FENETRE_POPULARITE:
+                        scores[ticker] += 0.5 ** (age / DEMI_VIE_POPULARITE)
+        except OSError:
+            return []
+        return [ticker for ticker, _ in scores.most_common(n)]
+
+    def _recente(self, ligne, maintenant):
+        try:
+            return maintenant - float(ligne.rsplit(",", 1)[-1]) < FENETRE_POPULARITE
+        except ValueError:
+            return False # Ligne illisible (écriture interrompue) : on l'abandonne
+
+    def compacter(self, maintenant=None):
+        """Réécrit le journal sans les consultations sorties de la fenêtre."""
+        maintenant = maintenant or time.time()
+        with self._verrou:
+            try:
+                with open(self.fichier, encoding="utf-8") as f:
+                    lignes = [l for l in f if l.strip() and self._recente(l, maintenant)]
+            except OSError:
+                return
+            temporaire = self.fichier.with_suffix(".tmp")
+            with open(temporaire, "w", encoding="utf-8") as f:
+                f.writelines(lignes)
+            os.replace(temporaire, self.fichier)
+
+
+_popularite = Popularite()
+
+def enregistrer_consultation(ticker):
+    """Appelé par la barre de recherche à chaque actif choisi."""
+    try:
+        _popularite.enregistrer(ticker)
+    except OSError as e:
+        print(f"Erreur journal des consultations : {e}")
+
+
+# ------------------------------
+# --- LIMITE DE DÉBIT ---
+# ------------------------------
+class LimiteurDebit:
+    """Seau à jetons : au plus `par_seconde` appels par seconde en moyenne, avec des rafales de `rafale` appels."""
+
+    def __init__(self, par_seconde=APPELS_PAR_SECONDE, rafale=RAFALE):
+        self.par_seconde = par_seconde
+        self.rafale = rafale
+        self._jetons = float(rafale)
+        self._dernier = time.monotonic()
+        self._verrou = asyncio.Lock()
+
+    async def attendre(self):
+        async with self._verrou:
+            while True:
+                maintenant = time.monotonic()
+                self._jetons = min(self.rafale, self._jetons + (maintenant - self._dernier) * self.par_seconde)
+                self._dernier = maintenant
+                if self._jetons >= 1:
+                    self._jetons -= 1
+                    return
+                await asyncio.sleep((1 - self._jetons) / self.par_seconde)
+
+
+# ---------------------------
+# --- PRÉCHAUFFEUR ---
+# ---------------------------
+class Prechauffeur:
+
+    def __init__(self, popularite=None, cache=None, fournisseur=None, stockage=None, nb_tickers=NB_TICKERS, limiteur=None):
+        self.popularite = popularite or _popularite
+        self.cache = cache or get_cache()
+        self.fournisseur = fournisseur
+        if stockage is None:
+            from utils.Stockage_Cours import get_stockage # pandas / Parquet : chargés dans le thread de fond, pas par la page
+            stockage = get_stockage()
+        self.stockage = stockage
+        self.nb_tickers = nb_tickers
+        self.limiteur = limiteur
+        self._echecs = {} # ticker -> (nombre d'échecs consécutifs, prochain essai possible)
+        self._compacte_le = 0.0 # Dernier compactage du journal (0 : au premier tour)
+        self._calcul_seuils = None # Tâche asyncio du calcul des seuils par secteur (long : ne bloque pas les tours)
+        self.compteurs = Counter() # "rafraichis", "echecs", "ignores_backoff"
+
+    # --- Ce qu'il faut rafraîchir ---
+    def _date_publication(self, ticker):
+        """Date (timestamp) de la dernière publication de résultats connue, d'après le .info en cache."""
+        trouve, info = self.cache.get((ticker.upper(), "info", ""), compter=False)
+        if not trouve or not info:
+            return None
+        dates = [info.get(cle) for cle in ("earningsTimestamp", "earningsTimestampStart")]
+        dates = [d for d in dates if isinstance(d, (int, float)) and d < time.time()]
+        return max(dates) if dates else None
+
+    def donnees_a_rafraichir(self, ticker, maintenant=None):
+        """Liste des données du ticker à recharger maintenant."""
+        a_faire = []
+        ouvert = marche_ouvert(ticker, maintenant)
+
+        # Cotations : absentes du cache (préchauffage initial), ou expirées / bientôt expirées pendant les heures de marché.
+        # Marché fermé, une cotation expirée reste servie telle quelle : le cours ne bouge plus, inutile de rappeler Yahoo
+        cle_info = (ticker.upper(), "info", "")
+        if not self.cache.get_perime(cle_info)[0]:
+            a_faire.append("info")
+        elif ouvert:
+            restant = self.cache.restant(cle_info)
+            if restant is None or restant < MARGE_EXPIRATION:
+                a_faire.append("info")
+        age = self.stockage.age_synchro(ticker)
+        if math.isinf(age) or (ouvert and age > self.stockage.intervalle_sync - MARGE_EXPIRATION):
+            a_faire.append("history")
+
+        # Publications : absentes, bientôt expirées, ou antérieures aux derniers résultats publiés
+        publication = self._date_publication(ticker)
+        for donnee in DONNEES_PUBLICATIONS:
+            restant = self.cache.restant((ticker.upper(), donnee, ""))
+            if restant is None or restant < MARGE_EXPIRATION:
+                a_faire.append(donnee)
+            elif publication is not None and time.time() > publication + DELAI_PUBLICATION:
+                ecrit_le = time.time() - (TTL_PAR_DONNEE.get(donnee, QUART_HEURE) - restant)
+                if ecrit_le < publication + DELAI_PUBLICATION:
+                    a_faire.append(donnee)
+        return a_faire
+
+    def compacter_si_besoin(self, maintenant=None):
+        """Compacte le journal des consultations une fois par INTERVALLE_COMPACTAGE, ou plus tôt s'il est trop gros."""
+        maintenant = maintenant or time.time()
+        try:
+            taille = self.popularite.fichier.stat().st_size
+        except OSError:
+            return False # Pas encore de journal
+        if maintenant - self._compacte_le < INTERVALLE_COMPACTAGE and taille < TAILLE_COMPACTAGE:
+            return False
+        self.popularite.compacter(maintenant)
+        self._compacte_le = maintenant
+        return True
+
+    def lancer_calcul_seuils(self):
+        """Recalcule les seuils par secteur si besoin, dans un thread, sans attendre la fin (un seul calcul à la fois)."""
+        if self._calcul_seuils is None or self._calcul_seuils.done():
+            from utils.Seuils_Secteurs import mettre_a_jour_si_besoin # pandas : chargé dans le thread de fond, pas par la page
+            self._calcul_seuils = asyncio.create_task(asyncio.to_thread(mettre_a_jour_si_besoin))
+
+    # --- Exécution ---
+    def _rafraichir(self, ticker, donnee):
+        """Appel bloquant (exécuté dans un thread par la boucle asyncio)."""
+        stock = TickerEnCache(ticker, cache=self.cache, fournisseur=self.fournisseur or get_fournisseur())
+        stock.rafraichir(donnee)
+
+    def _en_backoff(self, ticker):
+        echecs = self._echecs.get(ticker)
+        return echecs is not None and time.time() < echecs[1]
+
+    def _noter_echec(self, ticker, erreur):
+        nombre = self._echecs.get(ticker, (0, 0))[0] + 1
+        pause = min(BACKOFF_MAX, BACKOFF_INITIAL * 2 ** (nombre - 1)) * random.uniform(0.8, 1.2) # Gigue : évite les vagues d'essais
+        self._echecs[ticker] = (nombre, time.time() + pause)
+        self.compteurs["echecs"] += 1
+        print(f"Préchauffage {ticker} : {erreur} (nouvel essai dans {pause:.0f} s)")
+
+    async def _prechauffer_ticker(self, ticker):
+        for donnee in self.donnees_a_rafraichir(ticker):
+            await self.limiteur.attendre()
+            try:
+                await asyncio.to_thread(self._rafraichir, ticker, donnee)
+            except Exception as e:
+                self._noter_echec(ticker, e)
+                return # Le reste attendra la fin du backoff
+            self.compteurs["rafraichis"] += 1
+        self._echecs.pop(ticker, None)
+
+    async def un_tour(self):
+        """Un passage sur les tickers populaires (en parallèle, le limiteur fixe le débit global)."""
+        self.limiteur = self.limiteur or LimiteurDebit()
+        tickers = []
+        for ticker in self.popularite.classement(self.nb_tickers):
+            if self._en_backoff(ticker):
+                self.compteurs["ignores_backoff"] += 1
+            else:
+                tickers.append(ticker)
+        await asyncio.gather(*(self._prechauffer_ticker(t) for t in tickers))
+        return tickers
+
+    async def tourner(self, intervalle=INTERVALLE_TOUR, arret=None):
+        """Boucle sans fin (ou jusqu'à ce que l'événement `arret` soit positionné)."""
+        while arret is None or not arret.is_set():
+            try:
+                await asyncio.to_thread(self.compacter_si_besoin)
+                self.lancer_calcul_seuils()
+                await self.un_tour()
+            except Exception as e:
+                print(f"Erreur préchauffage : {e}")
+            await asyncio.sleep(intervalle)
+
+
+# ---------------------------------
+# --- LANCEMENT (1 FOIS) ---
+# ---------------------------------
+_thread_prechauffage = None
+_verrou_prechauffage = threading.Lock()
+
+def demarrer_prechauffage():
+    """
+    Lance le préchauffeur dans un thread de fond (une seule fois par processus).
+    Désactivé avec la variable d'environnement DASHBOARD_PRECHAUFFAGE=0 (ex: préchauffeur lancé à part, benchmarks).
+    """
+    global _thread_prechauffage
+    if os.environ.get("DASHBOARD_PRECHAUFFAGE", "1") == "0":
+        return None
+    with _verrou_prechauffage:
+        if _thread_prechauffage is None or not _thread_prechauffage.is_alive():
+            _thread_prechauffage = threading.Thread(
+                target=lambda: asyncio.run(Prechauffeur().tourner()), name="prechauffage", daemon=True
+            )
+            _thread_prechauffage.start()
+        return _thread_prechauffage
+
+
+if __name__ == "__main__":
+    print(f"Préchauffage des {NB_TICKERS} tickers les plus consultés (Ctrl+C pour arrêter)")
+    asyncio.run(Prechauffeur().tourner())
@@ -0,0 +1,254 @@
+# ---------------------------------------------------------
+# --- Seuils de valorisation par secteur (pré-calculés) ---
+# ---------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - METRIQUES : métriques des jauges du Dashboard (PER, PEG) et leur sens (plus bas = mieux)
+    - calculer_seuils : percentiles (33 % / 67 %) de chaque métrique par secteur, à partir des .info d'un univers de tickers
+    - TableSeuils : table compacte (secteur -> métrique -> [bas, haut]) lue en O(1) à chaque affichage
+    - get_seuils : table partagée, relue sur le disque quand elle est trop vieille (aucun calcul)
+    - mettre_a_jour_si_besoin : recalcule la table si elle est absente ou trop vieille (appelé par le préchauffage)
+    - seuils : raccourci utilisé par le Dashboard pour les jauges et leurs libellés
+
+    Le calcul (coûteux : un .info par ticker de l'univers) n'est jamais lancé par une page : le préchauffage
+    (utils.Prechauffage, dans le processus de l'application ou à part) s'en charge ; la page lit la dernière table
+    enregistrée, ou les seuils par défaut tant qu'aucune table n'existe.
+    Calcul manuel (ex: tâche planifiée) : python -m utils.Seuils_Secteurs
+
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.Cache_Donnees import DOSSIER_CACHE, UN_JOUR
+
+# --------------------------------
+# --- Réglages des seuils ---
+# --------------------------------
+FICHIER_SEUILS = DOSSIER_CACHE / "seuils_secteurs.json"
+PERCENTILES = (0.33, 0.67) # Seuils bas / haut : tiers les moins chers / les plus chers du secteur
+MIN_PAIRS = 5 # En dessous, le secteur n'est pas assez représenté : on prend les seuils tous secteurs confondus
+AGE_MAX_SEUILS = UN_JOUR # Au-delà, la table est recalculée par le préchauffage
+PAUSE_ECHEC = 60 * 60 # Après un calcul raté, on attend 1 h avant de réessayer
+INTERVALLE_RELECTURE = 10 * 60 # Table trop vieille : relue sur le disque au plus toutes les 10 min (calculée par un autre processus ?)
+# "0" : pas de calcul par le préchauffage (table calculée par une tâche planifiée, ou benchmarks)
+CALCUL_AUTO = os.environ.get("DASHBOARD_SEUILS_AUTO", "1") != "0"
+TOUS_SECTEURS = "_tous"
+
+# Métrique -> sens ("lower_is_better" / "higher_is_better", comme create_gauge) : seulement celles des jauges du Dashboard
+METRIQUES = {
+    "PER": "lower_is_better",
+    "PEG": "lower_is_better",
+}
+
+# Seuils utilisés tant qu'aucune table n'a été calculée (anciennes valeurs fixes du Dashboard)
+SEUILS_PAR_DEFAUT = {
+    TOUS_SECTEURS: {"PER": [15, 25], "PEG": [1, 2]},
+    "Technology": {"PER": [20, 35]},
+    "Financial Services": {"PER": [12, 18]},
+    "Healthcare": {"PER": [15, 25]},
+    "Consumer Cyclical": {"PER": [15, 25]},
+    "Consumer Defensive": {"PER": [18, 25]},
+    "Industrials": {"PER": [12, 20]},
+    "Energy": {"PER": [10, 15]},
+    "Real Estate": {"PER": [12, 20]},
+    "Basic Materials": {"PER": [10, 15]},
+    "Utilities": {"PER": [12, 18]},
+}
+
+# Univers de référence : grandes capitalisations US et européennes de tous les secteurs
+# (remplaçable par la variable d'environnement DASHBOARD_UNIVERS_SEUILS="AAPL,MSFT,...")
+UNIVERS_PAR_DEFAUT = [
+    # Technologie / Communication
+    "AAPL", "MSFT", "NVDA", "GOOGL", "META", "AVGO", "ORCL", "ADBE", "CRM", "CSCO", "INTC", "SAP.DE", "ASML.AS", "CAP.PA", "DSY.PA",
+    # Finance
+    "JPM", "BAC", "WFC", "GS", "MS", "V", "MA", "BNP.PA", "GLE.PA", "ACA.PA", "CS.PA", "ALV.DE", "SAN.MC",
+    # Santé
+    "JNJ", "UNH", "LLY", "PFE", "MRK", "ABBV", "TMO", "SAN.PA", "NOVN.SW", "ROG.SW", "EL.PA",
+    # Consommation cyclique
+    "AMZN", "TSLA", "HD", "MCD", "NKE", "SBUX", "MC.PA", "RMS.PA", "KER.PA", "RNO.PA", "STLAM.MI",
+    # Consommation de base
+    "PG", "KO", "PEP", "WMT", "COST", "OR.PA", "BN.PA", "RI.PA", "CA.PA", "NESN.SW", "ULVR.L",
+    # Industrie
+    "CAT", "HON", "GE", "UPS", "BA", "AIR.PA", "SAF.PA", "SU.PA", "DG.PA", "SIE.DE", "ALO.PA",
+    # Énergie
+    "XOM", "CVX", "COP", "SLB", "EOG", "TTE.PA", "SHEL.L", "BP.L", "ENI.MI", "EQNR.OL",
+    # Immobilier
+    "PLD", "AMT", "EQIX", "SPG", "O", "PSA", "URW.PA", "GFC.PA", "COV.PA", "VNA.DE",
+    # Matériaux de base
+    "LIN", "APD", "SHW", "FCX", "NEM", "DOW", "AI.PA", "MT.AS", "BAS.DE", "RIO.L",
+    # Services publics
+    "NEE", "DUK", "SO", "D", "AEP", "EXC", "ENGI.PA", "VIE.PA", "IBE.MC", "ENEL.MI", "RWE.DE",
+]
+
+
+def univers_seuils():
+    tickers = os.environ.get("DASHBOARD_UNIVERS_SEUILS")
+    return [t.strip() for t in tickers.split(",") if t.strip()] if tickers else list(UNIVERS_PAR_DEFAUT)
+
+
+# ------------------------------------
+# --- Calcul (hors de l'affichage) ---
+# ------------------------------------
+def _numerique(infos, nom):
+    return pd.to_numeric(infos[nom], errors="coerce") if nom in infos.columns else pd.Series(np.nan, index=infos.index)
+
+
+def metriques_depuis_infos(infos):
+    """Une ligne par ticker : secteur + les métriques (mêmes règles que le Dashboard : PEG recalculé si absent)."""
+    per = _numerique(infos, "trailingPE")
+    croissance = _numerique(infos, "earningsGrowth")
+    peg = _numerique(infos, "pegRatio").fillna((per / (croissance * 100)).where((per > 0) & (croissance > 0)))
+
+    metriques = pd.DataFrame({
+        "secteur": infos["sector"] if "sector" in infos.columns else pd.Series(np.nan, index=infos.index),
+        "PER": per.where(per > 0), # PER négatif ou nul = non rentable : ne compte pas dans la distribution
+        "PEG": peg.where(peg > 0),
+    })
+    return metriques.dropna(subset=["secteur"])
+
+
+def calculer_seuils(metriques, percentiles=PERCENTILES, min_pairs=MIN_PAIRS):
+    """
+    Percentiles bas / haut de chaque métrique, par secteur et tous secteurs confondus (en une passe groupby).
+    Un secteur avec moins de `min_pairs` valeurs pour une métrique est omis (repli sur TOUS_SECTEURS à la lecture).
+    Renvoie {secteur: {métrique: [bas, haut]}}.
+    """
+    colonnes = list(METRIQUES)
+    quantiles = metriques.groupby("secteur")[colonnes].quantile(list(percentiles))
+    effectifs = metriques.groupby("secteur")[colonnes].count()
+    tous = metriques[colonnes].quantile(list(percentiles))
+
+    table = {TOUS_SECTEURS: {m: [round(float(v), 4) for v in tous[m]] for m in colonnes if metriques[m].count() >= min_pairs}}
+    for secteur in effectifs.index:
+        seuils_secteur = {}
+        for m in colonnes:
+            if effectifs.at[secteur, m] >= min_pairs:
+                seuils_secteur[m] = [round(float(v), 4) for v in quantiles.loc[secteur, m]]
+        if seuils_secteur:
+            table[secteur] = seuils_secteur
+    return table
+
+
+def recalculer_table(univers=None, fichier=FICHIER_SEUILS, max_workers=2):
+    """
+    Charge les .info de l'univers (via le cache : 2 appels en parallèle seulement, pour ménager Yahoo),
+    calcule les seuils et écrit la table (écriture atomique). Renvoie la nouvelle TableSeuils.
+    """
+    from utils.Telechargement_Groupe import charger_infos # Import ici : module lourd, inutile à l'affichage
+
+    univers = univers or univers_seuils()
+    metriques = metriques_depuis_infos(charger_infos(univers, max_workers=max_workers))
+    if len(metriques) < MIN_PAIRS:
+        # Fournisseur indisponible : on garde l'ancienne table plutôt que d'écrire une table vide
+        raise RuntimeError(f"seulement {len(metriques)} tickers avec des données")
+    table = {
+        "date": time.time(),
+        "nb_tickers": int(len(metriques)),
+        "percentiles": list(PERCENTILES),
+        "seuils": calculer_seuils(metriques),
+    }
+    fichier = Path(fichier)
+    fichier.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = fichier.with_suffix(".tmp")
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, indent=1)
+    os.replace(temporaire, fichier)
+    return TableSeuils(table)
+
+
+# -------------------------------
+# --- Lecture (à l'affichage) ---
+# -------------------------------
+class TableSeuils:
+    """Table secteur -> métrique -> [bas, haut]. Lecture en O(1) (deux accès dictionnaire), avec replis."""
+
+    def __init__(self, table=None):
+        table = table or {}
+        self.date = table.get("date", 0)
+        self.nb_tickers = table.get("nb_tickers", 0)
+        self._seuils = table.get("seuils", {})
+
+    @classmethod
+    def charger(cls, fichier=FICHIER_SEUILS):
+        try:
+            with open(fichier, encoding="utf-8") as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+    def age(self):
+        return time.time() - self.date
+
+    def seuils(self, metrique, secteur=None):
+        """Secteur -> tous secteurs -> valeurs par défaut du secteur -> valeurs par défaut globales."""
+        for table, cle in ((self._seuils, secteur), (self._seuils, TOUS_SECTEURS), (SEUILS_PAR_DEFAUT, secteur)):
+            valeurs = table.get(cle, {}).get(metrique)
+            if valeurs:
+                return valeurs
+        return SEUILS_PAR_DEFAUT[TOUS_SECTEURS][metrique]
+
+
+# --------------------------
+# --- TABLE PARTAGÉE ---
+# --------------------------
+_table = None
+_relue_le = 0.0
+_derniere_tentative = 0.0
+_verrou_seuils = threading.Lock()
+_verrou_calcul = threading.Lock()
+
+
+def get_seuils():
+    """
+    Table partagée (chargée depuis le disque). Plus vieille que AGE_MAX_SEUILS : relue au plus toutes les
+    INTERVALLE_RELECTURE secondes, au cas où le préchauffage l'aurait recalculée dans un autre processus.
+    Jamais de calcul ici : l'affichage continue avec la table actuelle (ou les valeurs par défaut).
+    """
+    global _table, _relue_le
+    with _verrou_seuils:
+        if _table is None or (_table.age() > AGE_MAX_SEUILS and time.time() - _relue_le > INTERVALLE_RELECTURE):
+            _table = TableSeuils.charger()
+            _relue_le = time.time()
+        return _table
+
+
+def mettre_a_jour_si_besoin(calcul_auto=CALCUL_AUTO):
+    """
+    Appel bloquant (tâche de fond du préchauffage) : recalcule la table si elle est absente ou plus vieille que
+    AGE_MAX_SEUILS, au plus une fois par PAUSE_ECHEC. Renvoie True si une nouvelle table a été calculée.
+    """
+    global _table, _derniere_tentative
+    if not calcul_auto or get_seuils().age() <= AGE_MAX_SEUILS or not _verrou_calcul.acquire(blocking=False):
+        return False
+    try:
+        if time.time() - _derniere_tentative <= PAUSE_ECHEC:
+            return False
+        _derniere_tentative = time.time()
+        nouvelle = recalculer_table()
+        with _verrou_seuils:
+            _table = nouvelle
+        return True
+    except Exception as e:
+        print(f"Erreur calcul des seuils par secteur : {e}")
+        return False
+    finally:
+        _verrou_calcul.release()
+
+
+def seuils(metrique, secteur=None):
+    return get_seuils().seuils(metrique, secteur)
+
+
+if __name__ == "__main__":
+    table = recalculer_table()
+    print(f"Seuils calculés sur {table.nb_tickers} tickers -> {FICHIER_SEUILS}")
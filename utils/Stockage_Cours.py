@@ -0,0 +1,282 @@
+# -------------------------------------------------------
+# --- Stockage local des cours (Parquet, par ticker) ---
+# -------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - StockageCours : historique OHLCV journalier sur le disque, une partition (dossier) par ticker
+        - lire : lecture locale (Parquet mappé en mémoire), filtrée sur start/end
+        - synchroniser : ne télécharge que les barres manquantes depuis la dernière synchro, ajoutées dans un nouveau fichier
+        - historique : synchronise (si besoin) puis lit en local
+        - compacter : regroupe les fichiers d'une partition quand il y en a trop
+    - get_stockage : instance unique, partagée par toute l'application
+
+    Organisation du dossier :
+        <dossier>/<TICKER>/part-00000.parquet, part-00001.parquet...   (écrits à côté puis renommés : jamais lus à moitié)
+        <dossier>/<TICKER>/_manifeste.json                              (fichiers actifs, ordre chronologique)
+        <dossier>/<TICKER>/_sync.json                                   (date de la dernière synchronisation)
+        <dossier>/<TICKER>/_verrou                                      (verrou lecture/écriture, entre processus)
+
+    Une modification (ajout, remplacement, compactage) écrit ses fichiers, puis remplace le manifeste d'un coup
+    (os.replace) : un lecteur voit l'ancien ou le nouvel état, jamais un mélange. Les anciens fichiers ne sont
+    supprimés que sous verrou exclusif, quand plus aucune lecture n'est en cours (le préchauffage peut tourner
+    dans un autre processus).
+
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl # Verrou de fichier partagé entre processus (Linux, macOS)
+except ImportError:
+    fcntl = None
+
+import pandas as pd
+
+from utils.Disjoncteur import get_disjoncteur
+from utils.Fournisseur_Donnees import _slug, get_fournisseur
+from utils.Mesures import chrono
+
+DOSSIER_STOCKAGE = Path(os.environ.get("DASHBOARD_STOCKAGE_COURS", Path(__file__).resolve().parent.parent / ".stockage_cours"))
+
+INTERVALLE_SYNC = 15 * 60 # Pas de nouvel appel réseau si la dernière synchro a moins de 15 min (comme le TTL des cotations)
+MAX_FICHIERS = 20 # Au-delà, la partition est compactée en un seul fichier
+TOLERANCE_AJUSTEMENT = 1e-6 # Écart relatif toléré sur la barre commune (sinon : split/dividende -> historique ajusté à recharger)
+
+
+class StockageCours:
+
+    def __init__(self, dossier=DOSSIER_STOCKAGE, fournisseur=None, intervalle_sync=INTERVALLE_SYNC):
+        self.dossier = Path(dossier)
+        self.fournisseur = fournisseur
+        self.intervalle_sync = intervalle_sync
+        self._verrous = {}
+        self._verrou_global = threading.Lock()
+
+    # --- Outils internes ---
+    def _verrou(self, ticker, usage="synchro"):
+        with self._verrou_global:
+            return self._verrous.setdefault((usage, ticker.upper()), threading.Lock())
+
+    def _partition(self, ticker):
+        return self.dossier / _slug(ticker)
+
+    @contextlib.contextmanager
+    def _acces(self, ticker, exclusif=False):
+        """
+        Verrou lecture/écriture de la partition, entre threads comme entre processus : lectures partagées,
+        modifications exclusives. Non réentrant (pas d'appel imbriqué). Sans fcntl (Windows) : verrou exclusif
+        propre au processus.
+        """
+        partition = self._partition(ticker)
+        if exclusif:
+            partition.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            with self._verrou(ticker, "fichiers"):
+                yield
+            return
+        if not partition.exists():
+            yield # Rien à lire
+            return
+        with open(partition / "_verrou", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusif else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _fichiers(self, ticker):
+        """Fichiers actifs, d'après le manifeste (partition écrite avant le manifeste : tous les part-*.parquet)."""
+        partition = self._partition(ticker)
+        try:
+            with open(partition / "_manifeste.json", encoding="utf-8") as f:
+                return [partition / nom for nom in json.load(f)["fichiers"]]
+        except (OSError, ValueError, KeyError):
+            return sorted(partition.glob("part-*.parquet")) if partition.exists() else []
+
+    def _ecrire_json(self, chemin, contenu):
+        """Écriture atomique (fichier temporaire puis os.replace)."""
+        temporaire = chemin.with_name(f"{chemin.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(contenu, f)
+        os.replace(temporaire, chemin)
+
+    def _lire_sync(self, ticker):
+        try:
+            with open(self._partition(ticker) / "_sync.json", encoding="utf-8") as f:
+                return json.load(f).get("derniere_sync", 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _ecrire_sync(self, ticker):
+        self._ecrire_json(self._partition(ticker) / "_sync.json", {"derniere_sync": time.time()})
+
+    def _publier(self, ticker, fichiers):
+        """Remplace le manifeste : les lecteurs passent d'un coup à la nouvelle liste de fichiers."""
+        self._ecrire_json(self._partition(ticker) / "_manifeste.json", {"fichiers": [f.name for f in fichiers]})
+
+    def _nouveau_fichier(self, ticker, barres):
+        """Sous verrou exclusif : écrit `barres` dans un nouveau part-*.parquet (temporaire renommé une fois complet)."""
+        partition = self._partition(ticker)
+        numeros = [int(f.stem.split("-")[1]) for f in partition.glob("part-*.parquet")]
+        fichier = partition / f"part-{max(numeros, default=-1) + 1:05d}.parquet"
+        temporaire = fichier.with_suffix(".tmp")
+        barres = barres.copy()
+        barres.index.name = "Date"
+        barres.to_parquet(temporaire)
+        os.replace(temporaire, fichier)
+        return fichier
+
+    def _ajouter(self, ticker, barres):
+        """Sous verrou exclusif : écrit les nouvelles barres dans un nouveau fichier (les anciens ne sont pas réécrits)."""
+        fichiers = self._fichiers(ticker) + [self._nouveau_fichier(ticker, barres)]
+        self._publier(ticker, fichiers)
+        if len(fichiers) > MAX_FICHIERS:
+            self._remplacer(ticker, self._lire_fichiers(fichiers))
+
+    def _remplacer(self, ticker, barres):
+        """
+        Sous verrou exclusif : remplace toute la partition par `barres`. Nouveau fichier écrit, puis manifeste remplacé,
+        puis seulement suppression des anciens fichiers (et des restes d'une écriture interrompue).
+        """
+        fichier = self._nouveau_fichier(ticker, barres)
+        self._publier(ticker, [fichier])
+        for ancien in self._partition(ticker).glob("part-*"):
+            if ancien != fichier:
+                ancien.unlink(missing_ok=True)
+
+    def _lire_fichiers(self, fichiers, columns=None):
+        parties = [pd.read_parquet(f, columns=columns, memory_map=True) for f in fichiers]
+        hist = pd.concat(parties) if len(parties) > 1 else parties[0]
+        # Une barre peut être réécrite (dernière séance incomplète) : on garde la version la plus récente
+        return hist[~hist.index.duplicated(keep="last")].sort_index(kind="stable")
+
+    # --- API publique ---
+    def lire(self, ticker, start=None, end=None, columns=None):
+        """
+        Historique local du ticker (aucun appel réseau). Les fichiers sont lus en mémoire mappée :
+        seules les colonnes demandées sont chargées.
+        """
+        with self._acces(ticker):
+            fichiers = self._fichiers(ticker)
+            if not fichiers:
+                return pd.DataFrame()
+            hist = self._lire_fichiers(fichiers, columns=columns)
+
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start).tz_localize(hist.index.tz)]
+        if end is not None:
+            hist = hist[hist.index < pd.Timestamp(end).tz_localize(hist.index.tz)]
+        return hist
+
+    def age_synchro(self, ticker):
+        """Secondes écoulées depuis la dernière synchronisation du ticker (inf si jamais synchronisé)."""
+        derniere = self._lire_sync(ticker)
+        return time.time() - derniere if derniere else float("inf")
+
+    def derniere_date(self, ticker):
+        with self._acces(ticker):
+            fichiers = self._fichiers(ticker)
+            if not fichiers:
+                return None
+            return pd.read_parquet(fichiers[-1], columns=["Close"], memory_map=True).index.max()
+
+    def _dernieres_clotures(self, ticker, n=2):
+        """Clôtures des n dernières séances stockées (en partant du dernier fichier : pas de lecture complète)."""
+        parties, clotures = [], pd.Series(dtype=float)
+        with self._acces(ticker):
+            for fichier in reversed(self._fichiers(ticker)):
+                parties.insert(0, pd.read_parquet(fichier, columns=["Close"], memory_map=True)["Close"])
+                clotures = pd.concat(parties) if len(parties) > 1 else parties[0]
+                clotures = clotures[~clotures.index.duplicated(keep="last")].sort_index(kind="stable")
+                if len(clotures) >= n:
+                    return clotures.iloc[-n:]
+        return clotures
+
+    def synchroniser(self, ticker, force=False, fournisseur=None):
+        """
+        Ajoute uniquement les barres manquantes depuis la dernière date stockée.
+        La barre de contrôle (avant-dernière séance stockée : close, contrairement à la dernière qui peut être
+        la séance en cours) est re-téléchargée : si elle a changé (cours ajustés après un split ou un dividende),
+        tout l'historique est rechargé, puis remplace l'ancien une fois le téléchargement réussi.
+        Renvoie le nombre de barres reçues.
+        Les appels passent par le disjoncteur : fournisseur en panne -> CircuitOuvert immédiat (pas d'attente).
+        """
+        with self._verrou(ticker):
+            if not force and time.time() - self._lire_sync(ticker) < self.intervalle_sync:
+                return 0
+
+            fournisseur = fournisseur or self.fournisseur or get_fournisseur()
+            disjoncteur = get_disjoncteur("donnees")
+            clotures = self._dernieres_clotures(ticker)
+
+            def telecharger(**options):
+                with chrono("fournisseur.history"):
+                    return disjoncteur.appeler(lambda: fournisseur.history(ticker, auto_adjust=True, **options))
+
+            if clotures.empty:
+                barres = telecharger(period="max")
+            else:
+                # Contrôle sur une séance close (une seule barre stockée : elle est réécrite, sans contrôle)
+                controle = clotures.index[0]
+                debut = controle.tz_localize(None) if controle.tzinfo else controle
+                barres = telecharger(start=debut.strftime("%Y-%m-%d"))
+
+                if len(clotures) > 1 and not barres.empty and controle in barres.index:
+                    ancienne = clotures.iloc[0]
+                    nouvelle = barres.loc[controle, "Close"]
+                    if abs(nouvelle - ancienne) > TOLERANCE_AJUSTEMENT * abs(ancienne):
+                        # Historique ajusté modifié : rechargé en entier, l'ancien reste en place si le téléchargement échoue
+                        barres = telecharger(period="max")
+                        with self._acces(ticker, exclusif=True):
+                            if not barres.empty:
+                                self._remplacer(ticker, barres)
+                            self._ecrire_sync(ticker)
+                        return len(barres)
+
+            with self._acces(ticker, exclusif=True):
+                if not barres.empty:
+                    self._ajouter(ticker, barres)
+                self._ecrire_sync(ticker)
+            return len(barres)
+
+    def historique(self, ticker, start=None, end=None, columns=None, fournisseur=None):
+        """
+        Synchronise le ticker si besoin (barres manquantes seulement), puis lit en local.
+        Si le fournisseur est en erreur, on sert ce qui est déjà stocké (s'il y a quelque chose).
+        """
+        try:
+            self.synchroniser(ticker, fournisseur=fournisseur)
+        except Exception as e:
+            if not self._fichiers(ticker):
+                raise
+            print(f"Erreur synchronisation {ticker} : {e}")
+        return self.lire(ticker, start=start, end=end, columns=columns)
+
+    def compacter(self, ticker):
+        """Regroupe toutes les parties de la partition en un seul fichier."""
+        with self._acces(ticker, exclusif=True):
+            fichiers = self._fichiers(ticker)
+            if fichiers:
+                self._remplacer(ticker, self._lire_fichiers(fichiers))
+
+
+# --------------------------
+# --- INSTANCE PARTAGÉE ---
+# --------------------------
+_stockage = None
+_verrou_stockage = threading.Lock()
+
+def get_stockage():
+    global _stockage
+    with _verrou_stockage:
+        if _stockage is None:
+            _stockage = StockageCours()
+        return _stockage
@@ -0,0 +1,274 @@
+# ----------------------------------------------------------------
+# --- Table du screener (métriques pré-calculées, en colonnes) ---
+# ----------------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - COLONNES_METRIQUES : métriques filtrables (mêmes calculs que l'onglet Analyse fondamentale et les jauges)
+    - calculer_metriques : une ligne de métriques par ticker (.info, puis ROIC et CAGR calculés pour tout le lot)
+    - TableScreener : table complète (une colonne NumPy par métrique), enregistrée en Parquet
+        - rafraichir : incrémental, ne recalcule que les tickers absents ou trop vieux, enregistre après chaque lot
+        - filtrer : masque booléen vectorisé (min / max par colonne, secteurs) puis tri, sans aucun appel réseau
+    - get_table_screener : table partagée, relue seulement si le fichier a changé
+    - demarrer_rafraichissement : mise à jour en arrière-plan (un seul thread à la fois)
+
+    Les métriques ne sont jamais calculées au moment d'une recherche : la page ne fait que filtrer la table.
+    Mise à jour manuelle (ex: tâche planifiée) : python -m utils.Table_Screener [fichier_tickers.txt]
+
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.Cache_Donnees import DOSSIER_CACHE, UN_JOUR, TickerEnCache
+from utils.Seuils_Secteurs import univers_seuils
+
+# --------------------------------
+# --- Réglages de la table ---
+# --------------------------------
+FICHIER_SCREENER = DOSSIER_CACHE / "screener.parquet"
+AGE_MAX_LIGNE = UN_JOUR # Une ligne plus vieille est recalculée au prochain rafraîchissement
+TAILLE_LOT_SCREENER = 50 # La table est enregistrée après chaque lot (un arrêt ne perd pas tout le travail fait)
+MAX_WORKERS_SCREENER = 4 # Tickers calculés en parallèle (chacun lance déjà ses appels en parallèle)
+
+# Données nécessaires (pas d'historique de cours : inutile pour les métriques)
+DONNEES_SCREENER = ("info", "dividends", "financials", "quarterly_financials", "balance_sheet",
+                    "quarterly_balance_sheet", "cashflow", "quarterly_cashflow")
+
+# Colonnes filtrables (float64) -> format d'affichage
+COLONNES_METRIQUES = {
+    "Marge nette": "percent",
+    "ROE": "percent",
+    "ROIC": "percent",
+    "PER": "%.1f",
+    "PEG": "%.2f",
+    "CAGR Revenus": "percent",
+    "CAGR FCF": "percent",
+    "CAGR EPS": "percent",
+    "CAGR Dividendes": "percent",
+}
+# Série de utils.Croissance -> colonne de la table
+COLONNES_CAGR = {"revenus": "CAGR Revenus", "fcf": "CAGR FCF", "eps": "CAGR EPS", "dividendes": "CAGR Dividendes"}
+COLONNES_TEXTE = ["Nom", "Secteur", "Devise"]
+COLONNE_DATE = "Mise à jour" # Horodatage (secondes) du calcul de la ligne
+
+
+def univers_screener():
+    """
+    Tickers suivis par le screener : DASHBOARD_UNIVERS_SCREENER = liste "AAPL,MSFT,..." ou chemin d'un fichier
+    (un ticker par ligne). Par défaut : l'univers des seuils par secteur.
+    """
+    valeur = os.environ.get("DASHBOARD_UNIVERS_SCREENER")
+    if not valeur:
+        return univers_seuils()
+    if os.path.isfile(valeur):
+        with open(valeur, encoding="utf-8") as f:
+            valeur = f.read().replace("\n", ",")
+    return list(dict.fromkeys(t.strip().upper() for t in valeur.split(",") if t.strip()))
+
+
+def table_vide():
+    table = pd.DataFrame({
+        **{c: pd.Series(dtype=object) for c in COLONNES_TEXTE},
+        **{c: pd.Series(dtype=float) for c in COLONNES_METRIQUES},
+        COLONNE_DATE: pd.Series(dtype=float),
+    })
+    table.index.name = "Ticker"
+    return table
+
+
+# ------------------------------------
+# --- Calcul (hors de la recherche) ---
+# ------------------------------------
+def _metriques_info(snapshot):
+    """Partie .info d'un ticker (mêmes valeurs que l'onglet Analyse fondamentale et les jauges)."""
+    info = snapshot.info
+    per = info.get("trailingPE")
+    peg = info.get("pegRatio")
+    croissance = info.get("earningsGrowth")
+    if peg is None and per and croissance and croissance > 0:
+        peg = per / (croissance * 100) # Même repli que la jauge PEG du Dashboard
+
+    return {
+        "Nom": info.get("shortName", snapshot.ticker),
+        "Secteur": info.get("sector"),
+        "Devise": info.get("currency"),
+        "Marge nette": info.get("profitMargins") if info.get("profitMargins") is not None else np.nan,
+        "ROE": info.get("returnOnEquity") if info.get("returnOnEquity") is not None else np.nan,
+        "PER": per if per and per > 0 else np.nan, # PER négatif ou absent = non rentable
+        "PEG": peg if peg and peg > 0 else np.nan,
+    }
+
+
+def calculer_metriques(tickers, cache=None, max_workers=MAX_WORKERS_SCREENER):
+    """
+    Métriques d'un lot de tickers (via le cache : un ticker déjà consulté ne refait aucun appel).
+    Le ROIC est calculé pour tout le lot en une passe (utils.Moteur_ROIC).
+    Renvoie un DataFrame au format de la table (les tickers sans .info sont omis).
+    """
+    from utils.Donnees_Financieres import charger_snapshot
+    from utils.Croissance import croissance_lot
+    from utils.Moteur_ROIC import roic_tickers
+
+    def _snapshot(ticker):
+        try:
+            return charger_snapshot(TickerEnCache(ticker, cache=cache), ticker, donnees=DONNEES_SCREENER)
+        except Exception as e:
+            print(f"Erreur screener {ticker} : {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="screener") as pool:
+        snapshots = [s for s in pool.map(_snapshot, tickers) if s is not None and s.info]
+    if not snapshots:
+        return table_vide()
+
+    lot = {s.ticker: s for s in snapshots}
+    table = pd.DataFrame([_metriques_info(s) for s in snapshots], index=pd.Index(list(lot), name="Ticker"))
+    resume_roic, _ = roic_tickers(lot)
+    table["ROIC"] = resume_roic["roic_ttm"].fillna(resume_roic["roic_annuel"])
+    # CAGR (4 ans -> LTM) de tout le lot en une passe NumPy ; NaN si non calculable (départ négatif ou nul...)
+    for nom, (_, _, cagr, _) in croissance_lot(lot).items():
+        table[COLONNES_CAGR[nom]] = cagr
+    table[COLONNE_DATE] = time.time()
+    return table.reindex(columns=table_vide().columns).astype(table_vide().dtypes.to_dict())
+
+
+# -------------------
+# --- Table ---
+# -------------------
+class TableScreener:
+    """Métriques de tout l'univers, une colonne par métrique (lecture en colonnes : NumPy, pas de boucle par ticker)."""
+
+    def __init__(self, table=None, fichier=FICHIER_SCREENER):
+        self.table = table if table is not None else table_vide()
+        self.fichier = Path(fichier)
+        self._verrou = threading.Lock()
+
+    @classmethod
+    def charger(cls, fichier=FICHIER_SCREENER):
+        try:
+            return cls(pd.read_parquet(fichier), fichier)
+        except (OSError, ValueError) as e:
+            if Path(fichier).exists():
+                print(f"Erreur lecture de la table du screener : {e}")
+            return cls(fichier=fichier)
+
+    def enregistrer(self):
+        self.fichier.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = self.fichier.with_suffix(".tmp")
+        self.table.to_parquet(temporaire)
+        os.replace(temporaire, self.fichier) # Écriture atomique : un lecteur ne voit jamais une table à moitié écrite
+
+    def a_rafraichir(self, tickers, age_max=AGE_MAX_LIGNE):
+        """Tickers absents de la table ou calculés il y a plus de `age_max` secondes."""
+        dates = self.table[COLONNE_DATE].reindex(tickers)
+        return list(dates.index[dates.isna() | (dates < time.time() - age_max)])
+
+    def rafraichir(self, tickers, age_max=AGE_MAX_LIGNE, taille_lot=TAILLE_LOT_SCREENER, cache=None):
+        """
+        Mise à jour incrémentale : seuls les tickers absents ou trop vieux sont recalculés, par lots,
+        et la table est enregistrée après chaque lot. Renvoie le nombre de lignes mises à jour.
+        """
+        a_calculer = self.a_rafraichir(list(dict.fromkeys(t.strip().upper() for t in tickers)), age_max)
+        mises_a_jour = 0
+        for i in range(0, len(a_calculer), taille_lot):
+            lot = calculer_metriques(a_calculer[i:i + taille_lot], cache=cache)
+            if lot.empty:
+                continue
+            with self._verrou:
+                # Nouvelle table (pas de modification en place : les recherches en cours gardent l'ancienne)
+                self.table = pd.concat([self.table.drop(lot.index, errors="ignore"), lot]).sort_index()
+                self.enregistrer()
+            mises_a_jour += len(lot)
+        return mises_a_jour
+
+    def filtrer(self, criteres=None, secteurs=None, tri=None, croissant=True, limite=None):
+        """
+        criteres : {colonne: (min, max)} ; None = pas de borne. Une valeur manquante (NaN) ne passe aucun filtre borné.
+        secteurs : liste de secteurs (valeurs brutes de .info) ; None ou vide = tous.
+        tri : colonne de tri (NaN toujours en fin de liste). limite : nombre maximum de lignes renvoyées.
+        Tout est fait sur les tableaux NumPy des colonnes : un masque booléen, un argsort, une seule extraction.
+        """
+        table = self.table
+        masque = np.ones(len(table), dtype=bool)
+        for colonne, (minimum, maximum) in (criteres or {}).items():
+            valeurs = table[colonne].to_numpy(dtype=float)
+            if minimum is not None:
+                masque &= valeurs >= minimum
+            if maximum is not None:
+                masque &= valeurs <= maximum
+        if secteurs:
+            masque &= table["Secteur"].isin(secteurs).to_numpy()
+
+        positions = np.flatnonzero(masque)
+        if tri is not None:
+            valeurs = table[tri].to_numpy(dtype=float)[positions]
+            # argsort stable ; NaN -> +inf (croissant) ou -inf (décroissant) pour finir en bas de la liste
+            cles = np.where(np.isnan(valeurs), np.inf, valeurs) if croissant else -np.where(np.isnan(valeurs), -np.inf, valeurs)
+            positions = positions[np.argsort(cles, kind="stable")]
+        if limite is not None:
+            positions = positions[:limite]
+        return table.iloc[positions]
+
+
+# --------------------------
+# --- TABLE PARTAGÉE ---
+# --------------------------
+_table_screener = None
+_date_fichier = None
+_rafraichissement = None
+_verrou_screener = threading.Lock()
+
+def get_table_screener(fichier=FICHIER_SCREENER):
+    """Table partagée : relue depuis le disque uniquement si le fichier a changé (ex: mise à jour par une autre tâche)."""
+    global _table_screener, _date_fichier
+    with _verrou_screener:
+        try:
+            date_fichier = os.path.getmtime(fichier)
+        except OSError:
+            date_fichier = None
+        if _table_screener is None or date_fichier != _date_fichier:
+            _table_screener = TableScreener.charger(fichier)
+            _date_fichier = date_fichier
+        return _table_screener
+
+
+def _rafraichir_arriere_plan(tickers):
+    try:
+        get_table_screener().rafraichir(tickers)
+    except Exception as e:
+        print(f"Erreur mise à jour du screener : {e}")
+
+
+def demarrer_rafraichissement(tickers=None):
+    """Lance la mise à jour incrémentale dans un thread (sauf si une mise à jour tourne déjà). Renvoie True si lancée."""
+    global _rafraichissement
+    with _verrou_screener:
+        if _rafraichissement is not None and _rafraichissement.is_alive():
+            return False
+        _rafraichissement = threading.Thread(target=_rafraichir_arriere_plan, args=(tickers or univers_screener(),),
+                                             name="screener", daemon=True)
+        _rafraichissement.start()
+        return True
+
+
+def rafraichissement_en_cours():
+    return _rafraichissement is not None and _rafraichissement.is_alive()
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        os.environ["DASHBOARD_UNIVERS_SCREENER"] = sys.argv[1]
+    univers = univers_screener()
+    table = TableScreener.charger()
+    nombre = table.rafraichir(univers)
+    print(f"{nombre} tickers mis à jour sur {len(univers)} -> {FICHIER_SCREENER}")
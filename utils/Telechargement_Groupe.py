@@ -0,0 +1,165 @@
+# ----------------------------------------------------------
+# --- Téléchargement groupé (plusieurs centaines de tickers) ---
+# ----------------------------------------------------------
+
+"""
+
+Sommaire :
+
+    - telecharger_cours_groupes : historique de N tickers par lots (yf.download), avec nouvelles tentatives,
+      fusionné en un seul DataFrame large (colonnes = (champ, ticker))
+    - cours_de_cloture : matrice des clôtures (dates x tickers), prête pour les calculs vectorisés
+    - charger_infos : .info de N tickers en parallèle (via le cache)
+    - tableau_watchlist : Prix, performance YTD, PER et PEG de toute une liste de tickers
+
+"""
+
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.Cache_Donnees import TickerEnCache, get_cache
+from utils.Fournisseur_Donnees import get_fournisseur
+from utils.Indicateurs import calculate_universe_performance
+
+TAILLE_LOT = 100 # Nombre de tickers par appel à yf.download
+TENTATIVES = 3 # Nombre d'essais pour les tickers qui n'ont rien renvoyé
+PAUSE_TENTATIVE = 1.0 # Pause (secondes) avant un nouvel essai, doublée à chaque fois
+
+
+def _normaliser_tickers(tickers):
+    """Majuscules, sans espaces ni doublons, en gardant l'ordre."""
+    return list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+
+
+def _tickers_sans_donnees(cours, tickers):
+    """Tickers absents du résultat, ou dont toutes les clôtures sont vides."""
+    if cours.empty or "Close" not in cours.columns.get_level_values(0):
+        return list(tickers)
+    cloture = cours["Close"]
+    return [t for t in tickers if t not in cloture.columns or cloture[t].isna().all()]
+
+
+def _telecharger_lot(lot, fournisseur, **kwargs):
+    """Un lot = un appel groupé. Les tickers sans données sont retentés (backoff exponentiel)."""
+    cours = pd.DataFrame()
+    a_telecharger = lot
+    pause = PAUSE_TENTATIVE
+
+    for tentative in range(TENTATIVES):
+        try:
+            resultat = fournisseur.download(a_telecharger, **kwargs)
+        except Exception as e:
+            print(f"Erreur téléchargement groupé ({len(a_telecharger)} tickers) : {e}")
+            resultat = pd.DataFrame()
+
+        if not resultat.empty:
+            # On ne garde que les colonnes des tickers qui ont réellement des données
+            manquants = set(_tickers_sans_donnees(resultat, a_telecharger))
+            obtenus = [t for t in a_telecharger if t not in manquants]
+            resultat = resultat.loc[:, resultat.columns.get_level_values(1).isin(obtenus)]
+            cours = resultat if cours.empty else cours.join(resultat, how="outer")
+
+        a_telecharger = _tickers_sans_donnees(cours, lot)
+        if not a_telecharger or tentative == TENTATIVES - 1:
+            break
+        time.sleep(pause)
+        pause *= 2
+
+    return cours
+
+
+def telecharger_cours_groupes(tickers, taille_lot=TAILLE_LOT, fournisseur=None, cache=None, **kwargs):
+    """
+    Télécharge l'historique de tous les tickers par lots de `taille_lot` (au lieu de N appels Ticker.history),
+    et renvoie un seul DataFrame large : index = dates, colonnes = (champ, ticker).
+    Chaque lot complet est mis en cache (TTL court, comme l'historique d'un ticker seul) ; un lot où des tickers
+    n'ont rien renvoyé est servi sans être mis en cache, pour que ces tickers soient redemandés au prochain appel.
+    kwargs : paramètres de yf.download (start, end, period, interval...).
+    """
+    tickers = _normaliser_tickers(tickers)
+    fournisseur = fournisseur or get_fournisseur()
+    cache = cache or get_cache()
+    variante = repr(sorted(kwargs.items()))
+
+    lots = []
+    for i in range(0, len(tickers), taille_lot):
+        lot = tickers[i:i + taille_lot]
+        cours = cache.get_or_fetch(",".join(lot), "cours_groupes", lambda lot=lot: _telecharger_lot(lot, fournisseur, **kwargs),
+                                   variante=variante, a_garder=lambda cours, lot=lot: not _tickers_sans_donnees(cours, lot))
+        if not cours.empty:
+            lots.append(cours)
+
+    if not lots:
+        return pd.DataFrame()
+    cours = pd.concat(lots, axis=1).sort_index()
+    cours = cours.loc[:, ~cours.columns.duplicated()]
+    return cours.sort_index(axis=1, level=0, sort_remaining=False)
+
+
+def cours_de_cloture(cours):
+    """Matrice des clôtures (dates x tickers). Les jours fériés propres à une place sont complétés par la veille."""
+    if cours.empty:
+        return pd.DataFrame()
+    return cours["Close"].ffill()
+
+
+def charger_infos(tickers, max_workers=8, cache=None):
+    """
+    .info de chaque ticker (il n'existe pas d'équivalent groupé chez Yahoo) : appels en parallèle,
+    chacun passant par le cache disque (15 min). Renvoie un DataFrame : une ligne par ticker.
+    """
+    tickers = _normaliser_tickers(tickers)
+
+    def _info(ticker):
+        try:
+            return TickerEnCache(ticker, cache=cache).info or {}
+        except Exception as e:
+            print(f"Erreur info {ticker} : {e}")
+            return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="infos_groupees") as pool:
+        infos = list(pool.map(_info, tickers))
+    return pd.DataFrame(infos, index=tickers)
+
+
+def _colonne(df, nom):
+    return pd.to_numeric(df[nom], errors="coerce") if nom in df.columns else pd.Series(np.nan, index=df.index)
+
+
+def tableau_watchlist(tickers, cache=None):
+    """
+    Une ligne par ticker : Nom, Prix, Devise, YTD (%), PER, PEG.
+    Les cours arrivent en un seul DataFrame large et la performance YTD est calculée pour
+    toutes les colonnes à la fois (calculate_universe_performance).
+    """
+    tickers = _normaliser_tickers(tickers)
+    if not tickers:
+        return pd.DataFrame()
+
+    annee_precedente = datetime.date.today().year - 1
+    cloture = cours_de_cloture(telecharger_cours_groupes(tickers, start=f"{annee_precedente}-12-20", cache=cache))
+    infos = charger_infos(tickers, cache=cache)
+
+    # --- Prix (info en priorité, sinon dernière clôture) et performance YTD vectorisée ---
+    dernier = cloture.iloc[-1].reindex(tickers) if not cloture.empty else pd.Series(np.nan, index=tickers)
+    prix = _colonne(infos, "currentPrice").fillna(_colonne(infos, "regularMarketPrice")).fillna(dernier)
+    performances, _ = calculate_universe_performance(cloture.reindex(columns=tickers), current_prices=prix)
+
+    # --- PER et PEG (même logique que les jauges du Dashboard) ---
+    per = _colonne(infos, "trailingPE")
+    croissance = _colonne(infos, "earningsGrowth")
+    peg_calcule = (per / (croissance * 100)).where((per > 0) & (croissance > 0))
+    peg = _colonne(infos, "pegRatio").fillna(peg_calcule)
+
+    return pd.DataFrame({
+        "Nom": infos["shortName"] if "shortName" in infos.columns else pd.Series(tickers, index=tickers),
+        "Prix": prix,
+        "Devise": infos["currency"] if "currency" in infos.columns else "",
+        "YTD (%)": performances["YTD"],
+        "PER": per,
+        "PEG": peg,
+    }, index=tickers)
@@ -8,8 +8,10 @@ Sommaire du fichier :
     - 00.1 - Importation des librairies
     - 00.2 - Importation de nos fonctions
     - 00.3 - Réglage de notre page
-    - 1 - BARRE LATÉRALE DE RECHERCHE
-    - 2 - AFFICHAGE PRINCIPAL
+    - 1 - BARRE LATÉRALE DE RECHERCHE (fragment)
+    - 2 - CHARGEMENT DES DONNÉES
+    - 3 - BANDEAUX (fragments : en-tête/prix, jauges, analyse fondamentale)
+    - 4 - AFFICHAGE PRINCIPAL (onglets)
 
 """
 # -----------------------------------------
@@ -18,45 +20,59 @@ Sommaire du fichier :
 import streamlit as st
 st.set_page_config(page_title="Dashboard", page_icon="🚀", layout="wide") 
 
-
-import yfinance as yf
-from streamlit_searchbox import st_searchbox
-
 # -------------------------------------------
 # --- 00.2 - Importation de nos fonctions ---
 # -------------------------------------------
+# Seulement ce qu'il faut pour la page d'accueil (titre, recherche) : les modules de calcul et de graphiques
+# (pandas, plotly, ~0,6 s sur un worker neuf) sont importés à leur première utilisation, dans les bandeaux.
+# Budget vérifié par benchmarks/bench_import.py.
 from utils.Barre_de_recherche import search_wrapper
 from utils.Styles import style_CSS
-from utils.Fonctions_Autre import get_currency_symbol, translate_sector
-from utils.Indicateurs import calculate_ytd_performance
-from utils.Graphiques import create_gauge
-from utils.Analyse_Financiere import afficher_onglet_finance
-from utils.Glossaire.Onglet_Glossaire import afficher_onglet_glossaire
+from utils.Fonctions_Autre import formater_age, get_currency_symbol, translate_sector
+from utils.Disjoncteur import CircuitOuvert
+from utils.Prechauffage import demarrer_prechauffage, enregistrer_consultation
+from utils.Panneau_Mesures import afficher_panneau_mesures
 
 # ------------------------------------
 # --- 00.3 - Réglage de notre page ---
 # ------------------------------------
 st.title("Dashboard")
 style_CSS() # Application de notre style CSS
+demarrer_prechauffage() # Garde au chaud les tickers les plus consultés (une seule fois par processus)
 
 # ---------------------------------------
 # --- 1 - BARRE LATÉRALE DE RECHERCHE ---
 # ---------------------------------------
-with st.sidebar:
+# Gestion anti-crash (écran blanc lors du chargement des données)
+if "ticker" not in st.session_state:
+    st.session_state.ticker = None
+
+@st.fragment
+def barre_de_recherche():
+    """
+    Fragment : taper dans la barre ne relance que la barre (pas de CSS, pas de chargement de données).
+    Toute la page n'est relancée que lorsqu'un nouvel actif est choisi.
+    """
+    from streamlit_searchbox import st_searchbox # Composant : déclaré après l'affichage du titre et du style
+
     st.header("Chercher un actif")
 
     selected = st_searchbox(
         search_wrapper,
         key="asset_search_box",
         placeholder="Rechercher...",
-        clear_on_submit=False
+        clear_on_submit=False,
+        debounce=300, # On attend 300 ms sans frappe avant de lancer la recherche
+        rerun_scope="fragment"
     )
-# Gestion anti-crash (écran blanc lors du chargement des données)
-if "ticker" not in st.session_state:
-    st.session_state.ticker = None
+    if selected and isinstance(selected, str) and selected.strip() and selected.strip() != st.session_state.ticker:
+        st.session_state.ticker = selected.strip()
+        enregistrer_consultation(st.session_state.ticker) # Popularité : sert au préchauffage du cache
+        st.rerun(scope="app") # Nouvel actif : toute la page change
 
-if selected and isinstance(selected, str) and selected.strip():
-    st.session_state.ticker = selected.strip()
+with st.sidebar:
+    barre_de_recherche()
+    afficher_panneau_mesures() # Administration uniquement (DASHBOARD_ADMIN=1, ou ?admin=1 en lecture seule)
 
 ticker = st.session_state.ticker
 
@@ -67,44 +83,56 @@ if not ticker:
 # ----------------------------------
 # --- 2 - Chargement des données ---
 # ----------------------------------
+# Chaque bandeau charge uniquement ses propres données (tout passe par le cache : un bandeau relancé seul
+# ne refait pas les appels des autres)
+def charger(ticker, *donnees):
+    from utils.Cache_Donnees import TickerEnCache
+    from utils.Donnees_Financieres import charger_snapshot
+    return charger_snapshot(TickerEnCache(ticker), ticker, donnees=donnees or None)
+
 with st.spinner('Chargement des données...'):
     try:
-        stock = yf.Ticker(ticker) # Appel à yfinance pour vérifier que tout marche
-        info = stock.info or {} # On récupère toutes les infos de l'actif (ticker) sélectionné
+        info = charger(ticker, "info").info or {} # On récupère toutes les infos de l'actif (ticker) sélectionné
         if not info:
             st.warning("Données indisponibles pour cet actif.")
             st.stop()
-        # --------------------------------------------------
-        # --- RÉCUPÉRATION INFORMATIONS (PRÉ-TRAITEMENT) ---
-        # --------------------------------------------------
-        # - 1. Prix et Devise -
-        price = info.get('currentPrice', info.get('regularMarketPrice'))
-        currency_code = info.get('currency', 'USD')
-        symbole = get_currency_symbol(currency_code)
-
-        # - 2. Performance YTD (Année en cours) - 
-        ytd_perf = calculate_ytd_performance(stock, price)
-
-        # - 3. Nom de l'actif + secteur
-        nom = info.get("shortName", ticker).upper()
-        secteur_brut = info.get("sector")
-        secteur = translate_sector(secteur_brut or "Indéfini")
-
+    except CircuitOuvert as e:
+        # Rien en cache pour cet actif et Yahoo en panne : on n'insiste pas (les autres actifs restent consultables)
+        st.warning(f"Yahoo Finance ne répond pas, aucune donnée en cache pour {ticker} : {e}")
+        st.stop()
     except Exception as e:
         st.error(f"Erreur de chargement : {e}")
         st.stop()
 
-# ---------------------
-# --- 4 - AFFICHAGE ---
-# ---------------------
-# ----------------------------
-# --- CRÉATION DES ONGLETS ---
-# ----------------------------
-tab_dashboard, tab_finance, tab_glossaire = st.tabs(["📈 Tableau de Bord", "📚 Analyse fondamentale","📝 Glossaire"])
-# ----------------------------------
-# --- PREMIER ONGLET : DASHBOARD ---
-# ----------------------------------
-with tab_dashboard:
+# ---------------------------------------------
+# --- 3 - BANDEAUX (FRAGMENTS INDÉPENDANTS) ---
+# ---------------------------------------------
+@st.fragment
+def bandeau_entete(ticker):
+    """Nom, secteur, prix / variation YTD et capitalisation. Dépend de : info + historique YTD."""
+    from utils.Indicateurs import calculate_ytd_performance
+    snapshot = charger(ticker, "info", "history")
+    info = snapshot.info
+    # --------------------------------------------------
+    # --- RÉCUPÉRATION INFORMATIONS (PRÉ-TRAITEMENT) ---
+    # --------------------------------------------------
+    # - 1. Prix et Devise -
+    price = info.get('currentPrice', info.get('regularMarketPrice'))
+    currency_code = info.get('currency', 'USD')
+    symbole = get_currency_symbol(currency_code)
+
+    # - 2. Performance YTD (Année en cours) - 
+    ytd_perf = calculate_ytd_performance(snapshot, price)
+
+    # - 3. Nom de l'actif + secteur
+    nom = info.get("shortName", ticker).upper()
+    secteur = translate_sector(info.get("sector") or "Indéfini")
+
+    # Données servies depuis le cache après expiration (Yahoo lent ou en panne) : mise à jour en arrière-plan
+    if snapshot.ages:
+        age = max((a for a in snapshot.ages.values() if a is not None), default=None)
+        st.caption(f"⏳ Cotation d'il y a {formater_age(age)} : mise à jour en cours, elle s'affichera au prochain rafraîchissement.")
+
     # -------------------------------------------------
     # --- Premier bandeau de données : Nom, secteur ---
     # -------------------------------------------------
@@ -120,11 +148,22 @@ with tab_dashboard:
     c1.metric(
         label="Prix",
         value=f"{price} {symbole}", 
-        delta=f"{ytd_perf:.2f} % (YTD)" # Attention streamlit gère le rouge/vert automatiquement ici
+        # Attention streamlit gère le rouge/vert automatiquement ici (pas de delta si l'historique est en retard)
+        delta=f"{ytd_perf:.2f} % (YTD)" if snapshot.est_pret('history') else None,
+        help=None if snapshot.est_pret('history') else "⏳ Performance YTD encore en chargement"
     )
     # Colonne 2 : Capitalisation 
     mcap = info.get('marketCap', 0)
     c2.metric("Capitalisation", f"{mcap / 1e9:.1f} Md {symbole}")
+
+
+@st.fragment
+def bandeau_jauges(ticker):
+    """Jauges PER et PEG. Dépend de : info."""
+    from utils.Graphiques import create_gauge
+    from utils.Seuils_Secteurs import seuils
+    info = charger(ticker, "info").info
+    secteur_brut = info.get("sector")
     # ---------------------------------------------------------------
     # --- Troisième bandeau de données : Jauges : PER, PEG, P/FCF ---
     # ---------------------------------------------------------------
@@ -132,22 +171,10 @@ with tab_dashboard:
     # --- JAUGE 1 : PER ---
     per_val = info.get('trailingPE', 0) # Récupération de la valeur du PER de la librairie de Yahoo Finance
     if per_val is None: per_val = 0 # on met 0 si l'info est absente (None)
-    # Ajout des bornes de seuil PER en fonction des secteurs 
-    SECTOR_PER_THRESHOLDS = {
-        "Technology": [20, 35],
-        "Financial Services": [12, 18],
-        "Healthcare": [15, 25],
-        "Consumer Cyclical": [15, 25],
-        "Consumer Defensive": [18, 25],
-        "Industrials": [12, 20],
-        "Energy": [10, 15],
-        "Real Estate": [12, 20],
-        "Basic Materials": [10, 15],
-        "Utilities": [12, 18]
-    }
-    thresholds = SECTOR_PER_THRESHOLDS.get(secteur_brut, [15, 25])
-
-    with c3:
+    # Bornes de seuil PER du secteur (percentiles des pairs, pré-calculés en arrière-plan : simple lecture ici)
+    thresholds = seuils("PER", secteur_brut)
+
+    with col_g1:
         # Création de la jauge à partir de notre fonction 
         fig_per, color_per = create_gauge(
             value=per_val,
@@ -183,9 +210,9 @@ with tab_dashboard:
         else:
             peg_val = 0 
 
-    PEG_THRESHOLDS = [1, 2]  # Seuils PEG :  <1 = bon marché, 1-2 = correct, >2 = cher
+    PEG_THRESHOLDS = seuils("PEG", secteur_brut)  # Seuils PEG du secteur : < bas = bon marché, bas-haut = correct, > haut = cher
 
-    with c4:
+    with col_g2:
         fig_peg, color_peg = create_gauge(
             value=peg_val,
             title="PEG",
@@ -210,17 +237,44 @@ with tab_dashboard:
             <div style='text-align: center; color: {color_peg}; margin-top: -20px; font-size: 14px;'>{status_peg}</div>
             """, unsafe_allow_html=True)
 
-# --------------------------------------------
-# --- DEUXIEME ONGLET : ANALYSE FINANCIÈRE ---
-# --------------------------------------------
-with tab_finance:
-    afficher_onglet_finance(stock, info)
+
+@st.fragment
+def onglet_finance(ticker):
+    """Analyse fondamentale. Dépend de : toutes les données (états financiers, dividendes)."""
+    from utils.Analyse_Financiere import afficher_onglet_finance
+    afficher_onglet_finance(charger(ticker))
+
+
+# ---------------------
+# --- 4 - AFFICHAGE ---
+# ---------------------
+# ----------------------------
+# --- CRÉATION DES ONGLETS ---
+# ----------------------------
+# on_change="rerun" : seul l'onglet ouvert est calculé (tab.open), les autres ne coûtent rien
+tab_dashboard, tab_finance, tab_glossaire = st.tabs(["📈 Tableau de Bord", "📚 Analyse fondamentale","📝 Glossaire"], key="onglet_actif", on_change="rerun")
+# ----------------------------------
+# --- PREMIER ONGLET : DASHBOARD ---
+# ----------------------------------
+if tab_dashboard.open:
+    with tab_dashboard:
+        bandeau_entete(ticker)
+        bandeau_jauges(ticker)
 
 # --------------------------------------------
 # --- DEUXIEME ONGLET : ANALYSE FINANCIÈRE ---
 # --------------------------------------------
-with tab_glossaire:
-    afficher_onglet_glossaire()
+if tab_finance.open:
+    with tab_finance:
+        onglet_finance(ticker)
+
+# ------------------------------------
+# --- TROISIEME ONGLET : GLOSSAIRE ---
+# ------------------------------------
+if tab_glossaire.open:
+    with tab_glossaire:
+        from utils.Glossaire.Onglet_Glossaire import afficher_onglet_glossaire
+        afficher_onglet_glossaire()
 
 
 